@@ -0,0 +1,202 @@
+"""Python API to submit many Amber calculations at once.
+
+The input nodes of all the calculations are built first, reusing the node of
+a file shared by several calculations, and stored together in a single
+transaction. The calculations are then submitted with a cap on the number of
+active processes. With thousands of calculations, e.g. a library of ligands,
+this saves the database round trips of storing the inputs of each one as it
+is submitted.
+
+Example::
+
+    from aiida_amber.batch import submit_many
+
+    specs = [
+        {
+            "calculation": "amber.sander",
+            "directory": f"ligands/{name}",
+            "inputs": {
+                "code": "sander@localhost",
+                "parameters": {"o": "md.out", "r": "md.rst7", "x": "md.nc"},
+                "mdin": "../md.in",
+                "prmtop": "complex.prmtop",
+                "inpcrd": "complex.rst7",
+            },
+        }
+        for name in names
+    ]
+    nodes = submit_many(specs, max_concurrent=200)
+"""
+
+import contextlib
+import os
+
+from aiida.engine.processes.ports import PortNamespace
+from aiida.orm import Dict, FolderData, Node, SinglefileData, load_code, to_aiida_type
+from aiida.plugins import CalculationFactory
+
+from aiida_amber.data.mdin import MdinData
+from aiida_amber.data.parmed_input import ParmedInputData
+from aiida_amber.data.prmtop import PrmtopData
+from aiida_amber.data.restart import RestartData
+from aiida_amber.data.tleap_input import TleapInputData
+from aiida_amber.utils import node_utils, sweep
+
+# Node classes of the files of each input, as set by the command line tools.
+FILE_NODE_CLASSES = {
+    "mdin": MdinData,
+    "prmtop": PrmtopData,
+    "inpcrd": RestartData,
+    "refc": RestartData,
+    "prmtop_files": PrmtopData,
+    "tleapscript": TleapInputData,
+    "parmed_script": ParmedInputData,
+}
+# Inputs of scripts that reference further input and output files.
+SCRIPT_INPUTS = ["tleapscript", "parmed_script"]
+
+
+@contextlib.contextmanager
+def working_directory(directory):
+    """Change the working directory in the context."""
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+
+def get_node_class(valid_type):
+    """Get the node class of a port, the first if it accepts several."""
+    if isinstance(valid_type, tuple):
+        valid_type = next(item for item in valid_type if item is not type(None))
+    return valid_type
+
+
+def to_node(value, valid_type, name):
+    """Convert the value of an input to a node.
+
+    :param value: a node, the path of a file, a dict of a Dict input, the
+        label of a code or a value converted by ``to_aiida_type``.
+    :param valid_type: valid type of the port of the input.
+    :param name: name of the input or of its namespace.
+    :returns: the node, unstored unless it is reused.
+    """
+    if isinstance(value, Node):
+        return value
+    node_class = get_node_class(valid_type)
+    if name == "code":
+        return load_code(value)
+    if isinstance(value, (str, os.PathLike)) and issubclass(node_class, SinglefileData):
+        return node_utils.get_file_node(
+            os.path.abspath(value), FILE_NODE_CLASSES.get(name, node_class)
+        )
+    if isinstance(value, dict) and issubclass(node_class, Dict):
+        return node_class(value)
+    return to_aiida_type(value)
+
+
+def build_namespace(namespace, values, name=None):
+    """Convert the values of a namespace of inputs to nodes.
+
+    :param namespace: the PortNamespace of the inputs.
+    :param values: dict of the input values.
+    :param name: name of the namespace, None for the top level.
+    :returns: dict of the nodes, with metadata passed on as is.
+    """
+    inputs = {}
+    for key, value in values.items():
+        port = namespace.get(key)
+        if key == "metadata" and name is None:
+            inputs[key] = value
+        elif isinstance(port, PortNamespace) and isinstance(value, dict):
+            inputs[key] = build_namespace(port, value, key)
+        elif port is None:
+            # dynamic namespaces take inputs of the type of the namespace
+            inputs[key] = to_node(value, namespace.valid_type, name)
+        else:
+            inputs[key] = to_node(value, port.valid_type, key)
+    return inputs
+
+
+def build_inputs(spec):
+    """Build the input nodes of a calculation.
+
+    Paths are relative to the directory of the spec, from which the files
+    referenced in tleap and parmed scripts are also found, as when the
+    calculation is launched from the command line.
+
+    :param spec: dict with the "calculation" entry point or class, the
+        "inputs" and optionally the "directory" of the input files and the
+        "include_dirs" of a tleap script, given to tleap with -I.
+    :returns: tuple of the calculation class and the dict of inputs.
+    """
+    process_class = spec["calculation"]
+    if isinstance(process_class, str):
+        process_class = CalculationFactory(process_class)
+    include_dirs = list(spec.get("include_dirs", ()))
+
+    with working_directory(spec.get("directory", os.getcwd())):
+        inputs = build_namespace(process_class.spec().inputs, spec["inputs"])
+        for name in SCRIPT_INPUTS:
+            if name not in inputs:
+                continue
+            if name == "tleapscript":
+                # files found in the -I dirs are uploaded with their dir
+                calc_inputs, calc_outputs = inputs[name].get_calculation_inputs_outputs(
+                    include_dirs
+                )
+            else:
+                calc_inputs, calc_outputs = inputs[name].calculation_inputs_outputs
+            for key, value in {**calc_inputs, **calc_outputs}.items():
+                inputs.setdefault(key, value)
+        if include_dirs:
+            inputs.setdefault("dirs", {})
+            for include_dir in include_dirs:
+                label = node_utils.format_link_label(os.path.normpath(include_dir))
+                inputs["dirs"].setdefault(
+                    label, FolderData(tree=os.path.abspath(include_dir))
+                )
+    return process_class, inputs
+
+
+def iter_nodes(inputs):
+    """Iterate over the nodes of a nested dict of inputs, except metadata."""
+    for key, value in inputs.items():
+        if isinstance(value, Node):
+            yield value
+        elif isinstance(value, dict) and key != "metadata":
+            yield from iter_nodes(value)
+
+
+def prepare_many(specs):
+    """Build the inputs of many calculations and store them together.
+
+    The node of a file used by several calculations is only built once, and
+    the unstored nodes are stored in a single transaction.
+
+    :param specs: list of calculation specs, see :func:`build_inputs`.
+    :returns: list of tuples of the calculation class and the dict of inputs.
+    """
+    with node_utils.cache_file_nodes():
+        prepared = [build_inputs(spec) for spec in specs]
+
+    unstored = {}
+    for _, inputs in prepared:
+        for node in iter_nodes(inputs):
+            if not node.is_stored:
+                unstored[id(node)] = node
+    sweep.store_nodes(list(unstored.values()))
+    return prepared
+
+
+def submit_many(specs, max_concurrent=None, poll_interval=10):
+    """Submit many calculations, storing all their inputs in one transaction.
+
+    :param specs: list of calculation specs, see :func:`build_inputs`.
+    :param max_concurrent: Maximum number of active processes, None for no cap.
+    :param poll_interval: Time in seconds between checks of the active processes.
+    :returns: List of the submitted process nodes.
+    """
+    return sweep.submit_with_limit(prepare_many(specs), max_concurrent, poll_interval)
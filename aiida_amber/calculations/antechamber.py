@@ -3,17 +3,17 @@ Calculations provided by aiida_amber.
 
 Register calculations via the "aiida.calculations" entry point in setup.json.
 """
-import os
 
 from aiida.common import CalcInfo, datastructures
-from aiida.engine import CalcJob
 from aiida.orm import List, SinglefileData
 from aiida.plugins import DataFactory
 
+from aiida_amber.calculations.base import AmberCalculation
+
 AntechamberParameters = DataFactory("amber.antechamber")
 
 
-class AntechamberCalculation(CalcJob):
+class AntechamberCalculation(AmberCalculation):
     """
     AiiDA calculation plugin wrapping the antechamber executable.
 
@@ -37,8 +37,6 @@ class AntechamberCalculation(CalcJob):
         spec.inputs["metadata"]["options"]["parser_name"].default = "amber.antechamber"
         spec.input('metadata.options.output_filename', valid_type=str,
                    default='antechamber.out', help='name of file produced by default.')
-        spec.input('metadata.options.output_dir', valid_type=str, default=os.getcwd(),
-                help='Directory where output files will be saved when parsed.')
         spec.input('parameters', valid_type=AntechamberParameters,
                    help='Command line parameters for antechamber')
         spec.input("input_file", valid_type=SinglefileData,
@@ -0,0 +1,76 @@
+"""
+Base class of the calculations provided by aiida_amber.
+
+The calculations export their outputs to the local ``output_dir``. Where the
+outputs are exported to does not change the calculation, so the export
+options are left out of the hash used by AiiDA caching, the way AiiDA leaves
+out scheduler options such as ``queue_name``. Identical calculations launched
+from different directories can then be taken from the cache, in which case
+the outputs of the cached calculation are exported to the ``output_dir`` of
+the new one. A node taken from the cache gets the attributes of its source,
+so the export options of each calculation are also kept in its extras.
+"""
+import os
+
+from aiida.common.lang import classproperty
+from aiida.engine import CalcJob
+from aiida.orm import CalcJobNode
+
+from aiida_amber.utils.repository import (
+    EXPORT_OPTIONS,
+    export_outputs,
+    get_export_option,
+    validate_export_mode,
+)
+
+
+class AmberCalcJobNode(CalcJobNode):
+    """Node of the amber calculations, with the export options left out of
+    its hash."""
+
+    @classproperty
+    def _hash_ignored_attributes(cls):  # pylint: disable=no-self-argument
+        return super()._hash_ignored_attributes + tuple(EXPORT_OPTIONS)
+
+
+# prepare_for_submission is implemented by each amber calculation
+class AmberCalculation(CalcJob):  # pylint: disable=abstract-method
+    """
+    Base class of the amber calculations, with the export options left out
+    of the hash of the calculation.
+    """
+
+    _node_class = AmberCalcJobNode
+
+    @classmethod
+    def define(cls, spec):
+        """Define the options where the outputs are exported to."""
+        # yapf: disable
+        super().define(spec)
+
+        spec.input('metadata.options.output_dir', valid_type=str, default=os.getcwd,
+                help='Directory where output files will be saved when parsed.')
+        spec.input('metadata.options.output_export', valid_type=str, default='copy',
+                validator=validate_export_mode,
+                help='How output files are saved to output_dir: "copy", "reflink" from '
+                'the repository (falling back to copy), or "none" to export them '
+                'later with aiida_amber_export.')
+
+    def run(self):
+        """Run the calculation, exporting the outputs of a calculation taken
+        from the cache, whose parser is not called."""
+        for name in EXPORT_OPTIONS:
+            self.node.base.extras.set(name, self.inputs.metadata.options[name])
+        result = super().run()
+        if self.node.base.caching.is_created_from_cache:
+            self.export_cached_outputs()
+        return result
+
+    def export_cached_outputs(self):
+        """Export the outputs of a calculation taken from the cache to its
+        output_dir, as its parser would have done."""
+        if "retrieved" not in self.node.outputs:
+            return
+        output_dir = get_export_option(self.node, "output_dir")
+        export_mode = get_export_option(self.node, "output_export")
+        export_outputs(self.node, output_dir, export_mode)
@@ -0,0 +1,5 @@
+"""
+Monitors for calculations provided by aiida_amber.
+
+Register monitors via the "aiida.calculations.monitors" entry point in pyproject.toml.
+"""
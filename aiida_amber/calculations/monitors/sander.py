@@ -0,0 +1,52 @@
+"""Monitors for the :class:`aiida_amber.calculations.sander.SanderCalculation` plugin."""
+import os
+import tempfile
+import time
+
+from aiida_amber.utils import mdinfo
+
+# Name of the node extra the progress of the job is recorded in.
+PROGRESS_EXTRA = "progress"
+
+
+def monitor_progress(node, transport, stall_timeout=None):
+    """Fetch the mdinfo file of a running sander job and record its progress.
+
+    Only the small mdinfo file is copied from the remote working directory,
+    the steps completed, ns/day and estimated time remaining found in it are
+    stored in the ``progress`` extra of the calculation node, together with
+    the time the step count last advanced.
+
+    :param node: The node representing the calculation job.
+    :param transport: The transport that can be used to retrieve files from remote working directory.
+    :param stall_timeout: optional number of seconds after which the job is
+        killed if the step count printed in mdinfo has not advanced.
+    :returns: A string if the job should be killed, `None` otherwise.
+    """
+    filename = node.inputs.parameters.get_dict().get("inf", "mdinfo")
+    # mdinfo is only written once sander has printed its first step.
+    if not transport.isfile(filename):
+        return None
+
+    with tempfile.TemporaryDirectory() as dirpath:
+        localpath = os.path.join(dirpath, "mdinfo")
+        transport.getfile(filename, localpath)
+        with open(localpath, encoding="utf-8", errors="replace") as handle:
+            progress = mdinfo.parse_mdinfo(handle)
+
+    now = time.time()
+    previous = node.base.extras.get(PROGRESS_EXTRA, {})
+    if "last_advanced" in previous and progress.get("nstep") == previous.get("nstep"):
+        progress["last_advanced"] = previous["last_advanced"]
+    else:
+        progress["last_advanced"] = now
+    progress["last_checked"] = now
+    node.base.extras.set(PROGRESS_EXTRA, progress)
+
+    if stall_timeout is not None and now - progress["last_advanced"] > stall_timeout:
+        return (
+            f"sander has not advanced beyond step {progress.get('nstep')} "
+            f"in the last {stall_timeout} seconds"
+        )
+
+    return None
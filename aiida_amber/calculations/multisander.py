@@ -0,0 +1,216 @@
+"""
+Calculation running an ensemble of sander replicas as a single multisander
+job, with one line per replica in a generated groupfile.
+
+Register calculations via the "aiida.calculations" entry point in setup.json.
+"""
+import os
+
+from aiida.common import CalcInfo, datastructures, exceptions
+from aiida.engine.processes.calcjobs.calcjob import validate_calc_job
+from aiida.orm import ArrayData, Dict, Int, SinglefileData
+from aiida.plugins import DataFactory
+
+from aiida_amber.calculations.base import AmberCalculation
+from aiida_amber.utils.namelist import find_namelist, set_namelist_values
+
+SanderParameters = DataFactory("amber.sander")
+
+# Output files written by each replica into its own directory.
+REPLICA_OUTPUTS = ["o", "inf", "x", "v", "frc", "e", "r", "rdip"]
+GROUPFILE = "groupfile"
+MDIN = "mdin"
+REMLOG = "rem.log"
+# Replica exchange types whose rem.log can be parsed, 1 is temperature REMD.
+REM_TYPES = [1]
+
+
+def validate_inputs(inputs, ctx):
+    """Validate the replicas, their seeds and the parameters."""
+    # replacing the namespace validator drops the one set by CalcJob
+    message = validate_calc_job(inputs, ctx)
+    if message:
+        return message
+
+    parameters = inputs["parameters"].get_dict() if "parameters" in inputs else {}
+    unsupported = [
+        item for item in parameters if item not in REPLICA_OUTPUTS + ["O", "A"]
+    ]
+    if unsupported:
+        return f"parameters {unsupported} are not supported in an ensemble"
+    if "rem" in inputs and inputs["rem"].value not in REM_TYPES:
+        return f"`rem` should be one of {REM_TYPES}, got: {inputs['rem'].value}"
+    # the replicas are set by a workchain if inpcrd is excluded from its inputs
+    if "inpcrd" not in ctx:
+        return None
+    replicas = inputs.get("inpcrd", {})
+    if not replicas:
+        return "at least one replica should be given in `inpcrd`"
+    if "seeds" in inputs:
+        seeds = inputs["seeds"].get_dict()
+        missing = [label for label in replicas if label not in seeds]
+        if missing:
+            return f"no seed given for replicas {missing}"
+    if "cntrl" in inputs:
+        cntrl = inputs["cntrl"].get_dict()
+        unknown = [label for label in cntrl if label not in replicas]
+        if unknown:
+            return f"`cntrl` given for replicas {unknown} that are not in `inpcrd`"
+    if ("seeds" in inputs or "cntrl" in inputs) and "mdin" in inputs:
+        if find_namelist(inputs["mdin"].get_content(), "cntrl") is None:
+            return "`mdin` has no &cntrl namelist to set `seeds` and `cntrl` in"
+    if "rem" in inputs and len(replicas) < 2:
+        return "replica exchange needs at least two replicas"
+    return None
+
+
+class MultiSanderCalculation(AmberCalculation):
+    """
+    AiiDA calculation plugin running an ensemble of sander replicas.
+
+    Each replica, e.g. a different starting structure or random seed, runs in
+    its own directory with the same output filenames, and all replicas are
+    launched as one MPI job with ``sander -ng N -groupfile groupfile``.
+    """
+
+    @classmethod
+    def define(cls, spec):
+        """Define inputs and outputs of the calculation."""
+        # yapf: disable
+        super().define(spec)
+
+        # set default values for AiiDA options
+        spec.inputs['metadata']['options']['withmpi'].default = True
+        spec.inputs["metadata"]["options"]["resources"].default = {
+            "num_machines": 1,
+            "num_mpiprocs_per_machine": 1,
+        }
+
+        # required inputs
+        spec.inputs["metadata"]["options"]["parser_name"].default = "amber.multisander"
+        spec.input('metadata.options.output_filename', valid_type=str,
+                   default='sander.out')
+        spec.inputs.validator = validate_inputs
+        spec.input('parameters', valid_type=SanderParameters,
+                   help='Names of the output files written by every replica.')
+        spec.input("mdin", valid_type=SinglefileData,
+                   help="input control data shared by all replicas.")
+        spec.input("prmtop", valid_type=SinglefileData,
+                   help="input molecular topology shared by all replicas.")
+        spec.input_namespace("inpcrd", valid_type=SinglefileData, dynamic=True,
+                   help="input initial coordinates of each replica, keyed by "
+                   "replica name. The same node can be given for several replicas.")
+        spec.input("seeds", valid_type=Dict, required=False,
+                   help="random seed (ig in &cntrl) of each replica, keyed by "
+                   "replica name.")
+        spec.input("cntrl", valid_type=Dict, required=False,
+                   help="&cntrl variables set in the mdin of each replica, keyed "
+                   "by replica name, e.g. {'r0': {'temp0': 300.0}}.")
+        spec.input("rem", valid_type=Int, required=False,
+                   help="replica exchange type passed to sander as -rem, only "
+                   "temperature exchange (1) is supported. Exchanges are attempted "
+                   "every nstlim steps, numexchg times, as set in mdin.")
+
+        # outputs
+        spec.output('stdout', valid_type=SinglefileData, help='stdout')
+        spec.output_namespace("replicas", valid_type=(SinglefileData, ArrayData),
+                   dynamic=True,
+                   help="outputs of each replica, keyed by replica name and "
+                   "named as the outputs of SanderCalculation.")
+        spec.output("remlog", valid_type=SinglefileData, required=False,
+                   help="replica exchange log.")
+        spec.output("exchange", valid_type=ArrayData, required=False,
+                   help="per exchange arrays of the replica temperatures and "
+                   "exchange successes, and the acceptance ratio of neighbouring "
+                   "temperatures, parsed from the replica exchange log.")
+
+        spec.exit_code(300, "ERROR_MISSING_OUTPUT_FILES",
+            message="Calculation did not produce all expected output files.")
+
+    def prepare_for_submission(self, folder):
+        """
+        Create the groupfile and the input files of each replica.
+
+        :param folder: an `aiida.common.folders.Folder` where the plugin should
+            temporarily place all files needed by the calculation.
+        :return: `aiida.common.datastructures.CalcInfo` instance
+        """
+        labels = sorted(self.inputs.inpcrd)
+        resources = self.inputs.metadata.options.resources
+        num_mpiprocs = resources.get("num_machines", 1) * resources.get(
+            "num_mpiprocs_per_machine", 1
+        )
+        if num_mpiprocs % len(labels):
+            raise exceptions.InputValidationError(
+                f"the {num_mpiprocs} MPI processes cannot be divided over "
+                f"{len(labels)} replicas"
+            )
+
+        prmtop = self.inputs.prmtop
+        input_files = [(prmtop.uuid, prmtop.filename, prmtop.filename)]
+        output_files = [self.metadata.options.output_filename]
+        seeds = self.inputs.seeds.get_dict() if "seeds" in self.inputs else {}
+        cntrl = self.inputs.cntrl.get_dict() if "cntrl" in self.inputs else {}
+        parameters = self.inputs.parameters.get_dict()
+        mdin = self.inputs.mdin.get_content()
+
+        groupfile = []
+        for label in labels:
+            folder.get_subfolder(label, create=True)
+            inpcrd = self.inputs.inpcrd[label]
+            input_files.append(
+                (inpcrd.uuid, inpcrd.filename, os.path.join(label, inpcrd.filename))
+            )
+
+            # Each replica gets its own copy of mdin with its seed and values.
+            values = dict(cntrl.get(label, {}))
+            if label in seeds:
+                values["ig"] = seeds[label]
+            replica_mdin = mdin
+            if values:
+                replica_mdin = set_namelist_values(mdin, "cntrl", values)
+            with folder.open(os.path.join(label, MDIN), "w") as handle:
+                handle.write(replica_mdin)
+
+            line = [
+                "-i",
+                os.path.join(label, MDIN),
+                "-p",
+                prmtop.filename,
+                "-c",
+                os.path.join(label, inpcrd.filename),
+            ]
+            for item, value in parameters.items():
+                if item in REPLICA_OUTPUTS:
+                    path = os.path.join(label, value)
+                    line.extend([f"-{item}", path])
+                    # keep the replica directory when retrieving
+                    output_files.append((path, ".", 2))
+                elif value:
+                    line.append(f"-{item}")
+            groupfile.append(" ".join(line))
+
+        with folder.open(GROUPFILE, "w") as handle:
+            handle.write("\n".join(groupfile) + "\n")
+
+        codeinfo = datastructures.CodeInfo()
+        codeinfo.cmdline_params = ["-ng", str(len(labels)), "-groupfile", GROUPFILE]
+        if "rem" in self.inputs:
+            codeinfo.cmdline_params += [
+                "-rem",
+                str(self.inputs.rem.value),
+                "-remlog",
+                REMLOG,
+            ]
+            output_files.append(REMLOG)
+        codeinfo.code_uuid = self.inputs.code.uuid
+        codeinfo.stdout_name = self.metadata.options.output_filename
+        codeinfo.withmpi = self.inputs.metadata.options.withmpi
+
+        # Prepare a `CalcInfo` to be returned to the engine
+        calcinfo = CalcInfo()
+        calcinfo.codes_info = [codeinfo]
+        calcinfo.local_copy_list = input_files
+        calcinfo.retrieve_list = output_files
+
+        return calcinfo
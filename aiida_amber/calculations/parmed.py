@@ -3,17 +3,17 @@ Calculations provided by aiida_amber.
 
 Register calculations via the "aiida.calculations" entry point in setup.json.
 """
-import os
 
 from aiida.common import CalcInfo, datastructures
-from aiida.engine import CalcJob
 from aiida.orm import FolderData, List, SinglefileData
 from aiida.plugins import DataFactory
 
+from aiida_amber.calculations.base import AmberCalculation
+
 ParmedParameters = DataFactory("amber.parmed")
 
 
-class ParmedCalculation(CalcJob):
+class ParmedCalculation(AmberCalculation):
     """
     AiiDA calculation plugin wrapping the parmed executable.
 
@@ -37,8 +37,6 @@ class ParmedCalculation(CalcJob):
         spec.inputs["metadata"]["options"]["parser_name"].default = "amber.parmed"
         spec.input('metadata.options.output_filename', valid_type=str,
                    default='parmed.out', help='name of file produced by default.')
-        spec.input('metadata.options.output_dir', valid_type=str, default=os.getcwd(),
-                help='Directory where output files will be saved when parsed.')
         spec.input('parameters', valid_type=ParmedParameters,
                    help='Command line parameters for parmed')
         spec.input("parmed_script", valid_type=SinglefileData,
@@ -3,17 +3,17 @@ Calculations provided by aiida_amber.
 
 Register calculations via the "aiida.calculations" entry point in setup.json.
 """
-import os
 
 from aiida.common import CalcInfo, datastructures
-from aiida.engine import CalcJob
 from aiida.orm import List, SinglefileData
 from aiida.plugins import DataFactory
 
+from aiida_amber.calculations.base import AmberCalculation
+
 Pdb4amberParameters = DataFactory("amber.pdb4amber")
 
 
-class Pdb4amberCalculation(CalcJob):
+class Pdb4amberCalculation(AmberCalculation):
     """
     AiiDA calculation plugin wrapping the pdb4amber executable.
 
@@ -37,8 +37,6 @@ class Pdb4amberCalculation(CalcJob):
         spec.inputs["metadata"]["options"]["parser_name"].default = "amber.pdb4amber"
         spec.input('metadata.options.output_filename', valid_type=str,
                    default='pdb4amber.out', help='name of file stdout produced by default.')
-        spec.input('metadata.options.output_dir', valid_type=str, default=os.getcwd(),
-                help='Directory where output files will be saved when parsed.')
         spec.input('parameters', valid_type=Pdb4amberParameters,
                    help='Command line parameters for pdb4amber')
         spec.input("input_file", valid_type=SinglefileData,
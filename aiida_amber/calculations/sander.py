@@ -5,15 +5,178 @@ Register calculations via the "aiida.calculations" entry point in setup.json.
 """
 import os
 
-from aiida.common import CalcInfo, datastructures
-from aiida.engine import CalcJob
-from aiida.orm import SinglefileData
+from aiida.common import CalcInfo, datastructures, exceptions
+from aiida.engine.processes.calcjobs.calcjob import validate_calc_job
+from aiida.orm import ArrayData, Dict, RemoteData, SinglefileData
 from aiida.plugins import DataFactory
 
+from aiida_amber.calculations.base import AmberCalculation
+from aiida_amber.data.mdin import MdinData, parse_mdin, predict_output_size
+from aiida_amber.data.prmtop import PrmtopData
+from aiida_amber.utils.compression import COMPRESSION_FORMATS, XTC_PRECISION
+from aiida_amber.utils.prmtop import IFBOX, NATOM, read_pointers
+
 SanderParameters = DataFactory("amber.sander")
 
+# Input files, these can also be taken from the parent_folder.
+INPUT_FILES = [
+    "mdin",
+    "prmtop",
+    "inpcrd",
+    "refc",
+    "mtmd",
+    "inptraj",
+    "inpdip",
+    "cpin",
+    "cein",
+    "evbin",
+]
+REQUIRED_INPUT_FILES = ["mdin", "prmtop", "inpcrd"]
+
+# Optional outputs that can be left on the remote instead of being retrieved.
+RETAINABLE_OUTPUTS = ["x", "v", "frc", "e", "r", "rdip", "cpout", "ceout"]
+RETENTION_POLICIES = ["retrieve", "remote", "stash"]
+# Settings of the trajectory_compression option.
+COMPRESSION_SETTINGS = ["format", "precision", "keep_original"]
+
+
+def validate_output_retention(value, _):
+    """Validate the ``output_retention`` option."""
+    for item, policy in value.items():
+        if item not in RETAINABLE_OUTPUTS:
+            return f"`output_retention` can only be set for {RETAINABLE_OUTPUTS}, got: {item}"
+        if policy not in RETENTION_POLICIES:
+            return f"`output_retention` policy should be one of {RETENTION_POLICIES}, got: {policy}"
+    return None
+
+
+def validate_trajectory_compression(value, _):
+    """Validate the ``trajectory_compression`` option."""
+    unknown = [key for key in value if key not in COMPRESSION_SETTINGS]
+    if unknown:
+        return f"`trajectory_compression` can only set {COMPRESSION_SETTINGS}, got: {unknown}"
+    if value.get("format") not in COMPRESSION_FORMATS:
+        return (
+            f"`trajectory_compression` format should be one of {COMPRESSION_FORMATS}, "
+            f"got: {value.get('format')}"
+        )
+    precision = value.get("precision", XTC_PRECISION)
+    if not isinstance(precision, int) or precision < 1:
+        return f"`trajectory_compression` precision should be a positive int, got: {precision}"
+    return None
+
+
+def get_mdin_settings(mdin):
+    """Return the parsed settings of an mdin, see :func:`parse_mdin`.
+
+    :param mdin: the mdin node, a MdinData or a plain SinglefileData.
+    """
+    if isinstance(mdin, MdinData):
+        return mdin.base.attributes.all
+    return parse_mdin(mdin.get_content())
+
+
+def get_output_size(mdin, prmtop):
+    """Predict the size of the output files of a run from its mdin and the
+    number of atoms in its prmtop.
+
+    :param mdin: the mdin node, a MdinData or a plain SinglefileData.
+    :param prmtop: the prmtop node, a PrmtopData or a plain SinglefileData.
+    :returns: dict of the predicted size in bytes of each output file.
+    """
+    settings = get_mdin_settings(mdin)
+    if isinstance(prmtop, PrmtopData):
+        natom, periodic = prmtop.natom, prmtop.box_type != "none"
+    else:
+        with prmtop.open() as handle:
+            pointers = read_pointers(handle)
+        if not pointers:
+            return {}
+        natom, periodic = pointers[NATOM], pointers[IFBOX] > 0
+    return predict_output_size(settings, natom, periodic)
+
+
+def validate_inputs(inputs, ctx):
+    """Validate the input files and that outputs to be stashed are listed in
+    the stash options."""
+    # replacing the namespace validator drops the one set by CalcJob
+    message = validate_calc_job(inputs, ctx)
+    if message:
+        return message
+
+    parent_files = {}
+    if "parent_files" in inputs:
+        parent_files = inputs["parent_files"].get_dict()
+        if "parent_folder" not in inputs:
+            return "`parent_folder` is required to take `parent_files` from it"
+    unknown = [item for item in parent_files if item not in INPUT_FILES]
+    if unknown:
+        return f"`parent_files` can only be given for {INPUT_FILES}, got: {unknown}"
+    both = [item for item in parent_files if item in inputs]
+    if both:
+        return f"files {both} are given both as inputs and in `parent_files`"
+    # the ports are not in the namespace if excluded when exposing the inputs
+    missing = [
+        item
+        for item in REQUIRED_INPUT_FILES
+        if item in ctx and item not in inputs and item not in parent_files
+    ]
+    if missing:
+        return f"files {missing} should be given as inputs or in `parent_files`"
+
+    parameters = {}
+    if "parameters" in inputs:
+        parameters = inputs["parameters"].get_dict()
+    # sander writes to its outputs in place, so they must not be links
+    # to files in the parent folder.
+    linked = [os.path.basename(path) for path in parent_files.values()]
+    overwritten = [filename for filename in parameters.values() if filename in linked]
+    if overwritten:
+        return f"output files {overwritten} would overwrite files in `parent_folder`"
+
+    options = inputs["metadata"]["options"]
+    budget = options.get("output_budget")
+    if budget is not None and "mdin" in inputs and "prmtop" in inputs:
+        sizes = get_output_size(inputs["mdin"], inputs["prmtop"])
+        if sum(sizes.values()) > budget:
+            largest = {
+                name: f"{size / 1e9:.2f} GB"
+                for name, size in sorted(sizes.items(), key=lambda item: -item[1])
+                if size
+            }
+            return (
+                f"the outputs are predicted to take {sum(sizes.values()) / 1e9:.2f} "
+                f"GB, more than `output_budget` ({budget / 1e9:.2f} GB): {largest}"
+            )
+
+    # the lossless compression only converts ASCII mdcrd (ioutfm=0) to NetCDF
+    compression = options.get("trajectory_compression", {})
+    if compression.get("format") == "netcdf" and "mdin" in inputs:
+        if get_mdin_settings(inputs["mdin"])["ioutfm"] != 0:
+            return (
+                '`trajectory_compression` format "netcdf" only converts ASCII '
+                "mdcrd, the mdin writes a NetCDF trajectory (ioutfm != 0)"
+            )
+
+    retention = options.get("output_retention", {})
+    stashed = [
+        parameters[item]
+        for item, policy in retention.items()
+        if policy == "stash" and item in parameters
+    ]
+    if not stashed:
+        return None
+    source_list = options.get("stash", {}).get("source_list", [])
+    missing = [filename for filename in stashed if filename not in source_list]
+    if missing:
+        return (
+            f"files {missing} should be stashed, add them to "
+            "`metadata.options.stash.source_list` and set `target_base`"
+        )
+    return None
 
-class SanderCalculation(CalcJob):
+
+class SanderCalculation(AmberCalculation):
     """
     AiiDA calculation plugin wrapping the sander executable.
 
@@ -37,18 +200,47 @@ class SanderCalculation(CalcJob):
         spec.inputs["metadata"]["options"]["parser_name"].default = "amber.sander"
         spec.input('metadata.options.output_filename', valid_type=str,
                    default='sander.out')
-        spec.input('metadata.options.output_dir', valid_type=str, default=os.getcwd(),
-                help='Directory where output files will be saved when parsed.')
+        spec.input('metadata.options.output_retention', valid_type=dict, required=False,
+                validator=validate_output_retention,
+                help='Map of optional output flags (e.g. "x", "v", "frc") to "retrieve" '
+                '(default), "remote" to leave the file in the remote working directory '
+                'or "stash" to leave it in the stash target set in metadata.options.stash. '
+                'Files that are not retrieved are registered as RemoteData outputs.')
+        spec.input('metadata.options.output_budget', valid_type=int, required=False,
+                help='Maximum size in bytes of the output files predicted from the '
+                'mdin write frequencies and the number of atoms in the prmtop, the '
+                'calculation is not launched if the prediction exceeds it.')
+        spec.input('metadata.options.trajectory_compression', valid_type=dict,
+                required=False, validator=validate_trajectory_compression,
+                help='Compress the retrieved mdcrd before it is stored, with "format" '
+                '"xtc" (lossy, keeping "precision" decimals of the coordinates in nm, '
+                'default 3) or "netcdf" (lossless conversion of an ASCII mdcrd written '
+                'with ioutfm=0, a NetCDF trajectory is not compressed further). '
+                'The original file is only kept '
+                'in retrieved if "keep_original" is True.')
+        spec.input('metadata.options.parent_folder_symlink', valid_type=bool,
+                default=True,
+                help='Symlink the parent_files from the parent_folder into the '
+                'working directory, otherwise they are copied on the remote.')
+        spec.inputs.validator = validate_inputs
         spec.input('parameters', valid_type=SanderParameters,
                    help='Command line parameters for sander')
-        spec.input("mdin", valid_type=SinglefileData,
+        spec.input("mdin", valid_type=SinglefileData, required=False,
                    help="input control data for the min/md run.")
-        spec.input("prmtop", valid_type=SinglefileData,
+        spec.input("prmtop", valid_type=SinglefileData, required=False,
                    help="input molecular topology, force field, "
                    "periodic box type, atom and residue names.")
-        spec.input("inpcrd", valid_type=SinglefileData,
+        spec.input("inpcrd", valid_type=SinglefileData, required=False,
                    help="input initial coordinates and (optionally) "
                    "velocities and periodic box size.")
+        spec.input("parent_folder", valid_type=RemoteData, required=False,
+                   help="remote folder of a previous calculation on the same "
+                   "computer that the parent_files are taken from.")
+        spec.input("parent_files", valid_type=Dict, required=False,
+                   help="map of input files (e.g. prmtop, inpcrd, refc) to "
+                   "paths relative to parent_folder, used instead of uploading "
+                   "them. mdin, prmtop and inpcrd must be given either as "
+                   "inputs or here.")
 
         # optional inputs
         spec.input("refc", valid_type=SinglefileData, required=False,
@@ -81,27 +273,34 @@ class SanderCalculation(CalcJob):
                     help="output user readable state info and diagnostics -o "
                     "stdout will send output to stdout (to the terminal) "
                     "instead of to a file.")
+        spec.output("energies", valid_type=ArrayData, required=False,
+                    help="energy terms parsed from each step printed in "
+                    "mdout, stored as one array per term.")
         spec.output("mdinfo", valid_type=SinglefileData,
                     help="output latest mdout-format energy info.")
 
-        # optional outputs
-        spec.output("mdcrd", valid_type=SinglefileData, required=False,
-                    help="output coordinate sets saved over trajectory.")
-        spec.output("mdvel", valid_type=SinglefileData, required=False,
-                    help="output velocity sets saved over trajectory.")
-        spec.output("mdfrc", valid_type=SinglefileData, required=False,
-                    help="output force sets saved over trajectory.")
-        spec.output("mden", valid_type=SinglefileData, required=False,
+        # optional outputs, these are RemoteData references instead
+        # when kept on the remote through the output_retention option.
+        spec.output("mdcrd", valid_type=(SinglefileData, RemoteData), required=False,
+                    help="output coordinate sets saved over trajectory, "
+                    "a NetcdfTrajectoryData when written with ioutfm=1.")
+        spec.output("mdvel", valid_type=(SinglefileData, RemoteData), required=False,
+                    help="output velocity sets saved over trajectory, "
+                    "a NetcdfTrajectoryData when written with ioutfm=1.")
+        spec.output("mdfrc", valid_type=(SinglefileData, RemoteData), required=False,
+                    help="output force sets saved over trajectory, "
+                    "a NetcdfTrajectoryData when written with ioutfm=1.")
+        spec.output("mden", valid_type=(SinglefileData, RemoteData), required=False,
                     help="output extensive energy data over trajectory "
                     "(not synchronized with mdcrd or mdvel).")
-        spec.output("restrt", valid_type=SinglefileData, required=False,
+        spec.output("restrt", valid_type=(SinglefileData, RemoteData), required=False,
                     help="output final coordinates, velocity, and box "
                     "dimensions if any - for restarting run.")
-        spec.output("rstdip", valid_type=SinglefileData, required=False,
+        spec.output("rstdip", valid_type=(SinglefileData, RemoteData), required=False,
                     help="output polarizable dipole file, when indmeth=3.")
-        spec.output("cpout", valid_type=SinglefileData, required=False,
+        spec.output("cpout", valid_type=(SinglefileData, RemoteData), required=False,
                     help="output protonation state data saved over trajectory.")
-        spec.output("ceout", valid_type=SinglefileData, required=False,
+        spec.output("ceout", valid_type=(SinglefileData, RemoteData), required=False,
                     help="output redox state data saved over trajectory.")
         spec.output("suffix", valid_type=str, required=False,
                     help="output this string will be added to all unspecified "
@@ -122,18 +321,6 @@ class SanderCalculation(CalcJob):
         codeinfo = datastructures.CodeInfo()
 
         # Setup data structures for files.
-        input_options = [
-            "mdin",
-            "prmtop",
-            "inpcrd",
-            "refc",
-            "mtmd",
-            "inptraj",
-            "inpdip",
-            "cpin",
-            "cein",
-            "evbin",
-        ]
         output_options = [
             "o",
             "inf",
@@ -154,7 +341,7 @@ class SanderCalculation(CalcJob):
         output_files = []
 
         # Map input files to AiiDA plugin data types.
-        for item in input_options:
+        for item in INPUT_FILES:
             if item in self.inputs:
                 cmdline_input_files[item] = self.inputs[item].filename
                 input_files.append(
@@ -165,11 +352,40 @@ class SanderCalculation(CalcJob):
                     )
                 )
 
-        # Add output files to retrieve list.
+        # Take input files from the parent folder on the remote.
+        remote_files = []
+        if "parent_files" in self.inputs:
+            parent_folder = self.inputs.parent_folder
+            if parent_folder.computer.uuid != self.node.computer.uuid:
+                raise exceptions.InputValidationError(
+                    "parent_folder must be on the computer the calculation runs on"
+                )
+            for item, path in self.inputs.parent_files.get_dict().items():
+                filename = os.path.basename(path)
+                cmdline_input_files[item] = filename
+                remote_files.append(
+                    (
+                        parent_folder.computer.uuid,
+                        os.path.join(parent_folder.get_remote_path(), path),
+                        filename,
+                    )
+                )
+
+        # Add output files to retrieve list, unless they are kept on the remote.
+        # A trajectory that is compressed is only retrieved temporarily for
+        # the parser, unless the original is kept.
+        retention = self.inputs.metadata.options.get("output_retention", {})
+        compression = self.inputs.metadata.options.get("trajectory_compression", {})
+        temporary_files = []
         output_files.append(self.metadata.options.output_filename)
         for item in output_options:
             if item in self.inputs.parameters:
-                output_files.append(self.inputs.parameters[item])
+                if retention.get(item, "retrieve") != "retrieve":
+                    continue
+                if item == "x" and compression and not compression.get("keep_original"):
+                    temporary_files.append(self.inputs.parameters[item])
+                else:
+                    output_files.append(self.inputs.parameters[item])
 
         # Form the commandline.
         codeinfo.cmdline_params = self.inputs.parameters.cmdline_params(
@@ -184,6 +400,11 @@ class SanderCalculation(CalcJob):
         calcinfo = CalcInfo()
         calcinfo.codes_info = [codeinfo]
         calcinfo.local_copy_list = input_files
+        if self.inputs.metadata.options.parent_folder_symlink:
+            calcinfo.remote_symlink_list = remote_files
+        else:
+            calcinfo.remote_copy_list = remote_files
         calcinfo.retrieve_list = output_files
+        calcinfo.retrieve_temporary_list = temporary_files
 
         return calcinfo
@@ -3,17 +3,17 @@ Calculations provided by aiida_amber.
 
 Register calculations via the "aiida.calculations" entry point in setup.json.
 """
-import os
 
 from aiida.common import CalcInfo, datastructures
-from aiida.engine import CalcJob
 from aiida.orm import FolderData, List, SinglefileData
 from aiida.plugins import DataFactory
 
+from aiida_amber.calculations.base import AmberCalculation
+
 TleapParameters = DataFactory("amber.tleap")
 
 
-class TleapCalculation(CalcJob):
+class TleapCalculation(AmberCalculation):
     """
     AiiDA calculation plugin wrapping the tleap executable.
 
@@ -37,8 +37,6 @@ class TleapCalculation(CalcJob):
         spec.inputs["metadata"]["options"]["parser_name"].default = "amber.tleap"
         spec.input('metadata.options.output_filename', valid_type=str,
                    default='tleap.out', help='name of file produced by default.')
-        spec.input('metadata.options.output_dir', valid_type=str, default=os.getcwd(),
-                help='Directory where output files will be saved when parsed.')
         spec.input('parameters', valid_type=TleapParameters,
                    help='Command line parameters for tleap')
         spec.input("tleapscript", valid_type=SinglefileData,
@@ -119,7 +117,10 @@ class TleapCalculation(CalcJob):
                             )
                         )
                 elif item == "dirs":
-                    cmdline_input_files[item] = self.inputs[item].filename
+                    # each dir is uploaded under its name and given with -I
+                    cmdline_input_files[item] = {
+                        directory: directory for directory in self.inputs[item]
+                    }
                     for directory, obj in self.inputs[item].items():
                         input_files.append(
                             (
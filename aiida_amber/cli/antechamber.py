@@ -9,14 +9,14 @@ import os
 import click
 
 from aiida import cmdline, engine
-from aiida.orm import SinglefileData
 from aiida.plugins import CalculationFactory, DataFactory
 
 from aiida_amber import helpers
-
-# from aiida_amber.utils import searchprevious
+from aiida_amber.utils import node_utils
+from aiida_amber.workflows import dependent
 
 
+@dependent.defers_missing_files
 def launch(params):
     """Run antechamber.
 
@@ -30,6 +30,10 @@ def launch(params):
     # Prune unused CLI parameters from dict.
     params = {k: v for k, v in params.items() if v is not None}
 
+    # Upstream processes, e.g. those producing the input files, the daemon
+    # waits for before launching the calculation.
+    wait_for = params.pop("wait_for", ())
+
     # dict to hold our calculation data.
     inputs = {
         "metadata": {
@@ -38,36 +42,36 @@ def launch(params):
     }
 
     # If code is not initialised, then setup.
-    if "code" in inputs:
+    if "code" in params:
         inputs["code"] = params.pop("code")
     else:
         computer = helpers.get_computer()
         inputs["code"] = helpers.get_code(entry_point="antechamber", computer=computer)
 
     # Prepare input parameters in AiiDA formats.
-    inputs["input_file"] = SinglefileData(
-        file=os.path.join(os.getcwd(), params.pop("i"))
+    inputs["input_file"] = node_utils.get_file_node(
+        os.path.join(os.getcwd(), params.pop("i"))
     )
 
     if "cf" in params:
-        inputs["charge_file"] = SinglefileData(
-            file=os.path.join(os.getcwd(), params.pop("cf"))
+        inputs["charge_file"] = node_utils.get_file_node(
+            os.path.join(os.getcwd(), params.pop("cf"))
         )
     if "a" in params:
-        inputs["additional_file"] = SinglefileData(
-            file=os.path.join(os.getcwd(), params.pop("a"))
+        inputs["additional_file"] = node_utils.get_file_node(
+            os.path.join(os.getcwd(), params.pop("a"))
         )
     if "rf" in params:
-        inputs["res_top_file"] = SinglefileData(
-            file=os.path.join(os.getcwd(), params.pop("rf"))
+        inputs["res_top_file"] = node_utils.get_file_node(
+            os.path.join(os.getcwd(), params.pop("rf"))
         )
     if "ch" in params:
-        inputs["check_file"] = SinglefileData(
-            file=os.path.join(os.getcwd(), params.pop("ch"))
+        inputs["check_file"] = node_utils.get_file_node(
+            os.path.join(os.getcwd(), params.pop("ch"))
         )
     if "ge" in params:
-        inputs["esp_file"] = SinglefileData(
-            file=os.path.join(os.getcwd(), params.pop("ge"))
+        inputs["esp_file"] = node_utils.get_file_node(
+            os.path.join(os.getcwd(), params.pop("ge"))
         )
 
     AntechamberParameters = DataFactory("amber.antechamber")
@@ -79,12 +83,15 @@ def launch(params):
 
     # check if a pytest test is running, if so run rather than submit aiida job
     # Note: in order to submit your calculation to the aiida daemon, do:
-    # pylint: disable=unused-variable
-    if "PYTEST_CURRENT_TEST" in os.environ:
+    if wait_for:
+        future = dependent.launch_after(wait_for, "amber.antechamber", inputs)
+    elif "PYTEST_CURRENT_TEST" in os.environ:
         future = engine.run(CalculationFactory("amber.antechamber"), **inputs)
     else:
         future = engine.submit(CalculationFactory("amber.antechamber"), **inputs)
 
+    return future
+
 
 @click.command()
 @cmdline.utils.decorators.with_dbenv()
@@ -96,6 +103,14 @@ def launch(params):
     type=str,
     help="Short metadata description",
 )
+@click.option(
+    "--wait-for",
+    type=int,
+    multiple=True,
+    help="PK of a process that must finish successfully before this one is "
+    "launched, can be given multiple times. The calculation is launched by the "
+    "daemon, with input files not written yet taken from the process outputs",
+)
 
 # Required inputs
 @click.option("-i", default="input.mol2", type=str, help="input file name")  # file
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+"""Command line utility to launch many Amber jobs with AiiDA from one process.
+
+The jobs are read from JSONL or YAML manifests, or from a glob of scripts,
+and launched one after the other with the ``launch`` function of the
+``aiida_<program>`` command of their program. The profile is loaded once and
+the nodes of local files shared by the jobs, e.g. a topology, are reused
+instead of being looked up again for every job.
+
+Each job of a manifest gives its program, the options of the
+``aiida_<program>`` command as a mapping or as a list of arguments, and the
+directory it is launched from, relative to the manifest::
+
+    {"program": "sander", "directory": "lig1", "options": {"i": "md.in", "p": "parm7", "c": "rst7"}}
+    {"program": "tleap", "directory": "lig2", "args": "-f tleap.in -I ../leaprc"}
+
+A YAML manifest holds a list of the same mappings.
+
+Usage: aiida_amber_batch --help
+"""
+
+import glob
+import json
+import os
+import shlex
+import sys
+
+import click
+import yaml
+
+from aiida import cmdline
+from aiida.orm import ProcessNode
+
+from aiida_amber.cli import antechamber, parmed, pdb4amber, sander, tleap
+from aiida_amber.utils import node_utils
+
+# Modules of the command line utilities of each program.
+PROGRAMS = {
+    "sander": sander,
+    "tleap": tleap,
+    "antechamber": antechamber,
+    "pdb4amber": pdb4amber,
+    "parmed": parmed,
+}
+# Option taking the input script of each program, for jobs given by a glob.
+SCRIPT_OPTIONS = {
+    "sander": "-i",
+    "tleap": "-f",
+    "antechamber": "-i",
+    "pdb4amber": "-i",
+    "parmed": "-i",
+}
+
+
+def read_manifest(path):
+    """Read the jobs of a JSONL or YAML manifest.
+
+    :param path: path of the manifest, read as YAML if it ends with .yaml
+        or .yml and as one JSON object per line otherwise.
+    :returns: list of job dicts, with directories relative to the manifest
+        made absolute.
+    """
+    with open(path, encoding="utf-8") as handle:
+        if path.endswith((".yaml", ".yml")):
+            jobs = yaml.safe_load(handle) or []
+        else:
+            jobs = [json.loads(line) for line in handle if line.strip()]
+    if not isinstance(jobs, list) or not all(isinstance(job, dict) for job in jobs):
+        raise ValueError(f"manifest '{path}' should hold a list of jobs")
+
+    base = os.path.dirname(os.path.abspath(path))
+    for job in jobs:
+        job["directory"] = os.path.normpath(
+            os.path.join(base, job.get("directory", "."))
+        )
+    return jobs
+
+
+def jobs_from_glob(pattern, program, args=()):
+    """Make a job for each script matching a glob.
+
+    :param pattern: glob of the input scripts, e.g. "systems/*/tleap.in".
+    :param program: program run on each script.
+    :param args: arguments shared by the jobs.
+    :returns: list of job dicts launched from the directory of their script.
+    """
+    return [
+        {
+            "program": program,
+            "directory": os.path.dirname(os.path.abspath(script)),
+            "args": [SCRIPT_OPTIONS[program], os.path.basename(script)] + list(args),
+        }
+        for script in sorted(glob.glob(pattern, recursive=True))
+    ]
+
+
+def get_job_args(command, job):
+    """Convert the options of a job to the arguments of its command.
+
+    :param command: the click command of the program.
+    :param job: job dict with "args", a list or a string, and/or "options",
+        a mapping of the options, e.g. "p", "wait-for" or "wait_for", to
+        their values, lists for options given multiple times.
+    :returns: list of command line arguments.
+    """
+    args = job.get("args", [])
+    if isinstance(args, str):
+        args = shlex.split(args)
+    args = [str(arg) for arg in args]
+
+    # options by their flags without dashes, e.g. "O" and "wait-for", and
+    # by their parameter names, e.g. "wait_for"
+    options = {}
+    for param in command.params:
+        for flag in param.opts:
+            options[flag.lstrip("-")] = (param, flag)
+    for param in command.params:
+        options.setdefault(param.name, (param, param.opts[0]))
+
+    for name, value in job.get("options", {}).items():
+        if str(name).lstrip("-") not in options:
+            raise ValueError(f"unknown option '{name}' of {command.name}")
+        param, flag = options[str(name).lstrip("-")]
+        if getattr(param, "is_flag", False):
+            args += [flag] if value else []
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                args += [flag, str(item)]
+        else:
+            args += [flag, str(value)]
+    return args
+
+
+def launch_job(job, default_program=None):
+    """Launch the calculation of a job from its directory.
+
+    :param job: job dict as read from a manifest.
+    :param default_program: program of jobs that do not give one.
+    :returns: the process node, or the outputs when run in a test.
+    """
+    program = job.get("program", default_program)
+    if program not in PROGRAMS:
+        raise ValueError(f"program should be one of {list(PROGRAMS)}, got: {program}")
+    module = PROGRAMS[program]
+    args = get_job_args(module.cli, job)
+    with module.cli.make_context(f"aiida_{program}", args) as context:
+        params = context.params
+
+    cwd = os.getcwd()
+    os.chdir(job.get("directory", cwd))
+    try:
+        return module.launch(params)
+    finally:
+        os.chdir(cwd)
+
+
+def launch_jobs(jobs, default_program=None):
+    """Launch a list of jobs, carrying on past those that fail.
+
+    :param jobs: list of job dicts.
+    :param default_program: program of jobs that do not give one.
+    :returns: list of the process nodes (or outputs) and the errors of the
+        jobs that failed, as (index, message) tuples.
+    """
+    results = []
+    errors = []
+    with node_utils.cache_file_nodes():
+        for index, job in enumerate(jobs):
+            try:
+                results.append(launch_job(job, default_program))
+            except (click.ClickException, ValueError, OSError) as exc:
+                errors.append((index, str(exc)))
+            except SystemExit as exc:
+                # the launchers exit with an error message on invalid inputs
+                errors.append((index, str(exc.code)))
+            except Exception as exc:  # pylint: disable=broad-except
+                # e.g. a calculation failing validation, which should not
+                # stop the jobs after it from being launched
+                errors.append((index, f"{type(exc).__name__}: {exc}"))
+    return results, errors
+
+
+@click.command()
+@cmdline.utils.decorators.with_dbenv()
+@click.argument("manifests", nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--program",
+    type=click.Choice(list(PROGRAMS)),
+    help="Program of the jobs given by --glob and of manifest jobs without one",
+)
+@click.option(
+    "--glob",
+    "pattern",
+    type=str,
+    help="Glob of input scripts, each launched from its directory with the "
+    "program given by --program",
+)
+@click.option(
+    "--args",
+    type=str,
+    default="",
+    help="Arguments added to the jobs given by --glob, e.g. '-I ../leaprc'",
+)
+def cli(manifests, program, pattern, args):
+    """Launch many jobs from JSONL/YAML manifests or a glob of scripts.
+
+    Example usage:
+
+    $ aiida_amber_batch screening.jsonl
+
+    $ aiida_amber_batch --program tleap --glob 'ligands/*/tleap.in'
+
+    Help: $ aiida_amber_batch --help
+    """
+    jobs = []
+    try:
+        for manifest in manifests:
+            jobs += read_manifest(manifest)
+    except (ValueError, yaml.YAMLError) as exc:
+        sys.exit(f"Error: {exc}")
+    if pattern:
+        if program is None:
+            sys.exit("Error: --program is required to launch jobs given by --glob")
+        jobs += jobs_from_glob(pattern, program, shlex.split(args))
+    if not jobs:
+        sys.exit("Error: no jobs found, give a manifest or --glob")
+
+    results, errors = launch_jobs(jobs, program)
+    for result in results:
+        if isinstance(result, ProcessNode):
+            click.echo(f"Launched {result.process_label}<{result.pk}>")
+    for index, message in errors:
+        click.echo(f"Job {index} failed: {message}", err=True)
+    click.echo(f"Launched {len(results)} of {len(jobs)} jobs")
+    if errors:
+        sys.exit(f"Error: {len(errors)} jobs could not be launched")
+
+
+if __name__ == "__main__":
+    cli()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""Command line utility to export the output files of an amber calculation.
+
+This is used to write out the files of calculations that were run with the
+``output_export`` option set to ``none``, or to export them again elsewhere.
+
+Usage: aiida_amber_export --help
+"""
+
+import sys
+
+import click
+
+from aiida import cmdline, orm
+
+from aiida_amber.utils.repository import EXPORT_MODES, export_outputs, get_export_option
+
+
+@click.command()
+@cmdline.utils.decorators.with_dbenv()
+@click.argument("pk", type=int)
+@click.option(
+    "-o",
+    "--output-dir",
+    type=click.Path(file_okay=False),
+    help="Directory to export to, defaults to the output_dir of the calculation",
+)
+@click.option(
+    "--mode",
+    type=click.Choice([mode for mode in EXPORT_MODES if mode != "none"]),
+    default="copy",
+    show_default=True,
+    help="Copy the files, or reflink them from the repository.",
+)
+def cli(pk, output_dir, mode):
+    """Export the output files of an amber calculation, the retrieved files
+    and the files written by the parser, e.g. compressed trajectories.
+
+    Example usage:
+
+    $ aiida_amber_export 1234 --output-dir results --mode reflink
+
+    Help: $ aiida_amber_export --help
+    """
+    node = orm.load_node(pk)
+    if not isinstance(node, orm.CalcJobNode) or "retrieved" not in node.outputs:
+        sys.exit(f"Error: node {pk} is not a calculation with retrieved files")
+    if output_dir is None:
+        output_dir = get_export_option(node, "output_dir")
+    export_outputs(node, output_dir, mode)
+    click.echo(f"Exported the files of calculation {pk} to {output_dir}")
+
+
+if __name__ == "__main__":
+    cli()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,435 @@
+#!/usr/bin/env python
+"""Mock Amber executables for offline testing and load testing.
+
+Each command accepts the command line of the Amber program it stands in for,
+as written by the calculation plugins, and writes correctly formatted output
+files of a chosen size after a chosen runtime, so the plugin can be run and
+benchmarked without an Amber installation. The sizes follow the inputs where
+possible, e.g. the number of steps, energy records and frames of sander come
+from the mdin and the number of atoms from the prmtop, and otherwise default
+to ``--mock-natom`` atoms.
+
+The options are also read from the environment, e.g. the prepend text of a
+code can ``export AIIDA_AMBER_MOCK_RUNTIME=60`` to make each job take a minute.
+
+Usage: mock_sander --help
+"""
+
+import os
+import shlex
+import sys
+import time
+
+import click
+
+from aiida_amber.data import antechamber as antechamber_data
+from aiida_amber.data import parmed as parmed_data
+from aiida_amber.data import pdb4amber as pdb4amber_data
+from aiida_amber.data import sander as sander_data
+from aiida_amber.data import tleap as tleap_data
+from aiida_amber.data.parmed_input import parse_parmed_input_file
+from aiida_amber.data.tleap_input import parse_tleap_input_file
+from aiida_amber.utils import synthetic
+from aiida_amber.utils.namelist import parse_namelist
+from aiida_amber.utils.prmtop import IFBOX, NATOM, read_pointers
+
+CONTEXT_SETTINGS = {"ignore_unknown_options": True, "allow_extra_args": True}
+# Synthetic files written for the extensions of output files, other files
+# are written as text.
+TOPOLOGY_EXTENSIONS = [".prmtop", ".parm7", ".top"]
+COORDINATES_EXTENSIONS = [".inpcrd", ".rst7", ".crd", ".restrt", ".ncrst"]
+# Most updates of mdinfo written while a mock sander job runs.
+MAX_MDINFO_UPDATES = 100
+
+
+def mock_options(function):
+    """Add the options setting the size and runtime of a mock job."""
+    function = click.option(
+        "--mock-runtime",
+        envvar="AIIDA_AMBER_MOCK_RUNTIME",
+        default=0.0,
+        type=float,
+        show_default=True,
+        help="Time (s) the job runs for before it finishes",
+    )(function)
+    function = click.option(
+        "--mock-natom",
+        envvar="AIIDA_AMBER_MOCK_NATOM",
+        default=3000,
+        type=int,
+        show_default=True,
+        help="Number of atoms of the outputs whose size is not set by an input",
+    )(function)
+    return function
+
+
+def schema_options(cmdline_options, declared, double_dash=False):
+    """Accept the options of a parameters schema that a mock does not use.
+
+    Options that are not declared would otherwise be split by click into
+    short options, e.g. -ref of sander into -r ef.
+
+    :param cmdline_options: voluptuous schema dict of the command line options.
+    :param declared: names of the options declared by the mock.
+    :param double_dash: whether names longer than a letter take two dashes.
+    """
+
+    def decorator(function):
+        for key, value in cmdline_options.items():
+            name = key.schema
+            if name in declared:
+                continue
+            dash = "--" if double_dash and len(name) > 1 else "-"
+            function = click.option(dash + name, hidden=True, is_flag=value is bool)(
+                function
+            )
+        return function
+
+    return decorator
+
+
+def read_input(filename, program):
+    """Read an input file like the Amber programs, which stop without it."""
+    if not os.path.isfile(filename):
+        sys.exit(f"Error: {program} could not open input file '{filename}'")
+    with open(filename, encoding="utf-8", errors="replace") as handle:
+        return handle.read()
+
+
+def read_topology(filename, natom):
+    """Read the number of atoms and whether there is a box from a prmtop.
+
+    :param filename: path of the prmtop, may be None.
+    :param natom: number of atoms used if the file is not a readable prmtop.
+    :returns: tuple of the number of atoms and whether the system has a box.
+    """
+    if filename and os.path.isfile(filename):
+        with open(filename, encoding="utf-8", errors="replace") as handle:
+            pointers = read_pointers(handle)
+        if pointers:
+            return pointers[NATOM], pointers[IFBOX] > 0
+    return natom, True
+
+
+def count_atoms(filename, natom):
+    """Count the atoms of a PDB or mol2 file.
+
+    :param filename: path of the structure.
+    :param natom: number of atoms used if none are found.
+    """
+    count = 0
+    in_atoms = False
+    with open(filename, encoding="utf-8", errors="replace") as handle:
+        for line in handle:
+            if line.startswith("@<TRIPOS>"):
+                in_atoms = line.strip() == "@<TRIPOS>ATOM"
+            elif in_atoms or line.startswith(("ATOM", "HETATM")):
+                count += bool(line.strip())
+    return count or natom
+
+
+def write_output(filename, natom, program, extension=None):
+    """Write a synthetic output file of the type given by its extension.
+
+    :param filename: path of the file to be written.
+    :param natom: number of atoms of the structures and topologies.
+    :param program: name of the program that writes the file.
+    :param extension: extension giving the type, from the filename if None.
+    """
+    if extension is None:
+        extension = os.path.splitext(filename)[1]
+    extension = extension.lower()
+    with open(filename, "w", encoding="utf-8") as handle:
+        if extension in TOPOLOGY_EXTENSIONS:
+            synthetic.write_prmtop(handle, natom)
+        elif extension in COORDINATES_EXTENSIONS:
+            synthetic.write_rst7(handle, natom, velocities=False)
+        elif extension == ".pdb":
+            synthetic.write_pdb(handle, natom)
+        elif extension == ".mol2":
+            synthetic.write_mol2(handle, natom)
+        else:
+            handle.write(f"synthetic output of {program}\n")
+
+
+def check_outputs(filenames, overwrite):
+    """Stop like sander does if an output file exists and -O is not given."""
+    for filename in filenames:
+        if os.path.exists(filename) and not overwrite:
+            sys.exit(
+                f"Error: sander output file '{filename}' exists, use -O to overwrite"
+            )
+
+
+@click.command(context_settings=CONTEXT_SETTINGS)
+@click.option("-i", "mdin", default="mdin", type=str, help="input control data")
+@click.option("-p", "prmtop", default="prmtop", type=str, help="input topology")
+@click.option("-c", "inpcrd", default="inpcrd", type=str, help="input coordinates")
+@click.option("-o", "mdout", default="mdout", type=str, help="output energies")
+@click.option("-inf", "mdinfo", default="mdinfo", type=str, help="output progress")
+@click.option("-r", "restrt", default="restrt", type=str, help="output restart")
+@click.option("-x", "mdcrd", default="mdcrd", type=str, help="output trajectory")
+@click.option("-O", "overwrite", is_flag=True, help="Overwrite output files")
+@click.option("-ng", "num_groups", type=int, help="number of replicas")
+@click.option("-groupfile", type=str, help="command line of each replica")
+@click.option("-rem", default=0, type=int, help="replica exchange type")
+@click.option("-remlog", default="rem.log", type=str, help="output exchange log")
+@schema_options(sander_data.cmdline_options, ["o", "inf", "r", "x", "O"])
+@mock_options
+def sander(mdin, prmtop, inpcrd, mdout, mdinfo, restrt, mdcrd, overwrite, **kwargs):
+    """Mock sander, writes mdout, mdinfo, restart and trajectory files.
+
+    The run follows nstlim, ntpr, ntwx, dt, imin and ioutfm of the &cntrl
+    namelist and updates mdinfo while it runs for --mock-runtime seconds.
+    With -groupfile each replica is run in turn as multisander does, and with
+    -rem 1 a log of numexchg temperature exchanges is written to -remlog.
+
+    Example usage:
+
+    $ AIIDA_AMBER_MOCK_RUNTIME=10 mock_sander -O -i md.in -p parm7 -c rst7 -x md.nc
+    """
+    if kwargs["groupfile"]:
+        run_groupfile(kwargs)
+        return
+    cntrl = parse_namelist(read_input(mdin, "sander"), "cntrl")
+    read_input(inpcrd, "sander")
+    natom, box = read_topology(prmtop, kwargs["mock_natom"])
+    minimisation = cntrl.get("imin", 0) == 1
+    nstlim = cntrl.get("maxcyc", 1) if minimisation else cntrl.get("nstlim", 1)
+    ntpr = max(cntrl.get("ntpr", 50), 1)
+    ntwx = 0 if minimisation else cntrl.get("ntwx", 0)
+    dt = cntrl.get("dt", 0.001)
+    nrecords = max(nstlim // ntpr, 1)
+    check_outputs([mdout, restrt] + ([mdcrd] if ntwx > 0 else []), overwrite)
+
+    runtime = kwargs["mock_runtime"]
+    start = time.time()
+    if runtime > 0:
+        updates = min(nrecords, MAX_MDINFO_UPDATES)
+        for update in range(1, updates + 1):
+            time.sleep(runtime / updates)
+            nstep = nrecords * update // updates * ntpr
+            with open(mdinfo, "w", encoding="utf-8") as handle:
+                synthetic.write_mdinfo(
+                    handle,
+                    nstep,
+                    nstlim,
+                    dt=dt,
+                    elapsed=time.time() - start,
+                    minimisation=minimisation,
+                )
+
+    if mdout == "stdout":
+        synthetic.write_mdout(
+            sys.stdout, nrecords, ntpr=ntpr, dt=dt, minimisation=minimisation
+        )
+    else:
+        with open(mdout, "w", encoding="utf-8") as handle:
+            synthetic.write_mdout(
+                handle, nrecords, ntpr=ntpr, dt=dt, minimisation=minimisation
+            )
+    with open(mdinfo, "w", encoding="utf-8") as handle:
+        elapsed = max(time.time() - start, 1e-3)
+        synthetic.write_mdinfo(
+            handle, nstlim, nstlim, dt=dt, elapsed=elapsed, minimisation=minimisation
+        )
+    with open(restrt, "w", encoding="utf-8") as handle:
+        synthetic.write_rst7(
+            handle, natom, time=nstlim * dt, velocities=not minimisation, box=box
+        )
+    if ntwx > 0:
+        nframes = nstlim // ntwx
+        if cntrl.get("ioutfm", 1) == 0:
+            with open(mdcrd, "w", encoding="utf-8") as handle:
+                synthetic.write_mdcrd(handle, natom, nframes, box=box)
+        else:
+            synthetic.write_netcdf_trajectory(
+                mdcrd, natom, nframes, box=box, time_step=ntwx * dt
+            )
+
+
+def run_groupfile(options):
+    """Run each replica of a groupfile with the mock sander, one after the
+    other, and write the replica exchange log.
+
+    :param options: options of the multisander command line.
+    """
+    lines = read_input(options["groupfile"], "sander").splitlines()
+    lines = [line for line in lines if line.strip() and not line.startswith("#")]
+    if options["num_groups"] is not None and options["num_groups"] != len(lines):
+        sys.exit(
+            f"Error: -ng {options['num_groups']} does not match the "
+            f"{len(lines)} replicas of the groupfile"
+        )
+    mock_args = ["--mock-natom", str(options["mock_natom"])]
+    mock_args += ["--mock-runtime", str(options["mock_runtime"] / len(lines))]
+    temperatures = []
+    numexchg = 1
+    for line in lines:
+        with sander.make_context("sander", shlex.split(line) + mock_args) as context:
+            cntrl = parse_namelist(
+                read_input(context.params["mdin"], "sander"), "cntrl"
+            )
+            temperatures.append(cntrl.get("temp0", 300.0))
+            numexchg = cntrl.get("numexchg", numexchg)
+            sander.invoke(context)
+    if options["rem"] == 1:
+        with open(options["remlog"], "w", encoding="utf-8") as handle:
+            synthetic.write_remlog(handle, temperatures, numexchg)
+
+
+@click.command(context_settings=CONTEXT_SETTINGS)
+@click.option("-f", "script", required=True, type=str, help="tleap script")
+@click.option("-I", "dirs", multiple=True, type=str, help="directory to search")
+@schema_options(tleap_data.cmdline_options, [])
+@mock_options
+def tleap(script, dirs, mock_natom, mock_runtime, **kwargs):
+    """Mock tleap, writes the files saved by the script.
+
+    Topologies, coordinates, PDB and mol2 files of --mock-natom atoms are
+    written for the saveAmberParm, savePdb and saveMol2 commands.
+
+    Example usage:
+
+    $ mock_tleap -f tleap.in
+    """
+    # pylint: disable=unused-argument
+    lines = read_input(script, "tleap").splitlines()
+    time.sleep(mock_runtime)
+    for directory in dirs:
+        click.echo(f"-I: Adding {directory} to search path.")
+    click.echo(f"-f: Source {script}.")
+    for filename in parse_tleap_input_file(lines)["output_files"]:
+        write_output(filename, mock_natom, "tleap")
+        click.echo(f"Writing {filename}.")
+    click.echo("Exiting LEaP: Errors = 0; Warnings = 0; Notes = 0.")
+
+
+@click.command(context_settings=CONTEXT_SETTINGS)
+@click.option("-i", "--input", "script", required=True, type=str, help="script")
+@click.option("-p", "--parm", "parm", type=str, help="input topology")
+@schema_options(parmed_data.cmdline_options, ["parm"], double_dash=True)
+@mock_options
+def parmed(script, parm, mock_natom, mock_runtime, **kwargs):
+    """Mock parmed, writes the files written by the script.
+
+    The outputs have as many atoms as the first topology that is read.
+
+    Example usage:
+
+    $ mock_parmed --input parmed.in -p parm7
+    """
+    # pylint: disable=unused-argument
+    parsed = parse_parmed_input_file(read_input(script, "parmed").splitlines())
+    topologies = [parm] if parm else []
+    topologies += [
+        filename
+        for filename in parsed["input_files"]
+        if os.path.splitext(filename)[1].lower() in TOPOLOGY_EXTENSIONS
+    ]
+    natom, _ = read_topology(topologies[0] if topologies else None, mock_natom)
+    time.sleep(mock_runtime)
+    for filename in parsed["output_files"]:
+        write_output(filename, natom, "parmed")
+        click.echo(f"Writing {filename}")
+    click.echo("Done!")
+
+
+@click.command(context_settings=CONTEXT_SETTINGS)
+@click.option("-i", "input_file", required=True, type=str, help="input file")
+@click.option("-o", "output_file", required=True, type=str, help="output file")
+@click.option("-fo", "output_format", default="mol2", type=str, help="output format")
+@schema_options(antechamber_data.cmdline_options, ["o", "fo"])
+@mock_options
+def antechamber(
+    input_file, output_file, output_format, mock_natom, mock_runtime, **kwargs
+):
+    """Mock antechamber, writes the output file in PDB or mol2 format.
+
+    The output has as many atoms as the input PDB or mol2 file.
+
+    Example usage:
+
+    $ mock_antechamber -i ligand.pdb -fi pdb -o ligand.mol2 -fo mol2
+    """
+    # pylint: disable=unused-argument
+    read_input(input_file, "antechamber")
+    natom = count_atoms(input_file, mock_natom)
+    time.sleep(mock_runtime)
+    write_output(output_file, natom, "antechamber", extension=f".{output_format}")
+    click.echo("Info: Total number of electrons: 10; net charge: 0")
+
+
+@click.command(context_settings=CONTEXT_SETTINGS)
+@click.option("-i", "--in", "input_file", required=True, type=str, help="input PDB")
+@click.option("-o", "--out", "output_file", type=str, help="output PDB")
+@click.option("-d", "--dry", "dry", is_flag=True, help="remove the waters")
+@click.option("-l", "--logfile", "logfile", type=str, help="log filename")
+@click.option("--leap-template", is_flag=True, help="write a leap template")
+@schema_options(
+    pdb4amber_data.cmdline_options,
+    ["out", "d", "dry", "l", "logfile", "leap-template"],
+    double_dash=True,
+)
+@mock_options
+def pdb4amber(
+    input_file,
+    output_file,
+    dry,
+    logfile,
+    leap_template,
+    mock_natom,
+    mock_runtime,
+    **kwargs,
+):
+    """Mock pdb4amber, copies the atoms of the input PDB.
+
+    The _sslink, _nonprot.pdb and _renum.txt files written next to the output
+    are written too, as are the files of the --dry, --logfile and
+    --leap-template options.
+
+    Example usage:
+
+    $ mock_pdb4amber -i protein.pdb -o amber.pdb
+    """
+    # pylint: disable=unused-argument
+    lines = read_input(input_file, "pdb4amber").splitlines(keepends=True)
+    atoms = [line for line in lines if line.startswith(("ATOM", "HETATM", "TER"))]
+    waters = [line for line in atoms if line[17:20] in ("HOH", "WAT")]
+    if dry:
+        atoms = [line for line in atoms if line not in waters]
+    time.sleep(mock_runtime)
+    summary = f"Summary of pdb4amber for: {input_file}\n"
+    summary += f"----------Number of atoms: {len(atoms)}\n"
+    if logfile:
+        with open(logfile, "w", encoding="utf-8") as handle:
+            handle.write(summary)
+    if output_file is None:
+        click.echo("".join(atoms) + "END")
+        return
+
+    prefix = os.path.splitext(output_file)[0]
+    with open(output_file, "w", encoding="utf-8") as handle:
+        handle.write("".join(atoms) + "END\n")
+    if dry:
+        with open(f"{prefix}_water.pdb", "w", encoding="utf-8") as handle:
+            handle.write("".join(waters) + "END\n")
+    if leap_template:
+        with open("leap.template.in", "w", encoding="utf-8") as handle:
+            handle.write(
+                "source leaprc.protein.ff14SB\nsource leaprc.water.tip3p\n"
+                f"x = loadpdb {output_file}\nsaveamberparm x {prefix}.prmtop "
+                f"{prefix}.rst7\nquit\n"
+            )
+    with open(f"{prefix}_sslink", "w", encoding="utf-8"):
+        pass
+    with open(f"{prefix}_nonprot.pdb", "w", encoding="utf-8") as handle:
+        handle.write("END\n")
+    residues = dict.fromkeys(
+        (line[17:20], line[22:26].strip()) for line in atoms if line[:4] != "TER"
+    )
+    with open(f"{prefix}_renum.txt", "w", encoding="utf-8") as handle:
+        for index, (name, resid) in enumerate(residues, 1):
+            handle.write(f"{name} {resid:>5}    {name} {index:5d}\n")
+    if not logfile:
+        click.echo(summary, nl=False)
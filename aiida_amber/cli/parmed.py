@@ -9,16 +9,16 @@ import os
 import click
 
 from aiida import cmdline, engine
-from aiida.orm import SinglefileData
 from aiida.plugins import CalculationFactory, DataFactory
 
 from aiida_amber import helpers
 from aiida_amber.data.parmed_input import ParmedInputData
+from aiida_amber.data.prmtop import PrmtopData
 from aiida_amber.utils import node_utils
-
-# from aiida_amber.utils import searchprevious
+from aiida_amber.workflows import dependent
 
 
+@dependent.defers_missing_files
 def launch(params):
     """Run parmed.
 
@@ -28,6 +28,10 @@ def launch(params):
     # Prune unused CLI parameters from dict.
     params = {k: v for k, v in params.items() if v not in [None, False]}
 
+    # Upstream processes, e.g. those producing the input files, the daemon
+    # waits for before launching the calculation.
+    wait_for = params.pop("wait_for", ())
+
     # dict to hold our calculation data.
     inputs = {
         "metadata": {
@@ -36,7 +40,7 @@ def launch(params):
     }
 
     # If code is not initialised, then setup.
-    if "code" in inputs:
+    if "code" in params:
         inputs["code"] = params.pop("code")
     else:
         computer = helpers.get_computer()
@@ -44,8 +48,8 @@ def launch(params):
 
     # Prepare input parameters in AiiDA formats.
     # Set the tleap script as a TleapInputData type node
-    inputs["parmed_script"] = ParmedInputData(
-        file=os.path.join(os.getcwd(), params.pop("input"))
+    inputs["parmed_script"] = node_utils.get_file_node(
+        os.path.join(os.getcwd(), params.pop("input")), ParmedInputData
     )
 
     # Find the inputs and outputs referenced in the tleap script
@@ -61,8 +65,8 @@ def launch(params):
         for parmfile in parm_list:
             formatted_filename = node_utils.format_link_label(parmfile)
             # inputs["prmtop_files"] = List(parm_list)
-            inputs["prmtop_files"][formatted_filename] = SinglefileData(
-                file=os.path.join(os.getcwd(), parmfile)
+            inputs["prmtop_files"][formatted_filename] = node_utils.get_file_node(
+                os.path.join(os.getcwd(), parmfile), PrmtopData
             )
     if "inpcrd" in params:
         inputs["inpcrd_files"] = {}
@@ -71,8 +75,8 @@ def launch(params):
         # inputs["inpcrd_files"] = List(inpcrd_list)
         for inpcrdfile in inpcrd_list:
             formatted_filename = node_utils.format_link_label(inpcrdfile)
-            inputs["inpcrd_files"][formatted_filename] = SinglefileData(
-                file=os.path.join(os.getcwd(), inpcrdfile)
+            inputs["inpcrd_files"][formatted_filename] = node_utils.get_file_node(
+                os.path.join(os.getcwd(), inpcrdfile)
             )
 
     # correct the flags that should contain a dash "-"
@@ -93,12 +97,15 @@ def launch(params):
 
     # check if a pytest test is running, if so run rather than submit aiida job
     # Note: in order to submit your calculation to the aiida daemon, do:
-    # pylint: disable=unused-variable
-    if "PYTEST_CURRENT_TEST" in os.environ:
+    if wait_for:
+        future = dependent.launch_after(wait_for, "amber.parmed", inputs)
+    elif "PYTEST_CURRENT_TEST" in os.environ:
         future = engine.run(CalculationFactory("amber.parmed"), **inputs)
     else:
         future = engine.submit(CalculationFactory("amber.parmed"), **inputs)
 
+    return future
+
 
 @click.command()
 @cmdline.utils.decorators.with_dbenv()
@@ -110,6 +117,14 @@ def launch(params):
     type=str,
     help="Short metadata description",
 )
+@click.option(
+    "--wait-for",
+    type=int,
+    multiple=True,
+    help="PK of a process that must finish successfully before this one is "
+    "launched, can be given multiple times. The calculation is launched by the "
+    "daemon, with input files not written yet taken from the process outputs",
+)
 
 # Required inputs
 @click.option(
@@ -9,12 +9,11 @@ import sys
 import click
 
 from aiida import cmdline, engine, orm
-from aiida.orm import SinglefileData
 from aiida.plugins import CalculationFactory, DataFactory
 
 from aiida_amber import helpers
-
-# from aiida_amber.utils import searchprevious
+from aiida_amber.utils import node_utils
+from aiida_amber.workflows import dependent
 
 
 extmap = {
@@ -39,6 +38,7 @@ extmap = {
         }
 
 
+@dependent.defers_missing_files
 def launch(params):
     """Run pdb4amber.
 
@@ -48,6 +48,10 @@ def launch(params):
     # Prune unused CLI parameters from dict.
     params = {k: v for k, v in params.items() if v not in [None, False]}
 
+    # Upstream processes, e.g. those producing the input files, the daemon
+    # waits for before launching the calculation.
+    wait_for = params.pop("wait_for", ())
+
     # dict to hold our calculation data.
     inputs = {
         "metadata": {
@@ -56,15 +60,15 @@ def launch(params):
     }
 
     # If code is not initialised, then setup.
-    if "code" in inputs:
+    if "code" in params:
         inputs["code"] = params.pop("code")
     else:
         computer = helpers.get_computer()
         inputs["code"] = helpers.get_code(entry_point="pdb4amber", computer=computer)
 
     # Prepare input parameters in AiiDA formats.
-    inputs["input_file"] = SinglefileData(
-        file=os.path.join(os.getcwd(), params.pop("in"))
+    inputs["input_file"] = node_utils.get_file_node(
+        os.path.join(os.getcwd(), params.pop("in"))
     )
 
 
@@ -126,12 +130,15 @@ def launch(params):
 
     # check if a pytest test is running, if so run rather than submit aiida job
     # Note: in order to submit your calculation to the aiida daemon, do:
-    # pylint: disable=unused-variable
-    if "PYTEST_CURRENT_TEST" in os.environ:
+    if wait_for:
+        future = dependent.launch_after(wait_for, "amber.pdb4amber", inputs)
+    elif "PYTEST_CURRENT_TEST" in os.environ:
         future = engine.run(CalculationFactory("amber.pdb4amber"), **inputs)
     else:
         future = engine.submit(CalculationFactory("amber.pdb4amber"), **inputs)
 
+    return future
+
 
 @click.command()
 @cmdline.utils.decorators.with_dbenv()
@@ -143,6 +150,14 @@ def launch(params):
     type=str,
     help="Short metadata description",
 )
+@click.option(
+    "--wait-for",
+    type=int,
+    multiple=True,
+    help="PK of a process that must finish successfully before this one is "
+    "launched, can be given multiple times. The calculation is launched by the "
+    "daemon, with input files not written yet taken from the process outputs",
+)
 
 # Required inputs
 @click.option("-i", "--in", 
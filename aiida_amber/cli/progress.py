@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""Command line utility to show the progress of running sander calculations.
+
+The progress is recorded by the ``amber.sander.progress`` monitor, which is
+attached by running ``aiida_sander`` with ``--monitor-interval``.
+
+Usage: aiida_sander_progress --help
+"""
+
+import time
+
+import click
+import tabulate
+
+from aiida import cmdline, orm
+
+from aiida_amber.calculations.monitors.sander import PROGRESS_EXTRA
+
+ACTIVE_STATES = ["created", "waiting", "running"]
+
+
+def format_duration(seconds):
+    """Format a number of seconds as hours and minutes."""
+    if seconds is None:
+        return "-"
+    minutes, _ = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m"
+
+
+def get_progress_rows(show_all=False):
+    """Query the sander calculations and tabulate their recorded progress.
+
+    :param show_all: include calculations that have already terminated.
+    :returns: list of table rows, one per calculation.
+    """
+    filters = {"process_type": "aiida.calculations:amber.sander"}
+    if not show_all:
+        filters["attributes.process_state"] = {"in": ACTIVE_STATES}
+
+    qb = orm.QueryBuilder()
+    qb.append(
+        orm.CalcJobNode,
+        filters=filters,
+        project=["id", "attributes.process_state", f"extras.{PROGRESS_EXTRA}"],
+    )
+    qb.order_by({orm.CalcJobNode: {"ctime": "asc"}})
+
+    now = time.time()
+    rows = []
+    for pk, state, progress in qb.iterall():
+        progress = progress or {}
+        if "total_steps" in progress:
+            steps = f"{progress['completed_steps']}/{progress['total_steps']}"
+        else:
+            steps = progress.get("nstep", "-")
+        last_advanced = progress.get("last_advanced")
+        rows.append(
+            [
+                pk,
+                state,
+                steps,
+                progress.get("ns_per_day", "-"),
+                format_duration(progress.get("time_remaining")),
+                format_duration(now - last_advanced if last_advanced else None),
+            ]
+        )
+    return rows
+
+
+@click.command()
+@cmdline.utils.decorators.with_dbenv()
+@click.option(
+    "-a",
+    "--all",
+    "show_all",
+    is_flag=True,
+    help="Also show calculations that have already terminated",
+)
+def cli(show_all):
+    """Show the progress of sander calculations.
+
+    Example usage:
+
+    $ aiida_sander_progress
+
+    Help: $ aiida_sander_progress --help
+    """
+    headers = ["PK", "State", "Steps", "ns/day", "Remaining", "Since last step"]
+    click.echo(tabulate.tabulate(get_progress_rows(show_all), headers=headers))
+
+
+if __name__ == "__main__":
+    cli()  # pylint: disable=no-value-for-parameter
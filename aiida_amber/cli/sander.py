@@ -4,18 +4,50 @@
 Usage: aiida_sander --help
 """
 
+import io
 import os
+import sys
 
 import click
 
 from aiida import cmdline, engine
+from aiida.orm import CalcJobNode, Dict, Node, load_node
 from aiida.plugins import CalculationFactory, DataFactory
 
 from aiida_amber import helpers
+from aiida_amber.calculations.sander import RETAINABLE_OUTPUTS
+from aiida_amber.data.mdin import MdinData
+from aiida_amber.data.prmtop import PrmtopData
+from aiida_amber.data.restart import RestartData
+from aiida_amber.utils import node_utils, sweep
+from aiida_amber.workflows import dependent
 
-# from aiida_amber.utils import searchprevious
+# Command line flags of the input files and their calculation inputs.
+INPUT_FLAGS = {
+    "i": "mdin",
+    "p": "prmtop",
+    "c": "inpcrd",
+    "ref": "refc",
+    "mtmd": "mtmd",
+    "y": "inptraj",
+    "idip": "inpdip",
+    "cpin": "cpin",
+    "cein": "cein",
+    "evbin": "evbin",
+}
 
 
+def get_coordinates_node(filepath):
+    """Get the node of a coordinates file, a RestartData if it can be read
+    as an rst7 or NetCDF restart file, otherwise a SinglefileData."""
+    try:
+        return node_utils.get_file_node(filepath, RestartData)
+    except (ValueError, TypeError):
+        # e.g. a format that parse_rst7 does not read, kept as a plain file
+        return node_utils.get_file_node(filepath)
+
+
+@dependent.defers_missing_files
 def launch(params):
     """Run sander.
 
@@ -25,7 +57,16 @@ def launch(params):
     # Prune unused CLI parameters from dict.
     params = {k: v for k, v in params.items() if v is not None}
 
-    print(params)
+    # Upstream processes, e.g. those producing the input files, the daemon
+    # waits for before launching the calculation.
+    wait_for = params.pop("wait_for", ())
+
+    # Variants of mdin to run instead of a single calculation.
+    try:
+        sweeps = [sweep.parse_sweep(spec) for spec in params.pop("sweep", ())]
+    except ValueError as exc:
+        sys.exit(f"Error: {exc}")
+    max_concurrent = params.pop("max_concurrent", None)
 
     # dict to hold our calculation data.
     inputs = {
@@ -35,61 +76,167 @@ def launch(params):
     }
 
     # If code is not initialised, then setup.
-    if "code" in inputs:
+    if "code" in params:
         inputs["code"] = params.pop("code")
     else:
         computer = helpers.get_computer()
         inputs["code"] = helpers.get_code(entry_point="amber", computer=computer)
 
+    # Input files taken from the remote folder of a previous calculation.
+    from_parent = params.pop("from_parent", ())
+    if from_parent:
+        if "parent_folder" not in params:
+            sys.exit("Error: --parent-folder is required to take files from it")
+        parent_folder = load_node(params.pop("parent_folder"))
+        if isinstance(parent_folder, CalcJobNode):
+            parent_folder = parent_folder.outputs.remote_folder
+        inputs["parent_folder"] = parent_folder
+        inputs["parent_files"] = Dict(
+            {INPUT_FLAGS[flag]: params.pop(flag) for flag in from_parent}
+        )
+    params.pop("parent_folder", None)
+
     # Prepare input parameters in AiiDA formats.
-    SinglefileData = DataFactory("core.singlefile")
-    inputs["mdin"] = SinglefileData(file=os.path.join(os.getcwd(), params.pop("i")))
-    inputs["prmtop"] = SinglefileData(file=os.path.join(os.getcwd(), params.pop("p")))
-    inputs["inpcrd"] = SinglefileData(file=os.path.join(os.getcwd(), params.pop("c")))
+    if "i" in params:
+        inputs["mdin"] = node_utils.get_file_node(
+            os.path.join(os.getcwd(), params.pop("i")), MdinData
+        )
+    if "p" in params:
+        inputs["prmtop"] = node_utils.get_file_node(
+            os.path.join(os.getcwd(), params.pop("p")), PrmtopData
+        )
+    if "c" in params:
+        inputs["inpcrd"] = get_coordinates_node(
+            os.path.join(os.getcwd(), params.pop("c"))
+        )
 
     if "ref" in params:
-        inputs["refc"] = SinglefileData(
-            file=os.path.join(os.getcwd(), params.pop("ref"))
+        inputs["refc"] = get_coordinates_node(
+            os.path.join(os.getcwd(), params.pop("ref"))
         )
     if "mtmd" in params:
-        inputs["mtmd"] = SinglefileData(
-            file=os.path.join(os.getcwd(), params.pop("mtmd"))
+        inputs["mtmd"] = node_utils.get_file_node(
+            os.path.join(os.getcwd(), params.pop("mtmd"))
         )
     if "y" in params:
-        inputs["inptraj"] = SinglefileData(
-            file=os.path.join(os.getcwd(), params.pop("y"))
+        inputs["inptraj"] = node_utils.get_file_node(
+            os.path.join(os.getcwd(), params.pop("y"))
         )
     if "idip" in params:
-        inputs["inpdip"] = SinglefileData(
-            file=os.path.join(os.getcwd(), params.pop("idip"))
+        inputs["inpdip"] = node_utils.get_file_node(
+            os.path.join(os.getcwd(), params.pop("idip"))
         )
     if "cpin" in params:
-        inputs["cpin"] = SinglefileData(
-            file=os.path.join(os.getcwd(), params.pop("cpin"))
+        inputs["cpin"] = node_utils.get_file_node(
+            os.path.join(os.getcwd(), params.pop("cpin"))
         )
     if "cein" in params:
-        inputs["cein"] = SinglefileData(
-            file=os.path.join(os.getcwd(), params.pop("cein"))
+        inputs["cein"] = node_utils.get_file_node(
+            os.path.join(os.getcwd(), params.pop("cein"))
         )
     if "evbin" in params:
-        inputs["evbin"] = SinglefileData(
-            file=os.path.join(os.getcwd(), params.pop("evbin"))
+        inputs["evbin"] = node_utils.get_file_node(
+            os.path.join(os.getcwd(), params.pop("evbin"))
+        )
+
+    # Record the progress printed to mdinfo while the job is running.
+    if "monitor_interval" in params or "stall_timeout" in params:
+        monitor = {
+            "entry_point": "amber.sander.progress",
+            "minimum_poll_interval": params.pop("monitor_interval", 60),
+            "kwargs": {},
+        }
+        if "stall_timeout" in params:
+            monitor["kwargs"]["stall_timeout"] = params.pop("stall_timeout")
+        inputs["monitors"] = {"progress": Dict(monitor)}
+
+    # Outputs that are left on the remote or stashed instead of retrieved.
+    inputs["metadata"]["options"] = {}
+    if "output_budget" in params:
+        inputs["metadata"]["options"]["output_budget"] = int(
+            params.pop("output_budget") * 1e9
         )
+    retention = {}
+    for item in params.pop("keep_remote", ()):
+        retention[item] = "remote"
+    stashed = params.pop("stash", ())
+    for item in stashed:
+        retention[item] = "stash"
+    if retention:
+        inputs["metadata"]["options"]["output_retention"] = retention
+    if stashed:
+        if "stash_dir" not in params:
+            sys.exit("Error: --stash-dir is required to stash outputs")
+        inputs["metadata"]["options"]["stash"] = {
+            "source_list": [params[item] for item in stashed if item in params],
+            "target_base": os.path.abspath(params.pop("stash_dir")),
+        }
+    params.pop("stash_dir", None)
 
     SanderParameters = DataFactory("amber.sander")
     inputs["parameters"] = SanderParameters(params)
 
+    if sweeps:
+        if wait_for:
+            sys.exit("Error: --sweep cannot be combined with --wait-for")
+        launch_sweep(inputs, sweeps, max_concurrent)
+        return
+
     # check if inputs are outputs from prev processes
     # inputs = searchprevious.get_prev_inputs(inputs, ["tprfile"])
 
     # check if a pytest test is running, if so run rather than submit aiida job
     # Note: in order to submit your calculation to the aiida daemon, do:
-    # pylint: disable=unused-variable
-    if "PYTEST_CURRENT_TEST" in os.environ:
+    if wait_for:
+        future = dependent.launch_after(wait_for, "amber.sander", inputs)
+    elif "PYTEST_CURRENT_TEST" in os.environ:
         future = engine.run(CalculationFactory("amber.sander"), **inputs)
     else:
         future = engine.submit(CalculationFactory("amber.sander"), **inputs)
 
+    return future
+
+
+def launch_sweep(inputs, sweeps, max_concurrent=None):
+    """Run sander on every combination of the swept mdin values.
+
+    The mdin variants and the shared inputs are stored in one transaction,
+    then the calculations are submitted from this single invocation, with at
+    most ``max_concurrent`` of them active at once.
+    """
+    if "mdin" not in inputs:
+        sys.exit("Error: a sweep needs the mdin template given with -i")
+    mdin = inputs["mdin"]
+    try:
+        variants = sweep.expand_sweeps(mdin.get_content(), sweeps)
+    except ValueError as exc:
+        sys.exit(f"Error: {exc}")
+    click.echo(f"Launching {len(variants)} sander calculations")
+
+    shared = [node for node in inputs.values() if isinstance(node, Node)]
+    mdins = [
+        MdinData(io.BytesIO(text.encode()), filename=mdin.filename)
+        for _, text in variants
+    ]
+    sweep.store_nodes(shared + mdins)
+
+    inputs_list = []
+    for (values, _), variant in zip(variants, mdins):
+        label = ", ".join(f"{variable}={value}" for variable, value in values.items())
+        variant_inputs = dict(inputs, mdin=variant)
+        variant_inputs["metadata"] = dict(inputs["metadata"], label=label)
+        inputs_list.append(variant_inputs)
+
+    if "PYTEST_CURRENT_TEST" in os.environ:
+        for variant_inputs in inputs_list:
+            engine.run(CalculationFactory("amber.sander"), **variant_inputs)
+    else:
+        process_class = CalculationFactory("amber.sander")
+        sweep.submit_with_limit(
+            [(process_class, variant_inputs) for variant_inputs in inputs_list],
+            max_concurrent,
+        )
+
 
 @click.command()
 @cmdline.utils.decorators.with_dbenv()
@@ -101,6 +248,79 @@ def launch(params):
     type=str,
     help="Short metadata description",
 )
+@click.option(
+    "--wait-for",
+    type=int,
+    multiple=True,
+    help="PK of a process that must finish successfully before this one is "
+    "launched, can be given multiple times. The calculation is launched by the "
+    "daemon, with input files not written yet taken from the process outputs",
+)
+@click.option(
+    "--sweep",
+    type=str,
+    multiple=True,
+    help="Namelist variable of the -i mdin to sweep over, as "
+    "[namelist.]variable=v1,v2,... or variable=start:stop:step, e.g. "
+    "temp0=300:350:10 or ewald.skinnb=1.0,2.0. One calculation is launched for "
+    "every combination of the values, can be given multiple times",
+)
+@click.option(
+    "--max-concurrent",
+    type=int,
+    help="Maximum number of sweep calculations active at once, the remaining "
+    "ones are submitted as earlier ones finish",
+)
+@click.option(
+    "--monitor-interval",
+    type=int,
+    help="Fetch mdinfo every this many seconds while the job runs and record "
+    "the progress, view it with aiida_sander_progress",
+)
+@click.option(
+    "--stall-timeout",
+    type=int,
+    help="Kill the job if the step count in mdinfo has not advanced for this "
+    "many seconds",
+)
+@click.option(
+    "--output-budget",
+    type=float,
+    help="Maximum size in GB of the output files predicted from the mdin and "
+    "prmtop, the calculation is not launched if the prediction exceeds it",
+)
+@click.option(
+    "--keep-remote",
+    type=click.Choice(RETAINABLE_OUTPUTS),
+    multiple=True,
+    help="Output flag (e.g. x) whose file is left in the remote working "
+    "directory instead of being retrieved, can be given multiple times",
+)
+@click.option(
+    "--stash",
+    type=click.Choice(RETAINABLE_OUTPUTS),
+    multiple=True,
+    help="Output flag (e.g. x) whose file is copied to --stash-dir on the "
+    "remote instead of being retrieved, can be given multiple times",
+)
+@click.option(
+    "--stash-dir",
+    type=str,
+    help="Directory on the remote computer where stashed outputs are kept",
+)
+@click.option(
+    "--parent-folder",
+    type=int,
+    help="PK of a previous calculation, or of its remote folder, on the same "
+    "computer that the --from-parent files are taken from",
+)
+@click.option(
+    "--from-parent",
+    type=click.Choice(list(INPUT_FLAGS)),
+    multiple=True,
+    help="Input flag (e.g. p) whose file is symlinked from --parent-folder "
+    "instead of being uploaded, can be given multiple times",
+)
 # Input file options
 @click.option(
     "-i", default="mdin", type=str, help="input control data for the min/md run"
@@ -9,15 +9,15 @@ import os
 import click
 
 from aiida import cmdline, engine
-from aiida.orm import SinglefileData
 from aiida.plugins import CalculationFactory, DataFactory
 
 from aiida_amber import helpers
 from aiida_amber.data.tleap_input import TleapInputData
-
-# from aiida_amber.utils import searchprevious
+from aiida_amber.utils import node_utils
+from aiida_amber.workflows import dependent
 
 
+@dependent.defers_missing_files
 def launch(params):
     """Run tleap.
 
@@ -31,6 +31,10 @@ def launch(params):
     # Prune unused CLI parameters from dict.
     params = {k: v for k, v in params.items() if v is not None}
 
+    # Upstream processes, e.g. those producing the input files, the daemon
+    # waits for before launching the calculation.
+    wait_for = params.pop("wait_for", ())
+
     # dict to hold our calculation data.
     inputs = {
         "metadata": {
@@ -39,7 +43,7 @@ def launch(params):
     }
 
     # If code is not initialised, then setup.
-    if "code" in inputs:
+    if "code" in params:
         inputs["code"] = params.pop("code")
     else:
         computer = helpers.get_computer()
@@ -47,21 +51,23 @@ def launch(params):
 
     # Prepare input parameters in AiiDA formats.
     # Set the tleap script as a TleapInputData type node
-    inputs["tleapscript"] = TleapInputData(
-        file=os.path.join(os.getcwd(), params.pop("f"))
+    inputs["tleapscript"] = node_utils.get_file_node(
+        os.path.join(os.getcwd(), params.pop("f")), TleapInputData
     )
 
-    # Find the inputs and outputs referenced in the tleap script
-    calc_inputs, calc_outputs = inputs["tleapscript"].calculation_inputs_outputs
+    # Find the inputs and outputs referenced in the tleap script and the
+    # scripts it sources, searching the leaprc dirs as tleap does
+    calc_inputs, calc_outputs = inputs["tleapscript"].get_calculation_inputs_outputs(
+        params.get("i", ())
+    )
     # add input files and dirs referenced in tleap file into inputs
     inputs.update(calc_inputs)
     inputs.update(calc_outputs)
-    print(inputs)
 
     if "i" in params:
         for i, subdir in enumerate(params["i"]):
-            inputs["dirs"][f"dir{i}"] = SinglefileData(
-                file=os.path.join(os.getcwd(), subdir)
+            inputs["dirs"][f"dir{i}"] = node_utils.get_file_node(
+                os.path.join(os.getcwd(), subdir)
             )
         params.pop("i")
 
@@ -74,12 +80,15 @@ def launch(params):
 
     # check if a pytest test is running, if so run rather than submit aiida job
     # Note: in order to submit your calculation to the aiida daemon, do:
-    # pylint: disable=unused-variable
-    if "PYTEST_CURRENT_TEST" in os.environ:
+    if wait_for:
+        future = dependent.launch_after(wait_for, "amber.tleap", inputs)
+    elif "PYTEST_CURRENT_TEST" in os.environ:
         future = engine.run(CalculationFactory("amber.tleap"), **inputs)
     else:
         future = engine.submit(CalculationFactory("amber.tleap"), **inputs)
 
+    return future
+
 
 @click.command()
 @cmdline.utils.decorators.with_dbenv()
@@ -91,6 +100,14 @@ def launch(params):
     type=str,
     help="Short metadata description",
 )
+@click.option(
+    "--wait-for",
+    type=int,
+    multiple=True,
+    help="PK of a process that must finish successfully before this one is "
+    "launched, can be given multiple times. The calculation is launched by the "
+    "daemon, with input files not written yet taken from the process outputs",
+)
 # Input file options
 @click.option(
     "-f", default="tleapscript", type=str, help="input script for tleap commands"
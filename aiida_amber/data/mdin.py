@@ -0,0 +1,158 @@
+"""Sub class of `SinglefileData` to handle sander mdin files, with the
+variables of their namelists stored as queryable attributes."""
+import math
+
+from aiida.orm import SinglefileData
+
+from aiida_amber.utils.namelist import iter_namelists, parse_namelist
+
+# &cntrl variables stored as top level attributes, with the sander defaults
+# used when they are not set. ntwr defaults to nstlim.
+CNTRL_DEFAULTS = {
+    "imin": 0,
+    "nstlim": 1,
+    "maxcyc": 1,
+    "dt": 0.001,
+    "ntpr": 50,
+    "ntwx": 0,
+    "ntwv": 0,
+    "ntwf": 0,
+    "ntwe": 0,
+    "ntwr": None,
+    "ioutfm": 1,
+    "ntxo": 2,
+}
+
+# Approximate sizes in bytes of the parts of the output files.
+MDOUT_HEADER_BYTES = 20000
+MDOUT_RECORD_BYTES = 800
+MDEN_RECORD_BYTES = 1000
+NETCDF_HEADER_BYTES = 2000
+
+
+class MdinData(SinglefileData):
+    """Class to describe a sander mdin file, its &cntrl, &ewald and &wt
+    namelists are parsed so runs can be queried by their settings, and the
+    volume of output they will write can be predicted before submission"""
+
+    def set_file(self, file, filename=None, **kwargs):
+        """Add a file to the node, parse it and set the attributes found.
+
+        :param file: absolute path to the file or a filelike object
+        :param filename: specify filename to use (defaults to name of provided file).
+        """
+        super().set_file(file, filename, **kwargs)
+
+        # Parse the namelists of the mdin file
+        parsed_info = parse_mdin(self.get_content())
+
+        # Add all other attributes found in the parsed dictionary
+        for key, value in parsed_info.items():
+            self.base.attributes.set(key, value)
+
+    @property
+    def cntrl(self):
+        """Return the variables set in the &cntrl namelist"""
+        return self.base.attributes.get("cntrl")
+
+    @property
+    def ewald(self):
+        """Return the variables set in the &ewald namelist"""
+        return self.base.attributes.get("ewald")
+
+    @property
+    def wt(self):
+        """Return the variables of each &wt namelist"""
+        return self.base.attributes.get("wt")
+
+    @property
+    def nsteps(self):
+        """Return the number of MD steps or minimisation cycles"""
+        return get_nsteps(self.base.attributes.all)
+
+    def predict_output_size(self, natom, periodic=True):
+        """Predict the size of the output files written by sander.
+
+        :param natom: number of atoms in the system, e.g. from the prmtop.
+        :param periodic: whether a box is written with each frame.
+        :returns: dict of the predicted size in bytes of each output file.
+        """
+        return predict_output_size(self.base.attributes.all, natom, periodic)
+
+
+def parse_mdin(text):
+    """Parse the namelists of an mdin file.
+
+    :param text: Content of the mdin file.
+    :returns: dict with the &cntrl, &ewald and &wt namelists and the main
+        &cntrl variables (see CNTRL_DEFAULTS) at the top level.
+    """
+    cntrl = parse_namelist(text, "cntrl")
+    parsed_info = {
+        "title": text.split("\n", 1)[0].strip(),
+        "cntrl": cntrl,
+        "ewald": parse_namelist(text, "ewald"),
+        "wt": list(iter_namelists(text, "wt")),
+    }
+    for key, default in CNTRL_DEFAULTS.items():
+        parsed_info[key] = cntrl.get(key, default)
+    if parsed_info["ntwr"] is None:
+        parsed_info["ntwr"] = parsed_info["nstlim"]
+    return parsed_info
+
+
+def get_nsteps(settings):
+    """Return the number of steps of a run, maxcyc for a minimisation."""
+    if settings["imin"] == 1:
+        return settings["maxcyc"]
+    return settings["nstlim"]
+
+
+def predict_output_size(settings, natom, periodic=True):
+    """Predict the size of the output files written by sander.
+
+    The trajectories are written every ntwx, ntwv and ntwf steps, as float32
+    in NetCDF (ioutfm=1) or as 8 character fields in ASCII (ioutfm=0). The
+    restart file is overwritten every ntwr steps, unless ntwr is negative
+    when a new one is written each time.
+
+    :param settings: dict of the top level attributes set by :func:`parse_mdin`.
+    :param natom: number of atoms in the system.
+    :param periodic: whether a box is written with each frame.
+    :returns: dict of the predicted size in bytes of each output file.
+    """
+    nsteps = get_nsteps(settings)
+    netcdf = settings["ioutfm"] == 1
+
+    def frames(interval):
+        return nsteps // interval if interval > 0 else 0
+
+    def trajectory_size(nframes, with_box):
+        if not nframes:
+            return 0
+        if netcdf:
+            frame = natom * 3 * 4 + 8 + (48 if with_box else 0)
+            return NETCDF_HEADER_BYTES + nframes * frame
+        # 10 values of 8 characters per line
+        frame = natom * 3 * 8 + math.ceil(natom * 3 / 10) + (25 if with_box else 0)
+        return 81 + nframes * frame
+
+    sizes = {}
+    # velocities are written into the coordinate trajectory with ntwv=-1
+    combined = 2 if netcdf and settings["ntwv"] == -1 else 1
+    sizes["mdcrd"] = combined * trajectory_size(frames(settings["ntwx"]), periodic)
+    sizes["mdvel"] = trajectory_size(frames(settings["ntwv"]), False)
+    sizes["mdfrc"] = trajectory_size(frames(settings["ntwf"]), False)
+    sizes["mden"] = frames(settings["ntwe"]) * MDEN_RECORD_BYTES
+    sizes["mdout"] = MDOUT_HEADER_BYTES + (frames(settings["ntpr"]) + 1) * (
+        MDOUT_RECORD_BYTES
+    )
+
+    # coordinates and velocities, as doubles in NetCDF or 12 character fields
+    if settings["ntxo"] == 2:
+        restart = NETCDF_HEADER_BYTES + natom * 3 * 8 * 2
+    else:
+        restart = 81 + 2 * (natom * 3 * 12 + math.ceil(natom / 2))
+    nrestarts = frames(-settings["ntwr"]) if settings["ntwr"] < 0 else 1
+    sizes["restrt"] = nrestarts * restart
+    return sizes
@@ -0,0 +1,177 @@
+"""Sub class of `SinglefileData` to handle the NetCDF trajectories (ioutfm=1)
+written by sander for coordinates, velocities and forces."""
+import contextlib
+
+import numpy as np
+from scipy.io import netcdf_file
+
+from aiida.orm import SinglefileData
+
+from aiida_amber.utils.repository import HDF5_MAGIC, repository_file_path
+
+# Per frame variables that can be present in an Amber NetCDF trajectory.
+FRAME_VARIABLES = ("coordinates", "velocities", "forces")
+
+
+class NetcdfTrajectoryData(SinglefileData):
+    """Class to describe an Amber NetCDF trajectory and give random access to
+    its frames without loading the whole file into memory"""
+
+    def set_file(self, file, filename=None, **kwargs):
+        """Add a file to the node, read its header and set the attributes found.
+
+        :param file: absolute path to the file or a filelike object
+        :param filename: specify filename to use (defaults to name of provided file).
+        """
+        super().set_file(file, filename, **kwargs)
+
+        # Only the header is read, the frames stay on disk.
+        with self.open_reader() as trajectory:
+            header_info = read_netcdf_header(trajectory)
+
+        # Add all other attributes found in the header
+        for key, value in header_info.items():
+            self.base.attributes.set(key, value)
+
+    @property
+    def natoms(self):
+        """Return the number of atoms in each frame"""
+        return self.base.attributes.get("natoms")
+
+    @property
+    def nframes(self):
+        """Return the number of frames in the trajectory"""
+        return self.base.attributes.get("nframes")
+
+    @property
+    def time_range(self):
+        """Return the times (ps) of the first and last frame"""
+        return self.base.attributes.get("time_range")
+
+    @property
+    def variables(self):
+        """Return the per frame variables stored in the trajectory"""
+        return self.base.attributes.get("variables")
+
+    @contextlib.contextmanager
+    def open_reader(self):
+        """Open the trajectory file with a memory-mapped NetCDF reader.
+
+        The file is mapped in place from the repository where possible, so
+        only the pages that are accessed are read from disk. Arrays taken from
+        the reader are views on the mapped file and must be copied before the
+        context exits.
+
+        :returns: context manager yielding a :class:`scipy.io.netcdf_file`
+        """
+        with self.base.repository.open(self.filename, "rb") as handle:
+            if handle.read(4) == HDF5_MAGIC:
+                raise ValueError(
+                    f"{self.filename} is a NetCDF4/HDF5 file, only the NetCDF "
+                    "classic and 64-bit offset formats written by sander are supported"
+                )
+
+        with repository_file_path(self, self.filename) as filepath:
+            trajectory = netcdf_file(filepath, "r", mmap=True)
+            try:
+                yield trajectory
+            finally:
+                trajectory.close()
+
+    def get_frames(self, frames=slice(None), atoms=slice(None), variable="coordinates"):
+        """Read a selection of frames and atoms from the trajectory.
+
+        :param frames: index, slice or list of frame indices to read.
+        :param atoms: index, slice or list of atom indices to read.
+        :param variable: one of coordinates, velocities or forces.
+        :returns: numpy array of shape (frames, atoms, 3)
+        """
+        if variable not in self.variables:
+            raise KeyError(f"{variable} not found in {self.filename}")
+        with self.open_reader() as trajectory:
+            data = trajectory.variables[variable].data
+            if np.ndim(frames) == 0 and not isinstance(frames, slice):
+                selection = np.array(data[frames, atoms], dtype=np.float32)
+            else:
+                # The frames are selected first, so that lists of frames and
+                # atoms are not paired by numpy. A slice of a memory-mapped
+                # array is a view, so only the selected frames are paged in.
+                selection = np.array(data[frames][:, atoms], dtype=np.float32)
+            # drop the view on the mapped file so it can be closed
+            del data
+        return selection
+
+    def get_last_frame(self, variable="coordinates"):
+        """Read the last frame of the trajectory.
+
+        :param variable: one of coordinates, velocities or forces.
+        :returns: numpy array of shape (atoms, 3)
+        """
+        return self.get_frames(frames=self.nframes - 1, variable=variable)
+
+    def get_box(self, frames=slice(None)):
+        """Read the unit cell lengths and angles of the selected frames.
+
+        :param frames: index, slice or list of frame indices to read.
+        :returns: numpy array of shape (frames, 6) or None without a box
+        """
+        if not self.base.attributes.get("has_box"):
+            return None
+        with self.open_reader() as trajectory:
+            box = np.concatenate(
+                [
+                    trajectory.variables["cell_lengths"].data[frames],
+                    trajectory.variables["cell_angles"].data[frames],
+                ],
+                axis=-1,
+            )
+        return box
+
+    def get_times(self):
+        """Read the time (ps) of every frame.
+
+        :returns: 1D numpy array or None if no times are stored
+        """
+        times = None
+        with self.open_reader() as trajectory:
+            if "time" in trajectory.variables:
+                times = np.array(trajectory.variables["time"].data, dtype=float)
+        return times
+
+
+def read_netcdf_header(trajectory):
+    """Collect the dimensions and metadata of an Amber NetCDF trajectory.
+
+    :param trajectory: an open :class:`scipy.io.netcdf_file`
+    :returns: dict of attributes describing the trajectory
+    """
+    variables = [name for name in FRAME_VARIABLES if name in trajectory.variables]
+    natoms = trajectory.dimensions.get("atom")
+    if variables:
+        nframes = trajectory.variables[variables[0]].shape[0]
+    else:
+        nframes = 0
+
+    header_info = {}
+    header_info["conventions"] = _decode(getattr(trajectory, "Conventions", b""))
+    header_info["title"] = _decode(getattr(trajectory, "title", b""))
+    header_info["program"] = _decode(getattr(trajectory, "program", b""))
+    header_info["natoms"] = int(natoms) if natoms else 0
+    header_info["nframes"] = int(nframes)
+    header_info["variables"] = variables
+    header_info["has_box"] = "cell_lengths" in trajectory.variables
+    if "time" in trajectory.variables and nframes:
+        times = trajectory.variables["time"].data
+        header_info["time_range"] = [float(times[0]), float(times[nframes - 1])]
+        del times
+    else:
+        header_info["time_range"] = None
+
+    return header_info
+
+
+def _decode(value):
+    """Decode a NetCDF text attribute."""
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace").strip()
+    return str(value)
@@ -11,6 +11,9 @@ class ParmedInputData(SinglefileData):
     """Class to find the inputs used and outputs produced from
     the commands in the parmed input file"""
 
+    # hash the node on the content of the script only
+    _CLS_NODE_CACHING = node_utils.ContentCaching
+
     def set_file(self, file, filename=None, **kwargs):
         """Add a file to the node, parse it and set the attributes found.
 
@@ -100,14 +103,14 @@ def add_calculation_inputs(subdirs, files):
             if os.path.isfile(file):
                 input_list.append(file)
                 calc_inputs["parmed_inpfiles"][formatted_filename] = \
-                    SinglefileData(file=os.path.join(os.getcwd(), file))
+                    node_utils.get_file_node(os.path.join(os.getcwd(), file))
 
             elif "PYTEST_CURRENT_TEST" in os.environ:
                 test_path = os.path.join(os.getcwd(), 
                                         'tests/input_files/parmed', file)
                 if os.path.isfile(test_path):
                     calc_inputs["parmed_inpfiles"][formatted_filename] = \
-                        SinglefileData(file=test_path)
+                        node_utils.get_file_node(test_path)
                 else:
                     sys.exit(f"Error: Input file {file} referenced in parmed file does not exist")
 
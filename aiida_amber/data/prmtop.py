@@ -0,0 +1,122 @@
+"""Sub class of `SinglefileData` to handle Amber prmtop topologies, with the
+offsets of their %FLAG sections indexed so single sections can be read."""
+import contextlib
+import mmap
+
+from aiida.orm import SinglefileData
+
+from aiida_amber.utils.prmtop import (
+    BOX_TYPES,
+    CHARGE_FACTOR,
+    IFBOX,
+    NATOM,
+    NRES,
+    decode_section,
+    index_sections,
+)
+from aiida_amber.utils.repository import repository_file_path
+
+
+class PrmtopData(SinglefileData):
+    """Class to describe an Amber prmtop topology, the system size and box
+    are stored as attributes and each section can be read on demand without
+    loading the whole file into memory"""
+
+    def set_file(self, file, filename=None, **kwargs):
+        """Add a file to the node, index its sections and set the attributes found.
+
+        :param file: absolute path to the file or a filelike object
+        :param filename: specify filename to use (defaults to name of provided file).
+        """
+        super().set_file(file, filename, **kwargs)
+
+        # Only the % lines and the POINTERS section are read.
+        with self.open_buffer() as buffer:
+            header_info = read_prmtop_header(buffer)
+
+        # Add all other attributes found in the header
+        for key, value in header_info.items():
+            self.base.attributes.set(key, value)
+
+    @property
+    def natom(self):
+        """Return the number of atoms"""
+        return self.base.attributes.get("natom")
+
+    @property
+    def nres(self):
+        """Return the number of residues"""
+        return self.base.attributes.get("nres")
+
+    @property
+    def box_type(self):
+        """Return the periodic box type: none, orthorhombic or octahedral"""
+        return self.base.attributes.get("box_type")
+
+    @property
+    def pointers(self):
+        """Return the values of the POINTERS section"""
+        return self.base.attributes.get("pointers")
+
+    @property
+    def flags(self):
+        """Return the flags of the sections in the file"""
+        return list(self.base.attributes.get("sections"))
+
+    @contextlib.contextmanager
+    def open_buffer(self):
+        """Memory-map the prmtop file.
+
+        The file is mapped in place from the repository where possible, so
+        only the pages that are accessed are read from disk.
+
+        :returns: context manager yielding a read-only :class:`mmap.mmap`
+        """
+        with repository_file_path(self, self.filename) as filepath:
+            with open(filepath, "rb") as handle:
+                with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    yield buffer
+
+    def get_section(self, flag):
+        """Read the data of a section, e.g. CHARGE, ATOM_NAME or RESIDUE_POINTER.
+
+        :param flag: the name of the section as given after %FLAG.
+        :returns: numpy array of ints, floats or strings.
+        """
+        sections = self.base.attributes.get("sections")
+        if flag not in sections:
+            raise KeyError(f"%FLAG {flag} not found in {self.filename}")
+        offset, length, section_format = sections[flag]
+        with self.open_buffer() as buffer:
+            return decode_section(buffer[offset : offset + length], section_format)
+
+    def get_charges(self):
+        """Read the atomic charges in units of the electron charge.
+
+        :returns: 1D numpy array of floats
+        """
+        return self.get_section("CHARGE") / CHARGE_FACTOR
+
+
+def read_prmtop_header(buffer):
+    """Index the sections of a prmtop file and read its POINTERS.
+
+    :param buffer: bytes or mmap of the prmtop file.
+    :returns: dict of attributes describing the topology
+    """
+    version, sections = index_sections(buffer)
+    pointers = []
+    if "POINTERS" in sections:
+        offset, length, section_format = sections["POINTERS"]
+        pointers = decode_section(buffer[offset : offset + length], section_format)
+        pointers = [int(pointer) for pointer in pointers]
+
+    header_info = {}
+    header_info["version"] = version
+    header_info["sections"] = sections
+    header_info["pointers"] = pointers
+    header_info["natom"] = pointers[NATOM] if pointers else 0
+    header_info["nres"] = pointers[NRES] if len(pointers) > NRES else 0
+    ifbox = pointers[IFBOX] if len(pointers) > IFBOX else 0
+    header_info["box_type"] = BOX_TYPES.get(ifbox, "none")
+    return header_info
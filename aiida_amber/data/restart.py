@@ -0,0 +1,174 @@
+"""Sub class of `SinglefileData` to handle the coordinates files read and
+written by sander (inpcrd/restrt), both ASCII rst7 and NetCDF restarts."""
+import numpy as np
+from scipy.io import netcdf_file
+
+from aiida.orm import SinglefileData
+
+from aiida_amber.utils.repository import is_netcdf, repository_file_path
+
+# Velocities in rst7 files are in Angstrom per 1/20.455 ps.
+VELOCITY_SCALE = 20.455
+# Width of the fields of coordinates, velocities and box in rst7 files.
+RST7_FIELD_WIDTH = 12
+
+
+class RestartData(SinglefileData):
+    """Class to describe an Amber coordinates/restart file, the number of
+    atoms, time and box are stored as attributes and the coordinates and
+    velocities are decoded into numpy arrays on demand"""
+
+    def set_file(self, file, filename=None, **kwargs):
+        """Add a file to the node, parse it and set the attributes found.
+
+        :param file: absolute path to the file or a filelike object
+        :param filename: specify filename to use (defaults to name of provided file).
+        """
+        super().set_file(file, filename, **kwargs)
+
+        restart = self.get_arrays()
+        header_info = {
+            "title": restart["title"],
+            "format": restart["format"],
+            "natom": restart["natom"],
+            "time": restart["time"],
+            "has_velocities": restart["velocities"] is not None,
+            "box": None if restart["box"] is None else restart["box"].tolist(),
+        }
+
+        # Add all other attributes found in the header
+        for key, value in header_info.items():
+            self.base.attributes.set(key, value)
+
+    @property
+    def natom(self):
+        """Return the number of atoms"""
+        return self.base.attributes.get("natom")
+
+    @property
+    def time(self):
+        """Return the time (ps) of the restart, None if it is not stored"""
+        return self.base.attributes.get("time")
+
+    @property
+    def box(self):
+        """Return the box lengths and angles, None without a box"""
+        return self.base.attributes.get("box")
+
+    @property
+    def has_velocities(self):
+        """Return whether velocities are stored"""
+        return self.base.attributes.get("has_velocities")
+
+    def get_arrays(self):
+        """Read the file into arrays.
+
+        :returns: dict with the title, format, natom and time, the coordinates
+            and velocities (A/ps) of shape (natom, 3) and the box of shape (6,),
+            velocities and box are None if not stored.
+        """
+        with self.base.repository.open(self.filename, "rb") as handle:
+            netcdf = is_netcdf(handle)
+            restart = None if netcdf else parse_rst7(handle.read())
+        if netcdf:
+            with repository_file_path(self, self.filename) as filepath:
+                with netcdf_file(filepath, "r", mmap=False) as restart_file:
+                    restart = read_netcdf_restart(restart_file)
+        return restart
+
+    def get_coordinates(self):
+        """Read the coordinates, a numpy array of shape (natom, 3)"""
+        return self.get_arrays()["coordinates"]
+
+    def get_velocities(self):
+        """Read the velocities (A/ps), a numpy array of shape (natom, 3) or None"""
+        return self.get_arrays()["velocities"]
+
+
+def parse_rst7(data):
+    """Parse an ASCII rst7/inpcrd file.
+
+    After the title and the line with the number of atoms (and time), all
+    values are decoded at once as fields of 12 characters, which are then
+    split into coordinates, velocities and box by their number. Files with
+    fields that are not 12 characters wide are split on whitespace instead.
+    With two atoms, six values after the coordinates are taken as the box,
+    as they cannot be told apart from velocities.
+
+    :param data: content of the file as bytes.
+    :returns: dict as returned by :meth:`RestartData.get_arrays`.
+    :raises ValueError: if the file is not a valid rst7 file.
+    """
+    first = data.find(b"\n")
+    second = data.find(b"\n", first + 1)
+    if first == -1 or second == -1:
+        raise ValueError("rst7 file should have a title and a number of atoms")
+    header = data[first + 1 : second].split()
+    if not header:
+        raise ValueError("the second line of the rst7 file has no number of atoms")
+    natom = int(header[0])
+
+    body = data[second + 1 :].replace(b"\r", b"")
+    joined = body.replace(b"\n", b"")
+    if len(joined) % RST7_FIELD_WIDTH == 0:
+        values = np.frombuffer(joined, dtype=f"S{RST7_FIELD_WIDTH}").astype(float)
+    else:
+        values = np.array(body.split(), dtype=float)
+
+    num_coordinates = natom * 3
+    remainder = values.size - num_coordinates
+    if remainder not in (0, 6, num_coordinates, num_coordinates + 6):
+        raise ValueError(
+            f"found {values.size} values in the rst7 file, expected coordinates, "
+            f"velocities and box for {natom} atoms"
+        )
+    has_box = remainder in (6, num_coordinates + 6)
+    velocities = None
+    if remainder - 6 * has_box == num_coordinates:
+        velocities = values[num_coordinates : 2 * num_coordinates].reshape(natom, 3)
+        velocities = velocities * VELOCITY_SCALE
+
+    return {
+        "title": data[:first].decode("utf-8", errors="replace").strip(),
+        "format": "rst7",
+        "natom": natom,
+        "time": float(header[1]) if len(header) > 1 else None,
+        "coordinates": values[:num_coordinates].reshape(natom, 3),
+        "velocities": velocities,
+        "box": values[-6:] if has_box else None,
+    }
+
+
+def read_netcdf_restart(restart_file):
+    """Read an Amber NetCDF restart file.
+
+    :param restart_file: an open :class:`scipy.io.netcdf_file`
+    :returns: dict as returned by :meth:`RestartData.get_arrays`.
+    """
+    variables = restart_file.variables
+    coordinates = np.array(variables["coordinates"].data, dtype=float)
+    velocities = None
+    if "velocities" in variables:
+        scale_factor = getattr(variables["velocities"], "scale_factor", 1.0)
+        velocities = np.array(variables["velocities"].data, dtype=float) * scale_factor
+    box = None
+    if "cell_lengths" in variables:
+        box = np.concatenate(
+            [variables["cell_lengths"].data, variables["cell_angles"].data]
+        ).astype(float)
+    time = None
+    if "time" in variables:
+        time = float(np.asarray(variables["time"].data).reshape(-1)[0])
+    title = getattr(restart_file, "title", b"")
+    if isinstance(title, bytes):
+        title = title.decode("utf-8", errors="replace")
+
+    return {
+        "title": title.strip(),
+        "format": "netcdf",
+        "natom": coordinates.shape[-2],
+        "time": time,
+        "coordinates": coordinates.reshape(-1, 3),
+        "velocities": velocities,
+        "box": box,
+    }
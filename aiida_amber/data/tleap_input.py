@@ -1,16 +1,18 @@
 """Sub class of `Data` to handle inputs used and outputs that will be produced
 from commands in the tleap input file."""
-import re
 import os
 import sys
 from aiida.orm import SinglefileData, FolderData, List
-from aiida_amber.utils import node_utils
+from aiida_amber.utils import node_utils, tleap_script
 
 
 class TleapInputData(SinglefileData):
     """Class to find the inputs used and outputs produced from
     the commands in the tleap input file"""
 
+    # hash the node on the content of the script only
+    _CLS_NODE_CACHING = node_utils.ContentCaching
+
     def set_file(self, file, filename=None, **kwargs):
         """Add a file to the node, parse it and set the attributes found.
 
@@ -19,12 +21,16 @@ class TleapInputData(SinglefileData):
         """
         super().set_file(file, filename, **kwargs)
 
-        # Parse the tleap file
-        parsed_info = parse_tleap_input_file(self.get_content().splitlines())
+        # Resolve the files of the tleap file from its directory, following
+        # the scripts it sources
+        directory = None
+        if isinstance(file, (str, os.PathLike)):
+            directory = os.path.dirname(os.path.abspath(file))
+        parsed_info = tleap_script.resolve_script(self.get_content(), directory)
 
         # Add all other attributes found in the parsed dictionary
-        for key, value in parsed_info.items():
-            self.base.attributes.set(key, value)
+        for key in ["input_files", "output_files", "sources"]:
+            self.base.attributes.set(key, parsed_info[key])
 
     @property
     def inpfile_list(self):
@@ -38,49 +44,40 @@ class TleapInputData(SinglefileData):
         """
         return self.base.attributes.get('output_files')
 
+    @property
+    def source_list(self):
+        """Return the list of scripts sourced by the tleap script and found
+        locally
+        """
+        return self.base.attributes.get('sources', [])
+
     @property
     def calculation_inputs_outputs(self):
         """Return the inputs for the tleap calculation job
         """
-        input_files = self.inpfile_list
-        subdirs, files = node_utils.check_filepath(input_files)
+        return self.get_calculation_inputs_outputs()
+
+    def get_calculation_inputs_outputs(self, include_dirs=()):
+        """Return the inputs for the tleap calculation job, with the files
+        referenced in the script found from the current directory.
+
+        :param include_dirs: dirs given to tleap with -I, the files found in
+            them are uploaded with their dir rather than as input files.
+        """
+        parsed_info = tleap_script.resolve_script(
+            self.get_content(), os.getcwd(), include_dirs
+        )
+        subdirs, files = node_utils.check_filepath(parsed_info["input_files"])
         calc_inputs = add_calculation_inputs(subdirs, files)
-        output_files = self.outfile_list
-        calc_outputs = add_calculation_outputs(output_files)
+        calc_outputs = add_calculation_outputs(parsed_info["output_files"])
         return calc_inputs, calc_outputs
 
 
 def parse_tleap_input_file(lines):
     """Parse tleap script and find any instances of file loads (inputs)
-    or saves (outputs)
+    or saves (outputs), without following the scripts it sources
     """
-    input_files = []
-    output_files = []
-    # iterate through tleap lines and find input and output files
-    for line in lines:
-        head, sep, tail = line.partition("#")
-        # if "load" string in line then find input file
-        if re.search("load", head, re.IGNORECASE):
-            split_line = head.split()
-            if len(split_line) > 2:
-                if "load" in split_line[-2]:
-                    input_files.append(split_line[-1])
-            if "load" in split_line[0]:
-                input_files.append(split_line[1])
-        # if "save" string in line then find output file
-        if re.search("save", head, re.IGNORECASE):
-            if re.search("saveAmberParm", head, re.IGNORECASE):
-                output_files.extend(head.split()[-2:])
-            else:
-                output_files.append(head.split()[2])
-        if re.search("logFile", head, re.IGNORECASE):
-            output_files.append(head.split()[-1])
-
-    parsed_info = {}
-    parsed_info["input_files"] = input_files
-    parsed_info["output_files"] = output_files
-
-    return parsed_info
+    return tleap_script.parse_lines(lines)
 
 
 def add_calculation_inputs(subdirs, files):
@@ -98,18 +95,22 @@ def add_calculation_inputs(subdirs, files):
             if os.path.isfile(file):
                 input_list.append(file)
                 calc_inputs["tleap_inpfiles"][formatted_filename] = \
-                    SinglefileData(file=os.path.join(os.getcwd(), file))
+                    node_utils.get_file_node(os.path.join(os.getcwd(), file))
 
             elif "PYTEST_CURRENT_TEST" in os.environ:
                 test_path = os.path.join(os.getcwd(), 
                                         'tests/input_files/tleap', file)
                 if os.path.isfile(test_path):
                     calc_inputs["tleap_inpfiles"][formatted_filename] = \
-                        SinglefileData(file=test_path)
+                        node_utils.get_file_node(test_path)
                 else:
                     sys.exit(f"Error: Input file {file} referenced in tleap file does not exist")
 
-            
+            elif node_utils.is_deferring_missing_files():
+                # written by an upstream process the calculation waits for
+                calc_inputs["tleap_inpfiles"][formatted_filename] = \
+                    node_utils.get_file_node(os.path.join(os.getcwd(), file))
+
             else:
                 sys.exit(f"Error: Input file {file} referenced in tleap file does not exist")
 
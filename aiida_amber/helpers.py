@@ -5,13 +5,19 @@ Helper functions for setting up
  2. A "sander" code on localhost
 
 Note: Point 2 is made possible by the fact that the ``sander`` executable is
-available in the PATH on almost any UNIX system.
+available in the PATH on almost any UNIX system. Without Amber, the mock
+executables of :mod:`aiida_amber.cli.mock` are used instead with ``mock=True``
+or by setting the ``AIIDA_AMBER_MOCK`` environment variable.
 """
+import json
+import os
 import shutil
 import tempfile
 
 from aiida.common.exceptions import NotExistent
-from aiida.orm import Code, Computer
+from aiida.manage import get_manager
+from aiida.manage.configuration import get_config
+from aiida.orm import Code, Computer, load_code
 
 LOCALHOST_NAME = "localhost"
 
@@ -24,6 +30,24 @@ executables = {
     "bash": "bash",
 }
 
+# Stand-ins writing synthetic outputs, see aiida_amber.cli.mock.
+mock_executables = {
+    "amber": "mock_sander",
+    "tleap": "mock_tleap",
+    "antechamber": "mock_antechamber",
+    "pdb4amber": "mock_pdb4amber",
+    "parmed": "mock_parmed",
+    "bash": "bash",
+}
+MOCK_ENV = "AIIDA_AMBER_MOCK"
+
+# PKs of the codes set up for each profile, kept in the AiiDA config folder
+# so that launches in new processes skip the lookup too.
+CODE_CACHE_FILENAME = "aiida_amber_codes.json"
+# Computers and codes resolved in this process, by profile.
+_computers = {}
+_codes = {}
+
 
 def get_path_to_executable(executable):
     """Get path to local executable.
@@ -49,6 +73,9 @@ def get_computer(name=LOCALHOST_NAME, workdir=None):
     :return: The computer node
     :rtype: :py:class:`aiida.orm.computers.Computer`
     """
+    key = (get_manager().get_profile().name, name)
+    if key in _computers:
+        return _computers[key]
 
     try:
         computer = Computer.objects.get(label=name)
@@ -68,26 +95,121 @@ def get_computer(name=LOCALHOST_NAME, workdir=None):
         computer.set_minimum_job_poll_interval(0.0)
         computer.configure()
 
+    _computers[key] = computer
     return computer
 
 
-def get_code(entry_point, computer):
+def clear_cache():
+    """Forget the computers and codes resolved in this process, e.g. after
+    the database was cleared."""
+    _computers.clear()
+    _codes.clear()
+
+
+def get_code_cache_path():
+    """Get the path of the cache file of the code PKs."""
+    return os.path.join(get_config().dirpath, CODE_CACHE_FILENAME)
+
+
+def read_code_cache():
+    """Read the cache of the code PKs, empty if it cannot be read."""
+    try:
+        with open(get_code_cache_path(), encoding="utf-8") as handle:
+            cache = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def write_code_cache(cache):
+    """Write the cache of the code PKs, replacing the file at once so that
+    concurrent launches never read half a file."""
+    path = get_code_cache_path()
+    try:
+        with open(f"{path}.{os.getpid()}", "w", encoding="utf-8") as handle:
+            json.dump(cache, handle, indent=2)
+        os.replace(f"{path}.{os.getpid()}", path)
+    except OSError:
+        pass  # the cache only saves a lookup
+
+
+def load_cached_code(entry):
+    """Load the code of a cache entry, if it is still valid.
+
+    The entry is stale if the node was deleted, e.g. by clearing the
+    database, if its PK now belongs to another node or if the executable
+    has been removed.
+
+    :param entry: dict with the pk, uuid and executable path of the code.
+    :return: The code node, or None if the entry is stale
+    """
+    try:
+        code = load_code(entry["pk"])
+    except (NotExistent, KeyError, TypeError, ValueError):
+        return None
+    if code.uuid != entry.get("uuid") or not os.path.exists(entry.get("path", "")):
+        return None
+    return code
+
+
+def use_mock():
+    """Whether the mock executables are asked for in the environment."""
+    return os.environ.get(MOCK_ENV, "").lower() not in ["", "0", "false", "no"]
+
+
+def get_code(entry_point, computer, mock=None):
     """Get local code.
     Sets up code for given entry point on given computer.
 
+    The code is looked up once per process and its PK is cached on disk for
+    each profile, so that later launches only load it by PK.
+
     :param entry_point: Entry point of calculation plugin
     :param computer: (local) AiiDA computer
+    :param mock: Use the mock executable, defaults to whether the
+        AIIDA_AMBER_MOCK environment variable is set
     :return: The code node
     :rtype: :py:class:`aiida.orm.nodes.data.code.installed.InstalledCode`
     """
+    if mock is None:
+        mock = use_mock()
 
     try:
-        executable = executables[entry_point]
+        executable = (mock_executables if mock else executables)[entry_point]
     except KeyError as exc:
         raise KeyError(
             f"Entry point '{entry_point}' not recognized. Allowed values: {list(executables.keys())}"
         ) from exc
 
+    profile = get_manager().get_profile().name
+    key = f"{computer.label}:{entry_point}:{executable}"
+    if (profile, key) in _codes:
+        return _codes[(profile, key)]
+
+    cache = read_code_cache()
+    entry = cache.get(profile, {}).get(key)
+    code = load_cached_code(entry) if isinstance(entry, dict) else None
+    if code is None:
+        code = find_code(entry_point, computer, executable)
+        cache.setdefault(profile, {})[key] = {
+            "pk": code.pk,
+            "uuid": code.uuid,
+            "path": str(code.get_executable()),
+        }
+        write_code_cache(cache)
+
+    _codes[(profile, key)] = code
+    return code
+
+
+def find_code(entry_point, computer, executable):
+    """Find the code of an executable, setting it up if it does not exist.
+
+    :param entry_point: Entry point of calculation plugin
+    :param computer: (local) AiiDA computer
+    :param executable: Name of executable in the $PATH variable
+    :return: The stored code node
+    """
     codes = Code.objects.find(  # pylint: disable=no-member
         filters={"label": executable}
     )
@@ -12,6 +12,8 @@ from aiida.orm import SinglefileData
 from aiida.parsers.parser import Parser
 from aiida.plugins import CalculationFactory
 
+from aiida_amber.utils.repository import export_tree, get_export_option
+
 AntechamberCalculation = CalculationFactory("amber.antechamber")
 
 
@@ -40,7 +42,7 @@ class AntechamberParser(Parser):
         :returns: an exit code, if parsing fails (or nothing if parsing succeeds)
         """
         # the directory for storing parsed output files
-        output_dir = Path(self.node.get_option("output_dir"))
+        output_dir = Path(get_export_option(self.node, "output_dir"))
         # Map output files to how they are named.
         outputs = ["stdout"]
         output_template = {
@@ -75,8 +77,12 @@ class AntechamberParser(Parser):
                 output_node = SinglefileData(filename=f, file=handle)
             self.out(outputs[i], output_node)
 
-        # If not in testing mode, then copy back the files.
+        # If not in testing mode, then export the files.
         if "PYTEST_CURRENT_TEST" not in os.environ:
-            self.retrieved.copy_tree(output_dir)
+            export_tree(
+                self.retrieved,
+                output_dir,
+                get_export_option(self.node, "output_export"),
+            )
 
         return ExitCode(0)
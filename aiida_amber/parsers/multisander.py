@@ -0,0 +1,110 @@
+"""
+Parsers provided by aiida_amber.
+
+This parser collects the outputs of each replica of a multisander run.
+"""
+import os
+from pathlib import Path
+
+from aiida.common import exceptions
+from aiida.engine import ExitCode
+from aiida.orm import ArrayData, SinglefileData
+from aiida.parsers.parser import Parser
+from aiida.plugins import CalculationFactory
+
+from aiida_amber.calculations.multisander import REMLOG
+from aiida_amber.parsers.sander import OUTPUT_TEMPLATE, get_output_node, parse_energies
+from aiida_amber.utils.remlog import parse_remlog
+from aiida_amber.utils.repository import export_tree, get_export_option
+
+MultiSanderCalculation = CalculationFactory("amber.multisander")
+
+
+class MultiSanderParser(Parser):
+    """
+    Parser class for parsing output of a multisander calculation.
+    """
+
+    def __init__(self, node):
+        """
+        Initialize Parser instance
+
+        Checks that the ProcessNode being passed was produced by a
+        MultiSanderCalculation.
+
+        :param node: ProcessNode of calculation
+        :param type node: :class:`aiida.orm.nodes.process.process.ProcessNode`
+        """
+        super().__init__(node)
+        if not issubclass(node.process_class, MultiSanderCalculation):
+            raise exceptions.ParsingError("Can only parse MultiSanderCalculation")
+
+    def parse(self, **kwargs):
+        """
+        Parse outputs of every replica, store results in database.
+
+        :returns: an exit code, if parsing fails (or nothing if parsing succeeds)
+        """
+        # the directory for storing parsed output files
+        output_dir = Path(get_export_option(self.node, "output_dir"))
+        parameters = self.node.inputs.parameters.get_dict()
+        stdout = self.node.get_option("output_filename")
+
+        # Map the files of each replica to their output link labels.
+        outputs = {}
+        for label in self.node.inputs.inpcrd:
+            for item, value in parameters.items():
+                if item in OUTPUT_TEMPLATE and isinstance(value, str):
+                    outputs[os.path.join(label, value)] = (label, OUTPUT_TEMPLATE[item])
+
+        # Check all expected files were retrieved.
+        files_retrieved = [
+            str(Path(dirpath) / filename)
+            for dirpath, _, filenames in self.retrieved.base.repository.walk()
+            for filename in filenames
+        ]
+        files_expected = [stdout] + list(outputs)
+        if "rem" in self.node.inputs:
+            files_expected.append(REMLOG)
+        if not set(files_expected) <= set(files_retrieved):
+            self.logger.error(
+                f"Found files '{files_retrieved}', expected to find '{files_expected}'"
+            )
+            return self.exit_codes.ERROR_MISSING_OUTPUT_FILES
+
+        with self.retrieved.base.repository.open(stdout, "rb") as handle:
+            self.out("stdout", SinglefileData(filename=stdout, file=handle))
+
+        # Map retrieved files to data nodes in the namespace of each replica.
+        for f, (replica, label) in outputs.items():
+            self.logger.info(f"Parsing '{f}'")
+            filename = os.path.basename(f)
+            with self.retrieved.base.repository.open(f, "rb") as handle:
+                output_node = get_output_node(handle, filename, label)
+            self.out(f"replicas.{replica}.{label}", output_node)
+            if label == "mdout":
+                with self.retrieved.base.repository.open(f, "r") as handle:
+                    energies = parse_energies(handle)
+                if energies is not None:
+                    self.out(f"replicas.{replica}.energies", energies)
+
+        if "rem" in self.node.inputs:
+            with self.retrieved.base.repository.open(REMLOG, "rb") as handle:
+                self.out("remlog", SinglefileData(filename=REMLOG, file=handle))
+            with self.retrieved.base.repository.open(REMLOG, "r") as handle:
+                exchange = parse_remlog(handle)
+            if exchange:
+                array_data = ArrayData()
+                for name, values in exchange.items():
+                    array_data.set_array(name, values)
+                self.out("exchange", array_data)
+
+        # If not in testing mode, then export the files.
+        if "PYTEST_CURRENT_TEST" not in os.environ:
+            export_tree(
+                self.retrieved,
+                output_dir,
+                get_export_option(self.node, "output_export"),
+            )
+
+        return ExitCode(0)
@@ -13,6 +13,7 @@ from aiida.parsers.parser import Parser
 from aiida.plugins import CalculationFactory
 
 from aiida_amber.utils import node_utils
+from aiida_amber.utils.repository import export_tree, get_export_option
 
 Pdb4amberCalculation = CalculationFactory("amber.pdb4amber")
 
@@ -42,7 +43,7 @@ class Pdb4amberParser(Parser):
         :returns: an exit code, if parsing fails (or nothing if parsing succeeds)
         """
         # the directory for storing parsed output files
-        output_dir = Path(self.node.get_option("output_dir"))
+        output_dir = Path(get_export_option(self.node, "output_dir"))
 
         # Grab list of retrieved files.
         files_retrieved = self.retrieved.base.repository.list_object_names()
@@ -79,8 +80,12 @@ class Pdb4amberParser(Parser):
             else:
                 self.out(node_utils.format_link_label(thing), output_node)
 
-        # If not in testing mode, then copy back the files.
+        # If not in testing mode, then export the files.
         if "PYTEST_CURRENT_TEST" not in os.environ:
-            self.retrieved.copy_tree(output_dir)
+            export_tree(
+                self.retrieved,
+                output_dir,
+                get_export_option(self.node, "output_export"),
+            )
 
         return ExitCode(0)
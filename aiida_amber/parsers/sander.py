@@ -5,15 +5,97 @@ This calculation configures the ability to use the 'sander' executable.
 """
 import os
 from pathlib import Path
+import tempfile
 
 from aiida.common import exceptions
 from aiida.engine import ExitCode
-from aiida.orm import SinglefileData
+from aiida.orm import ArrayData, RemoteData, SinglefileData
 from aiida.parsers.parser import Parser
 from aiida.plugins import CalculationFactory
 
+from aiida_amber.data.mdin import MdinData
+from aiida_amber.data.netcdf_trajectory import NetcdfTrajectoryData
+from aiida_amber.data.prmtop import PrmtopData
+from aiida_amber.data.restart import RestartData
+from aiida_amber.utils import mdout
+from aiida_amber.utils.compression import (
+    XTC_PRECISION,
+    compress_trajectory,
+    get_compressed_filename,
+)
+from aiida_amber.utils.prmtop import BOX_ANGLES, BOX_TYPES, IFBOX, NATOM, read_pointers
+from aiida_amber.utils.repository import (
+    export_file,
+    export_tree,
+    get_export_option,
+    is_netcdf,
+    repository_file_path,
+)
+
 SanderCalculation = CalculationFactory("amber.sander")
 
+# Output link labels of the files named by each command line flag.
+OUTPUT_TEMPLATE = {
+    "o": "mdout",
+    "inf": "mdinfo",
+    "x": "mdcrd",
+    "v": "mdvel",
+    "frc": "mdfrc",
+    "e": "mden",
+    "r": "restrt",
+    "rdip": "rstdip",
+    "cprestrt": "cprestrt",
+    "cpout": "cpout",
+    "ceout": "ceout",
+    "cerestrt": "cerestrt",
+    "suffix": "suffix",
+}
+
+# Outputs that are stored as NetcdfTrajectoryData when written with ioutfm=1
+TRAJECTORY_OUTPUTS = ("mdcrd", "mdvel", "mdfrc")
+# Outputs that are stored as RestartData, in either rst7 or NetCDF format
+RESTART_OUTPUTS = ("restrt",)
+
+
+def parse_energies(handle):
+    """
+    Stream the energy records from mdout into an ArrayData node.
+
+    The file is read line by line in a single pass, so only the columns
+    of parsed floats are held in memory.
+
+    :param handle: mdout file handle opened in text mode
+    :returns: unstored ArrayData node, or None if no energies were printed
+    """
+    energies = mdout.parse_mdout_energies(handle)
+    if not energies:
+        return None
+    output_node = ArrayData()
+    for label, values in energies.items():
+        output_node.set_array(label, values)
+    return output_node
+
+
+def get_output_node(handle, filename, label):
+    """
+    Create the data node of a retrieved output file.
+
+    :param handle: file handle opened in binary mode
+    :param filename: name of the output file
+    :param label: output link label of the file
+    :returns: unstored NetcdfTrajectoryData for NetCDF trajectories,
+        RestartData for restart files that can be read, otherwise SinglefileData
+    """
+    if label in TRAJECTORY_OUTPUTS and is_netcdf(handle):
+        return NetcdfTrajectoryData(filename=filename, file=handle)
+    if label in RESTART_OUTPUTS:
+        try:
+            return RestartData(filename=filename, file=handle)
+        except (ValueError, TypeError):
+            # e.g. a restart file cut short, keep it as a plain file
+            handle.seek(0)
+    return SinglefileData(filename=filename, file=handle)
+
 
 class SanderParser(Parser):
     """
@@ -40,28 +122,19 @@ class SanderParser(Parser):
         :returns: an exit code, if parsing fails (or nothing if parsing succeeds)
         """
         # the directory for storing parsed output files
-        output_dir = Path(self.node.get_option("output_dir"))
+        output_dir = Path(get_export_option(self.node, "output_dir"))
         # Map output files to how they are named.
-        outputs = ["stdout"]
-        output_template = {
-            "o": "mdout",
-            "inf": "mdinfo",
-            "x": "mdcrd",
-            "v": "mdvel",
-            "frc": "mdfrc",
-            "e": "mden",
-            "r": "restrt",
-            "cprestrt": "cprestrt",
-            "cpout": "cpout",
-            "ceout": "ceout",
-            "cerestrt": "cerestrt",
-            "suffix": "suffix",
-        }
-
-        # pylint: disable=unused-variable
-        for item, val in output_template.items():
-            if item in self.node.inputs.parameters.keys():
-                outputs.append(val)
+        parameters = self.node.inputs.parameters.get_dict()
+        retention = self.node.get_option("output_retention") or {}
+        outputs = {self.node.get_option("output_filename"): "stdout"}
+        remote_outputs = {}
+
+        for item, val in OUTPUT_TEMPLATE.items():
+            if item in parameters:
+                if retention.get(item, "retrieve") == "retrieve":
+                    outputs[parameters[item]] = val
+                else:
+                    remote_outputs[parameters[item]] = (val, retention[item])
 
         # Grab list of retrieved files.
         files_retrieved = self.retrieved.base.repository.list_object_names()
@@ -80,15 +153,144 @@ class SanderParser(Parser):
             )
             return self.exit_codes.ERROR_MISSING_OUTPUT_FILES
 
+        # Trajectories to be compressed that were retrieved temporarily.
+        compression = self.node.get_option("trajectory_compression")
+        temporary_folder = kwargs.get("retrieved_temporary_folder")
+        files_temporary = self.node.get_retrieve_temporary_list() or []
+        missing = [
+            f
+            for f in files_temporary
+            if temporary_folder is None
+            or not os.path.isfile(os.path.join(temporary_folder, f))
+        ]
+        if missing:
+            self.logger.error(f"Temporary files '{missing}' were not retrieved")
+            return self.exit_codes.ERROR_MISSING_OUTPUT_FILES
+
         # Map retrieved files to data nodes.
-        for i, f in enumerate(files_expected):
+        compressed = []
+        for f in files_expected:
             self.logger.info(f"Parsing '{f}'")
-            with self.retrieved.base.repository.open(f, "rb") as handle:
-                output_node = SinglefileData(filename=f, file=handle)
-            self.out(outputs[i], output_node)
+            if compression and outputs[f] == "mdcrd":
+                with repository_file_path(self.retrieved, f) as filepath:
+                    output_node = self.compress_trajectory(filepath, f, compression)
+                compressed.append(output_node)
+            else:
+                with self.retrieved.base.repository.open(f, "rb") as handle:
+                    output_node = get_output_node(handle, f, outputs[f])
+            self.out(outputs[f], output_node)
+            if outputs[f] == "mdout":
+                self.parse_energies(f)
+        for f in files_temporary:
+            self.logger.info(f"Compressing '{f}'")
+            filepath = os.path.join(temporary_folder, f)
+            output_node = self.compress_trajectory(filepath, f, compression)
+            compressed.append(output_node)
+            self.out(outputs[f], output_node)
+
+        # Register references to the files that were not retrieved.
+        for f, (label, policy) in remote_outputs.items():
+            self.out(label, self.get_remote_reference(f, policy))
 
-        # If not in testing mode, then copy back the files.
+        # If not in testing mode, then export the files.
         if "PYTEST_CURRENT_TEST" not in os.environ:
-            self.retrieved.copy_tree(output_dir)
+            export_mode = get_export_option(self.node, "output_export")
+            export_tree(self.retrieved, output_dir, export_mode)
+            # the compressed trajectories are not part of retrieved
+            if export_mode != "none":
+                for output_node in compressed:
+                    target = output_dir / output_node.filename
+                    export_file(output_node, output_node.filename, target, export_mode)
 
         return ExitCode(0)
+
+    def get_remote_reference(self, filename, policy):
+        """
+        Create a RemoteData pointing to an output file left on the remote.
+
+        :param filename: name of the output file
+        :param policy: "remote" for a file left in the remote working
+            directory or "stash" for a file copied to the stash target
+        :returns: unstored RemoteData node
+        """
+        if policy == "stash":
+            folder = self.node.outputs.remote_stash.target_basepath
+        else:
+            folder = self.node.outputs.remote_folder.get_remote_path()
+        return RemoteData(
+            remote_path=os.path.join(folder, filename), computer=self.node.computer
+        )
+
+    def compress_trajectory(self, filepath, filename, compression):
+        """
+        Compress a trajectory as set in the trajectory_compression option.
+
+        The number of atoms and box angles of ASCII trajectories are taken
+        from the prmtop input and the time between frames from the mdin
+        input. If the trajectory cannot be compressed, it is stored as is.
+
+        :param filepath: path of the trajectory on the local file system
+        :param filename: name of the retrieved trajectory file
+        :param compression: dict of the trajectory_compression option
+        :returns: unstored NetcdfTrajectoryData or SinglefileData node, with
+            the compression settings in its ``compression`` attribute
+        """
+        compression_format = compression["format"]
+        natom = None
+        box_type = None
+        if "prmtop" in self.node.inputs:
+            prmtop = self.node.inputs.prmtop
+            if isinstance(prmtop, PrmtopData):
+                natom = prmtop.natom
+                box_type = prmtop.box_type
+            else:
+                with prmtop.open() as handle:
+                    pointers = read_pointers(handle)
+                natom = pointers[NATOM] if pointers else None
+                if len(pointers) > IFBOX:
+                    box_type = BOX_TYPES.get(pointers[IFBOX])
+        # e.g. a truncated octahedron, whose angles mdcrd does not store
+        box_angles = BOX_ANGLES.get(box_type, BOX_ANGLES["orthorhombic"])
+        time_step = None
+        mdin = self.node.inputs.mdin if "mdin" in self.node.inputs else None
+        if isinstance(mdin, MdinData) and mdin.base.attributes.get("ntwx") > 0:
+            attributes = mdin.base.attributes
+            time_step = attributes.get("dt") * attributes.get("ntwx")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            target = os.path.join(
+                tmpdir, get_compressed_filename(filename, compression_format)
+            )
+            try:
+                settings = compress_trajectory(
+                    filepath,
+                    target,
+                    compression_format,
+                    natom=natom,
+                    precision=compression.get("precision", XTC_PRECISION),
+                    time_step=time_step,
+                    box_angles=box_angles,
+                )
+            except ValueError as exc:
+                self.logger.warning(f"Could not compress '{filename}': {exc}")
+                with open(filepath, "rb") as handle:
+                    return get_output_node(handle, filename, "mdcrd")
+            if compression_format == "netcdf":
+                output_node = NetcdfTrajectoryData(file=target)
+            else:
+                output_node = SinglefileData(file=target)
+        settings["original_filename"] = filename
+        settings["keep_original"] = bool(compression.get("keep_original"))
+        output_node.base.attributes.set("compression", settings)
+        return output_node
+
+    def parse_energies(self, filename):
+        """
+        Parse the energy records of mdout into the energies output.
+
+        :param filename: name of the retrieved mdout file
+        """
+        with self.retrieved.base.repository.open(filename, "r") as handle:
+            output_node = parse_energies(handle)
+        if output_node is not None:
+            self.out("energies", output_node)
@@ -12,7 +12,10 @@ from aiida.orm import SinglefileData
 from aiida.parsers.parser import Parser
 from aiida.plugins import CalculationFactory
 
+from aiida_amber.data.prmtop import PrmtopData
 from aiida_amber.utils import node_utils
+from aiida_amber.utils.prmtop import is_prmtop
+from aiida_amber.utils.repository import export_tree, get_export_option
 
 TleapCalculation = CalculationFactory("amber.tleap")
 
@@ -45,7 +48,7 @@ class TleapParser(Parser):
         # the output file
         # output_filename = self.node.get_option("output_filename")
         # the directory for storing parsed output files
-        output_dir = Path(self.node.get_option("output_dir"))
+        output_dir = Path(get_export_option(self.node, "output_dir"))
         # Map output files to how they are named.
         # outputs = ["stdout"]
         # output_template = {}
@@ -82,14 +85,20 @@ class TleapParser(Parser):
         for thing in files_expected:
             self.logger.info(f"Parsing '{thing}'")
             with self.retrieved.open(thing, "rb") as handle:
-                output_node = SinglefileData(file=handle, filename=thing)
+                # topologies get their sections indexed
+                node_class = PrmtopData if is_prmtop(handle) else SinglefileData
+                output_node = node_class(file=handle, filename=thing)
             if thing == "tleap.out":
                 self.out("stdout", output_node)
             else:
                 self.out(node_utils.format_link_label(thing), output_node)
 
-        # If not in testing mode, then copy back the files.
+        # If not in testing mode, then export the files.
         if "PYTEST_CURRENT_TEST" not in os.environ:
-            self.retrieved.copy_tree(output_dir)
+            export_tree(
+                self.retrieved,
+                output_dir,
+                get_export_option(self.node, "output_export"),
+            )
 
         return ExitCode(0)
@@ -0,0 +1,190 @@
+"""Functions for compressing the trajectories written by sander before they
+are stored in the repository.
+
+Trajectories are converted either to XTC, which keeps the coordinates to a
+fixed number of decimals and packs them with the XDR compression used by
+GROMACS, or losslessly to NetCDF, which stores the 10F8.3 fields of an
+ASCII mdcrd as float32 that are formatted back to the same values. The
+lossless mode only converts ASCII mdcrd, which roughly halves its size; a
+NetCDF trajectory is already stored as float32 and is not converted.
+"""
+
+import os
+
+import numpy as np
+from scipy.io import netcdf_file
+
+from aiida_amber.utils.mdcrd import iter_mdcrd_chunks, mdcrd_to_netcdf
+from aiida_amber.utils.repository import is_netcdf
+
+COMPRESSION_FORMATS = ("xtc", "netcdf")
+COMPRESSION_EXTENSIONS = {"xtc": ".xtc", "netcdf": ".nc"}
+# Decimals of the coordinates in nm kept in XTC, 3 keeps 0.01 Angstrom.
+XTC_PRECISION = 3
+
+
+def get_compressed_filename(filename, compression_format):
+    """Name the compressed trajectory after the original file.
+
+    :param filename: name of the original trajectory file.
+    :param compression_format: one of COMPRESSION_FORMATS.
+    :returns: the filename with the extension of the format.
+    """
+    return os.path.splitext(filename)[0] + COMPRESSION_EXTENSIONS[compression_format]
+
+
+def iter_netcdf_chunks(filepath, chunk_frames=1000):
+    """Read an Amber NetCDF trajectory in chunks of frames.
+
+    :param filepath: path of the NetCDF trajectory.
+    :param chunk_frames: number of frames read at once.
+    :returns: generator of tuples of the coordinates of shape
+        (frames, natom, 3), the box of shape (frames, 6) or None and the
+        times of shape (frames,) or None.
+    """
+    with netcdf_file(filepath, "r", mmap=True) as trajectory:
+        variables = trajectory.variables
+        nframes = variables["coordinates"].shape[0]
+        for start in range(0, nframes, chunk_frames):
+            frames = slice(start, start + chunk_frames)
+            # copies, so the file can be unmapped when it is closed
+            coordinates = np.array(variables["coordinates"].data[frames])
+            box = None
+            if "cell_lengths" in variables:
+                box = np.concatenate(
+                    [
+                        variables["cell_lengths"].data[frames],
+                        variables["cell_angles"].data[frames],
+                    ],
+                    axis=1,
+                )
+            times = None
+            if "time" in variables:
+                times = np.array(variables["time"].data[frames], dtype=float)
+            yield coordinates, box, times
+        # drop the views on the mapped file so it can be closed
+        del variables
+
+
+def iter_trajectory_chunks(
+    filepath, natom=None, box_angles=(90.0, 90.0, 90.0), time_step=None
+):
+    """Read a NetCDF or ASCII mdcrd trajectory in chunks of frames.
+
+    :param filepath: path of the trajectory.
+    :param natom: number of atoms, required for ASCII trajectories.
+    :param box_angles: box angles of ASCII trajectories, which only store lengths.
+    :param time_step: time (ps) between frames of ASCII trajectories.
+    :returns: generator as :func:`iter_netcdf_chunks`.
+    """
+    with open(filepath, "rb") as handle:
+        netcdf = is_netcdf(handle)
+    if netcdf:
+        yield from iter_netcdf_chunks(filepath)
+        return
+
+    num_frames = 0
+    with open(filepath, "rb") as handle:
+        for coordinates, lengths in iter_mdcrd_chunks(handle, natom):
+            box = None
+            if lengths is not None:
+                angles = np.tile(np.asarray(box_angles, dtype=float), (len(lengths), 1))
+                box = np.concatenate([lengths, angles], axis=1)
+            times = None
+            if time_step is not None:
+                times = (num_frames + np.arange(len(coordinates))) * time_step
+            num_frames += len(coordinates)
+            yield coordinates, box, times
+
+
+def write_xtc(chunks, target, precision=XTC_PRECISION):
+    """Write frames to an XTC trajectory with MDAnalysis.
+
+    :param chunks: iterable as returned by :func:`iter_trajectory_chunks`.
+    :param target: path of the XTC file to be written.
+    :param precision: decimals of the coordinates in nm that are kept.
+    :returns: the number of frames written.
+    """
+    import MDAnalysis  # pylint: disable=import-outside-toplevel
+
+    universe = None
+    writer = None
+    num_frames = 0
+    try:
+        for coordinates, box, times in chunks:
+            if writer is None:
+                natom = coordinates.shape[1]
+                universe = MDAnalysis.Universe.empty(natom, trajectory=True)
+                writer = MDAnalysis.Writer(
+                    target, natom, format="XTC", precision=precision
+                )
+            timestep = universe.trajectory.ts
+            for index, frame in enumerate(coordinates):
+                timestep.positions = frame
+                timestep.dimensions = None if box is None else box[index]
+                timestep.frame = num_frames
+                timestep.time = num_frames if times is None else times[index]
+                writer.write(universe.atoms)
+                num_frames += 1
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError("no complete frames found in the trajectory")
+    return num_frames
+
+
+def compress_trajectory(
+    source,
+    target,
+    compression_format,
+    natom=None,
+    precision=XTC_PRECISION,
+    time_step=None,
+    box_angles=(90.0, 90.0, 90.0),
+):
+    """Compress a trajectory written by sander.
+
+    A NetCDF trajectory cannot be compressed losslessly any further, so
+    only ASCII mdcrd is converted when NetCDF is asked for.
+
+    :param source: path of the NetCDF or ASCII mdcrd trajectory.
+    :param target: path of the compressed trajectory to be written.
+    :param compression_format: "xtc" (lossy) or "netcdf" (lossless).
+    :param natom: number of atoms, required for ASCII trajectories.
+    :param precision: decimals of the coordinates in nm kept in XTC.
+    :param time_step: time (ps) between frames of ASCII trajectories.
+    :param box_angles: box angles of ASCII trajectories, which only store lengths.
+    :returns: dict of the compression settings and the sizes of the files.
+    """
+    if compression_format not in COMPRESSION_FORMATS:
+        raise ValueError(
+            f"compression format should be one of {COMPRESSION_FORMATS}, "
+            f"got: {compression_format}"
+        )
+    with open(source, "rb") as handle:
+        source_netcdf = is_netcdf(handle)
+    if source_netcdf and compression_format == "netcdf":
+        raise ValueError("the trajectory is already NetCDF, only mdcrd is converted")
+    if not source_netcdf and natom is None:
+        raise ValueError("the number of atoms is needed to read an ASCII trajectory")
+
+    if compression_format == "xtc":
+        chunks = iter_trajectory_chunks(source, natom, box_angles, time_step)
+        nframes = write_xtc(chunks, target, precision)
+    else:
+        with open(source, "rb") as handle:
+            nframes = mdcrd_to_netcdf(
+                handle, target, natom, box_angles=box_angles, time_step=time_step
+            )
+
+    return {
+        "format": compression_format,
+        "lossless": compression_format == "netcdf",
+        "precision": precision if compression_format == "xtc" else None,
+        "original_filename": os.path.basename(source),
+        "original_format": "netcdf" if source_netcdf else "mdcrd",
+        "original_size": os.path.getsize(source),
+        "compressed_size": os.path.getsize(target),
+        "nframes": nframes,
+    }
@@ -0,0 +1,147 @@
+"""Functions for reading formatted (ASCII) mdcrd trajectories in chunks of
+frames and converting them to NetCDF in a single streaming pass.
+
+Every frame of an mdcrd file has the same layout, 3*natom values in 10F8.3
+lines followed by a 3F8.3 box line for periodic systems, so a chunk of
+frames is read as one block of bytes and decoded with numpy at once.
+"""
+
+import numpy as np
+
+from aiida_amber.utils.netcdf import NetcdfTrajectoryWriter
+
+# Width of a value and number of values per line of coordinates.
+FIELD_WIDTH = 8
+VALUES_PER_LINE = 10
+
+
+def get_frame_layout(natom, box):
+    """Find which bytes of a frame hold values.
+
+    :param natom: number of atoms.
+    :param box: whether each frame ends with a box line.
+    :returns: boolean mask over the bytes of one frame, False for line breaks.
+    """
+    full_lines, remainder = divmod(natom * 3, VALUES_PER_LINE)
+    line_lengths = [VALUES_PER_LINE * FIELD_WIDTH] * full_lines
+    if remainder:
+        line_lengths.append(remainder * FIELD_WIDTH)
+    if box:
+        line_lengths.append(3 * FIELD_WIDTH)
+    return np.concatenate([np.arange(length + 1) < length for length in line_lengths])
+
+
+def has_box(handle, natom):
+    """Check whether the frames of an mdcrd file end with a box line.
+
+    The line following the coordinates of the first frame is a box line of
+    three values, rather than the first line of the next frame. This cannot
+    be told apart for fewer than four atoms, which are read without a box.
+    The position of the handle is restored.
+
+    :param handle: file handle opened in binary mode, after the title line.
+    :param natom: number of atoms.
+    :returns: True if the frames have a box.
+    """
+    position = handle.tell()
+    num_lines = -(-natom * 3 // VALUES_PER_LINE)
+    for _ in range(num_lines):
+        handle.readline()
+    line = handle.readline().rstrip(b"\r\n")
+    handle.seek(position)
+    return len(line) == 3 * FIELD_WIDTH and natom * 3 > VALUES_PER_LINE
+
+
+def iter_mdcrd_chunks(handle, natom, box=None, chunk_frames=1000):
+    """Read an mdcrd trajectory in chunks of frames.
+
+    At most ``chunk_frames`` frames are held in memory at a time. An
+    incomplete last frame, e.g. of a run that was stopped, is dropped.
+
+    :param handle: file handle opened in binary mode.
+    :param natom: number of atoms, e.g. from the natom of a PrmtopData.
+    :param box: whether the frames have a box line, detected if None.
+    :param chunk_frames: number of frames decoded at once.
+    :returns: generator of tuples of the coordinates of shape
+        (frames, natom, 3) and the box lengths of shape (frames, 3), or None.
+    """
+    handle.readline()  # title
+    if box is None:
+        box = has_box(handle, natom)
+    mask = get_frame_layout(natom, box)
+    num_values = natom * 3 + (3 if box else 0)
+
+    while True:
+        data = handle.read(chunk_frames * mask.size)
+        num_frames = len(data) // mask.size
+        if not num_frames:
+            return
+        frames = np.frombuffer(data, dtype=np.uint8, count=num_frames * mask.size)
+        # compress copies the value bytes of each frame into a contiguous array
+        values = np.compress(mask, frames.reshape(num_frames, mask.size), axis=1)
+        values = values.view(f"S{FIELD_WIDTH}").astype(np.float32)
+        values = values.reshape(num_frames, num_values)
+        coordinates = values[:, : natom * 3].reshape(num_frames, natom, 3)
+        yield coordinates, values[:, natom * 3 :] if box else None
+        if num_frames < chunk_frames:
+            return
+
+
+def iter_mdcrd_frames(handle, natom, box=None, chunk_frames=1000):
+    """Read an mdcrd trajectory frame by frame, decoding chunks of frames.
+
+    :param handle: file handle opened in binary mode.
+    :param natom: number of atoms.
+    :param box: whether the frames have a box line, detected if None.
+    :param chunk_frames: number of frames decoded at once.
+    :returns: generator of tuples of the coordinates of shape (natom, 3) and
+        the box lengths of shape (3,), or None.
+    """
+    for coordinates, lengths in iter_mdcrd_chunks(handle, natom, box, chunk_frames):
+        for index, frame in enumerate(coordinates):
+            yield frame, None if lengths is None else lengths[index]
+
+
+def mdcrd_to_netcdf(
+    handle,
+    target,
+    natom,
+    box=None,
+    box_angles=(90.0, 90.0, 90.0),
+    time_step=None,
+    chunk_frames=1000,
+):
+    """Convert an mdcrd trajectory to an Amber NetCDF trajectory.
+
+    The frames are written as they are read, so memory use is bounded by
+    ``chunk_frames`` whatever the length of the trajectory.
+
+    :param handle: file handle of the mdcrd opened in binary mode.
+    :param target: path of the NetCDF file to be written.
+    :param natom: number of atoms.
+    :param box: whether the frames have a box line, detected if None.
+    :param box_angles: box angles, which are not stored in mdcrd, e.g.
+        109.4712190 for a truncated octahedron.
+    :param time_step: time (ps) between frames, no times are written if None.
+    :param chunk_frames: number of frames decoded at once.
+    :returns: the number of frames written.
+    """
+    title = handle.readline().decode("utf-8", errors="replace").strip()
+    if box is None:
+        box = has_box(handle, natom)
+    handle.seek(0)
+
+    num_frames = 0
+    with NetcdfTrajectoryWriter(
+        target, natom, box=box, time=time_step is not None, title=title
+    ) as writer:
+        for coordinates, lengths in iter_mdcrd_chunks(handle, natom, box, chunk_frames):
+            times = None
+            if time_step is not None:
+                times = (num_frames + np.arange(len(coordinates))) * time_step
+            angles = None
+            if box:
+                angles = np.tile(np.asarray(box_angles, dtype=float), (len(lengths), 1))
+            writer.write(coordinates, times=times, lengths=lengths, angles=angles)
+            num_frames += len(coordinates)
+    return num_frames
@@ -0,0 +1,64 @@
+"""Functions for reading the progress of a running sander job from its
+mdinfo file."""
+
+import math
+import re
+
+from aiida_amber.utils import mdout
+
+# "| Total steps:    500000 | Completed:      5000 ( 1.0%) | Remaining:    495000"
+STEPS_PATTERN = re.compile(
+    r"Total steps:\s*(\d+)\s*\|\s*Completed:\s*(\d+).*Remaining:\s*(\d+)"
+)
+NS_PER_DAY_PATTERN = re.compile(r"ns/day\s*=\s*(\S+)")
+# "| Estimated time remaining:      20.8 minutes."
+REMAINING_PATTERN = re.compile(
+    r"Estimated time remaining:\s*(\S+)\s*(seconds|minutes|hours|days)"
+)
+SECONDS_PER_UNIT = {"seconds": 1, "minutes": 60, "hours": 3600, "days": 86400}
+
+
+def parse_mdinfo(lines):
+    """Parse the progress information printed in an mdinfo file.
+
+    mdinfo holds the energies of the latest printed step in the same layout
+    as mdout, followed (for MD) by the current timing information. Keys
+    that cannot be found, e.g. timings during minimisation, are left out,
+    as are values of overflowed fields printed as asterisks.
+
+    :param lines: Iterable over the lines of an mdinfo file.
+    :returns: dict with any of nstep, time_ps, total_steps, completed_steps,
+        remaining_steps, ns_per_day and time_remaining (in seconds).
+    """
+    lines = list(lines)
+    progress = {}
+
+    records = list(mdout.iter_energy_records(lines))
+    if records:
+        nstep = records[-1]["NSTEP"]
+        if not math.isnan(nstep):
+            progress["nstep"] = int(nstep)
+        if "TIME(PS)" in records[-1]:
+            progress["time_ps"] = records[-1]["TIME(PS)"]
+
+    all_steps = False
+    for line in lines:
+        match = STEPS_PATTERN.search(line)
+        if match:
+            progress["total_steps"] = int(match.group(1))
+            progress["completed_steps"] = int(match.group(2))
+            progress["remaining_steps"] = int(match.group(3))
+        # prefer the average over all steps to the average over the last ones
+        if "Average timings for all steps" in line:
+            all_steps = True
+        match = NS_PER_DAY_PATTERN.search(line)
+        if match and (all_steps or "ns_per_day" not in progress):
+            progress["ns_per_day"] = mdout.to_float(match.group(1))
+        match = REMAINING_PATTERN.search(line)
+        if match:
+            progress["time_remaining"] = (
+                mdout.to_float(match.group(1)) * SECONDS_PER_UNIT[match.group(2)]
+            )
+
+    # NaN cannot be stored in the extras the progress is recorded in
+    return {key: value for key, value in progress.items() if not math.isnan(value)}
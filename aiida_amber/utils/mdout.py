@@ -0,0 +1,116 @@
+"""Functions for streaming the energy records out of sander mdout files
+and collecting them into columns of floats, one per energy term."""
+
+from array import array
+import math
+import re
+
+import numpy as np
+
+# The averages and fluctuations printed at the end of a run (and the final
+# minimisation step) repeat the layout of the per-step records, so the block
+# following one of these headers is not a new step.
+SUMMARY_HEADERS = ("A V E R A G E S", "F L U C T U A T I O N S", "FINAL RESULTS")
+
+# Matches "TERM = value" pairs, e.g. "1-4 NB =   570.3766" or "TEMP(K) =   300.09"
+TERM_PATTERN = re.compile(r"(\S[^=]*?)\s*=\s*(\S+)")
+
+# Column names of the two line header printed for each minimisation step.
+MIN_HEADER_TERMS = ("NSTEP", "ENERGY", "RMS", "GMAX")
+
+
+def format_term_label(term: str) -> str:
+    """Format an mdout energy term into a valid array name.
+
+    All characters that are not alphanumeric are converted to underscores and
+    consecutive underscores are merged, e.g. "TIME(PS)" becomes "time_ps" and
+    "1-4 NB" becomes "1_4_nb".
+
+    :param term: The energy term as printed in the mdout file.
+    :returns: The array name.
+    """
+    alphanumeric = re.sub("[^0-9a-zA-Z]+", "_", term)
+    return alphanumeric.strip("_").lower()
+
+
+def to_float(value: str) -> float:
+    """Convert an mdout value to a float, overflowed fields become NaN."""
+    try:
+        return float(value)
+    except ValueError:
+        return math.nan
+
+
+def iter_energy_records(lines):
+    """Iterate over the energy records in an mdout file.
+
+    Only one record is held in memory at a time, so an open file handle can be
+    passed in directly and is consumed in a single pass. Both the
+    "NSTEP = ..." blocks printed during MD and the "NSTEP ENERGY RMS GMAX"
+    blocks printed during minimisation are recognised, the summary blocks
+    printed at the end of a run are skipped.
+
+    :param lines: Iterable over the lines of an mdout file.
+    :returns: Generator of dicts mapping each energy term to its value.
+    """
+    record = None
+    has_terms = False
+    skip_next = False
+    min_header = False
+    for line in lines:
+        stripped = line.strip()
+        if min_header:
+            # the line after a minimisation header holds the step values
+            min_header = False
+            record = dict(zip(MIN_HEADER_TERMS, map(to_float, stripped.split())))
+            has_terms = False
+            continue
+        if any(header in line for header in SUMMARY_HEADERS):
+            skip_next = True
+            record = None
+            continue
+        if stripped.startswith("NSTEP ="):
+            record = {}
+            has_terms = False
+        elif stripped.startswith("NSTEP") and "ENERGY" in stripped:
+            min_header = True
+            continue
+        if record is None:
+            continue
+        # A record ends at the first blank or dashed line after its terms.
+        if not stripped or stripped.startswith("---"):
+            if has_terms:
+                if not skip_next:
+                    yield record
+                skip_next = False
+                record = None
+            continue
+        for term, value in TERM_PATTERN.findall(stripped):
+            record[term] = to_float(value)
+            has_terms = True
+
+    if record is not None and has_terms and not skip_next:
+        yield record
+
+
+def parse_mdout_energies(lines):
+    """Collect the energy records of an mdout file into one array per term.
+
+    Terms missing from some of the records (e.g. PRESS or Density during
+    heating) are filled with NaN so all arrays have the same length.
+
+    :param lines: Iterable over the lines of an mdout file.
+    :returns: dict of formatted term labels and 1D float arrays.
+    """
+    columns = {}
+    nrecords = 0
+    for record in iter_energy_records(lines):
+        values = {format_term_label(term): value for term, value in record.items()}
+        for label in values:
+            if label not in columns:
+                columns[label] = array("d", [math.nan] * nrecords)
+        for label, column in columns.items():
+            column.append(values.get(label, math.nan))
+        nrecords += 1
+
+    return {label: np.array(column, dtype=float) for label, column in columns.items()}
@@ -0,0 +1,173 @@
+"""Functions for editing the Fortran namelists (e.g. &cntrl) of sander mdin
+files without reformatting the rest of the file."""
+
+import re
+
+# Tokens of a namelist: quoted strings, comments, the names of assignments
+# and unquoted values separated by commas or whitespace.
+TOKEN_PATTERN = re.compile(
+    r"""(?P<quoted>'[^']*'|"[^"]*")|(?P<comment>![^\n]*)"""
+    r"""|(?P<name>[A-Za-z_]\w*(?:\([^)]*\))?)\s*=|(?P<value>[^,\s!'"=]+)"""
+)
+
+
+def find_namelist(text: str, namelist: str, pos: int = None):
+    """Find the span of the body of a namelist in an mdin file.
+
+    :param text: Content of the mdin file.
+    :param namelist: Name of the namelist without the ampersand, e.g. cntrl.
+    :param pos: Index to start searching from, defaults to after the title.
+    :returns: Tuple of the start and end index of the body of the namelist,
+        or None if the namelist is not present.
+    """
+    # the first line of an mdin file is its title
+    if pos is None:
+        pos = text.find("\n") + 1
+    pattern = re.compile(rf"&{namelist}\b", flags=re.IGNORECASE)
+    start = pattern.search(text, pos)
+    if start is None:
+        return None
+    # the namelist ends at a "/" or "&end" that is not inside a quoted string
+    # or a comment
+    end = re.compile(r"""'[^']*'|"[^"]*"|![^\n]*|(/|&end\b)""", flags=re.IGNORECASE)
+    for match in end.finditer(text, start.end()):
+        if match.group(1):
+            return start.end(), match.start()
+    return None
+
+
+def set_namelist_values(text: str, namelist: str, values: dict) -> str:
+    """Set variables in a namelist of an mdin file.
+
+    Variables that are already present have their value replaced in place,
+    others are added at the end of the namelist.
+
+    :param text: Content of the mdin file.
+    :param namelist: Name of the namelist without the ampersand, e.g. cntrl.
+    :param values: Dictionary of variable names and values to set.
+    :returns: The content of the mdin file with the values set.
+    :raises ValueError: if the namelist is not present.
+    """
+    span = find_namelist(text, namelist)
+    if span is None:
+        raise ValueError(f"namelist &{namelist} not found")
+    body = text[span[0] : span[1]]
+
+    wanted = {name.lower(): str(value) for name, value in values.items()}
+    found = set()
+    edited = []
+    last = 0
+    for name, (start, end) in iter_assignments(body):
+        if name not in wanted:
+            continue
+        found.add(name)
+        edited.append(body[last:start] + wanted[name])
+        last = end
+    body = "".join(edited) + body[last:]
+
+    added = [
+        f"{name}={value},"
+        for name, value in values.items()
+        if name.lower() not in found
+    ]
+    if added:
+        body = body.rstrip(" ")
+        if not body.endswith("\n"):
+            body += "\n"
+        body += "".join(f"  {assignment}\n" for assignment in added) + " "
+    return text[: span[0]] + body + text[span[1] :]
+
+
+def to_value(token: str):
+    """Convert a Fortran namelist value to a Python value.
+
+    Quoted strings lose their quotes, logicals become bools, and numbers
+    become ints or floats (including double precision exponents, e.g. 1.0d-5).
+    Anything else is returned as the string given.
+    """
+    if token[0] in "'\"":
+        return token[1:-1]
+    lower = token.lower()
+    if lower in (".true.", ".t."):
+        return True
+    if lower in (".false.", ".f."):
+        return False
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    try:
+        return float(lower.replace("d", "e"))
+    except ValueError:
+        return token
+
+
+def iter_assignments(body: str):
+    """Split the body of a namelist into its assignments.
+
+    Comments are skipped and quoted strings are kept whole, so neither is
+    mistaken for an assignment.
+
+    :param body: Body of a namelist, as found by :func:`find_namelist`.
+    :returns: Generator of tuples of the lowercase variable name and the
+        span of its value tokens in the body, empty if it has no value.
+    """
+    name = None
+    for match in TOKEN_PATTERN.finditer(body):
+        if match.group("comment"):
+            continue
+        if match.group("name"):
+            if name is not None:
+                yield name, span
+            name = re.sub(r"\s+", "", match.group("name")).lower()
+            span = (match.end(), match.end())
+        elif name is not None:
+            # the value runs from its first to its last token
+            start = span[0] if span[0] != span[1] else match.start()
+            span = (start, match.end())
+    if name is not None:
+        yield name, span
+
+
+def split_values(text: str) -> list:
+    """Split the values given to a namelist variable.
+
+    :param text: The values, separated by commas or whitespace.
+    :returns: List of the value tokens, quoted strings keep their quotes.
+    """
+    return [
+        match.group()
+        for match in TOKEN_PATTERN.finditer(text)
+        if match.group("quoted") or match.group("value")
+    ]
+
+
+def iter_namelists(text: str, namelist: str):
+    """Parse every occurrence of a namelist in an mdin file, e.g. the
+    &wt namelists.
+
+    :param text: Content of the mdin file.
+    :param namelist: Name of the namelist without the ampersand, e.g. wt.
+    :returns: Generator of dicts of the lowercase variable names and values,
+        variables given several values (arrays) have a list of values.
+    """
+    span = find_namelist(text, namelist)
+    while span is not None:
+        body = text[slice(*span)]
+        values = {}
+        for name, (start, end) in iter_assignments(body):
+            converted = [to_value(token) for token in split_values(body[start:end])]
+            values[name] = converted[0] if len(converted) == 1 else converted
+        yield values
+        span = find_namelist(text, namelist, span[1])
+
+
+def parse_namelist(text: str, namelist: str) -> dict:
+    """Parse the first occurrence of a namelist in an mdin file.
+
+    :param text: Content of the mdin file.
+    :param namelist: Name of the namelist without the ampersand, e.g. cntrl.
+    :returns: dict of the lowercase variable names and values, empty if the
+        namelist is not present.
+    """
+    return next(iter_namelists(text, namelist), {})
@@ -0,0 +1,203 @@
+"""Streaming writer of Amber NetCDF trajectories.
+
+The NetCDF classic format keeps the frames of a trajectory in records at the
+end of the file, so frames can be appended as they are produced and only the
+number of records in the header is updated when the file is closed. This
+writes the 64-bit offset variant following the AMBER conventions, the same
+as sander with ioutfm=1, without holding the trajectory in memory.
+"""
+
+import struct
+
+import numpy as np
+
+from aiida_amber import __version__
+
+MAGIC = b"CDF\x02"
+NC_DIMENSION = 10
+NC_VARIABLE = 11
+NC_ATTRIBUTE = 12
+NC_CHAR = 2
+NC_FLOAT = 5
+NC_DOUBLE = 6
+
+# Big-endian numpy dtypes of the NetCDF types.
+NC_DTYPES = {NC_CHAR: "S1", NC_FLOAT: ">f4", NC_DOUBLE: ">f8"}
+
+
+def _pad(data):
+    """Pad bytes to a multiple of four with null bytes."""
+    return data + b"\x00" * (-len(data) % 4)
+
+
+def _name(name):
+    """Encode the name of a dimension, attribute or variable."""
+    encoded = name.encode("utf-8")
+    return struct.pack(">i", len(encoded)) + _pad(encoded)
+
+
+def _attributes(attributes):
+    """Encode a list of text attributes."""
+    if not attributes:
+        return struct.pack(">ii", 0, 0)
+    encoded = struct.pack(">ii", NC_ATTRIBUTE, len(attributes))
+    for name, value in attributes.items():
+        value = value.encode("utf-8")
+        encoded += _name(name) + struct.pack(">ii", NC_CHAR, len(value)) + _pad(value)
+    return encoded
+
+
+class NetcdfTrajectoryWriter:
+    """Write an Amber NetCDF trajectory frame by frame.
+
+    Example::
+
+        with NetcdfTrajectoryWriter("md.nc", natom, box=True) as writer:
+            writer.write(coordinates, times=times, lengths=lengths, angles=angles)
+    """
+
+    def __init__(self, path, natom, box=False, time=True, title=""):
+        """Create the file and write its header.
+
+        :param path: path of the NetCDF file to be written.
+        :param natom: number of atoms.
+        :param box: whether the box lengths and angles are written.
+        :param time: whether the time of each frame is written.
+        :param title: title of the trajectory.
+        """
+        self.natom = natom
+        self.box = box
+        self.time = time
+        self.num_frames = 0
+
+        dimensions = [("frame", 0), ("spatial", 3), ("atom", natom)]
+        if box:
+            dimensions += [("cell_spatial", 3), ("cell_angular", 3), ("label", 5)]
+        dimids = {name: index for index, (name, _) in enumerate(dimensions)}
+
+        # name, dimensions, type, attributes and data of fixed variables
+        variables = [("spatial", ["spatial"], NC_CHAR, {}, b"xyz")]
+        if box:
+            variables += [
+                ("cell_spatial", ["cell_spatial"], NC_CHAR, {}, b"abc"),
+                ("cell_angular", ["cell_angular", "label"], NC_CHAR, {},
+                 b"alphabeta gamma"),
+            ]  # fmt: skip
+        # record variables, written for each frame in this order
+        self.records = []
+        if time:
+            self.records.append(("time", ["frame"], NC_FLOAT, {"units": "picosecond"}))
+        self.records.append(
+            ("coordinates", ["frame", "atom", "spatial"], NC_FLOAT,
+             {"units": "angstrom"})
+        )  # fmt: skip
+        if box:
+            self.records += [
+                ("cell_lengths", ["frame", "cell_spatial"], NC_DOUBLE,
+                 {"units": "angstrom"}),
+                ("cell_angles", ["frame", "cell_angular"], NC_DOUBLE,
+                 {"units": "degree"}),
+            ]  # fmt: skip
+
+        sizes = dict(dimensions)
+        header_parts = [MAGIC, struct.pack(">i", 0)]
+        header_parts.append(struct.pack(">ii", NC_DIMENSION, len(dimensions)))
+        for name, length in dimensions:
+            header_parts.append(_name(name) + struct.pack(">i", length))
+        header_parts.append(
+            _attributes(
+                {
+                    "title": title,
+                    "application": "AMBER",
+                    "program": "aiida-amber",
+                    "programVersion": __version__,
+                    "Conventions": "AMBER",
+                    "ConventionVersion": "1.0",
+                }
+            )
+        )
+        header_parts.append(
+            struct.pack(">ii", NC_VARIABLE, len(variables) + len(self.records))
+        )
+
+        def variable_header(name, dims, nc_type, attributes, vsize):
+            encoded = _name(name) + struct.pack(">i", len(dims))
+            encoded += b"".join(struct.pack(">i", dimids[dim]) for dim in dims)
+            encoded += _attributes(attributes)
+            # the begin offset is filled in once the header size is known
+            return encoded + struct.pack(">ii", nc_type, vsize), b"\x00" * 8
+
+        def item_size(nc_type, dims):
+            return np.dtype(NC_DTYPES[nc_type]).itemsize * int(
+                np.prod([sizes[dim] for dim in dims if dim != "frame"])
+            )
+
+        entries = []
+        for name, dims, nc_type, attributes, data in variables:
+            entries.append(
+                variable_header(name, dims, nc_type, attributes, len(_pad(data)))
+            )
+        self.record_sizes = [
+            item_size(nc_type, dims) for _, dims, nc_type, _ in self.records
+        ]
+        for (name, dims, nc_type, attributes), size in zip(
+            self.records, self.record_sizes
+        ):
+            entries.append(variable_header(name, dims, nc_type, attributes, size))
+
+        header_size = sum(len(part) for part in header_parts) + sum(
+            len(entry) + len(begin) for entry, begin in entries
+        )
+        offset = header_size
+        data_parts = []
+        begins = []
+        for _, _, _, _, data in variables:
+            begins.append(offset)
+            data_parts.append(_pad(data))
+            offset += len(_pad(data))
+        for size in self.record_sizes:
+            begins.append(offset)
+            offset += size
+
+        self._handle = open(path, "wb")  # pylint: disable=consider-using-with
+        self._handle.write(b"".join(header_parts))
+        for (entry, _), begin in zip(entries, begins):
+            self._handle.write(entry + struct.pack(">q", begin))
+        self._handle.write(b"".join(data_parts))
+
+    def write(self, coordinates, times=None, lengths=None, angles=None):
+        """Append frames to the trajectory.
+
+        :param coordinates: array of shape (frames, natom, 3).
+        :param times: array of the time (ps) of each frame, if time is written.
+        :param lengths: array of shape (frames, 3) of box lengths, if box is written.
+        :param angles: array of shape (frames, 3) of box angles, if box is written.
+        """
+        coordinates = np.asarray(coordinates).reshape(-1, self.natom, 3)
+        num_frames = len(coordinates)
+        values = {"time": times, "coordinates": coordinates}
+        values.update({"cell_lengths": lengths, "cell_angles": angles})
+
+        columns = []
+        for name, _, nc_type, _ in self.records:
+            if values[name] is None:
+                raise ValueError(f"{name} should be given for every frame")
+            data = np.ascontiguousarray(values[name], dtype=NC_DTYPES[nc_type])
+            columns.append(data.reshape(num_frames, -1).view(np.uint8))
+        # the variables of each frame follow each other in its record
+        self._handle.write(np.concatenate(columns, axis=1).tobytes())
+        self.num_frames += num_frames
+
+    def close(self):
+        """Write the number of frames to the header and close the file."""
+        if self._handle.closed:
+            return
+        self._handle.seek(len(MAGIC))
+        self._handle.write(struct.pack(">i", self.num_frames))
+        self._handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
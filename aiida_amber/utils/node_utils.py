@@ -1,10 +1,41 @@
 """Methods for dealing with various types of files and
 directories that are used in processes and add them to aiida nodes"""
 
+import contextlib
+import hashlib
 import os
 import re
 
-from aiida.orm import FolderData
+from aiida.common.hashing import chunked_file_hash
+from aiida.manage import get_manager
+from aiida.orm import FolderData, QueryBuilder, SinglefileData, load_node
+from aiida.orm.nodes.caching import NodeCaching
+
+# Nodes of the local files used by the processes launched from this process,
+# keyed by path, size and modification time, while cache_file_nodes is active.
+_FILE_NODE_CACHE = None
+# Whether files that do not exist yet are returned as PendingFile, while
+# defer_missing_files is active.
+_DEFER_MISSING = False
+
+
+class ContentCaching(NodeCaching):
+    """Caching interface of file nodes hashed on the content of their file.
+
+    The filename and the attributes parsed from the file are left out of the
+    hash, so the same script saved under another name, or in another
+    directory, gives calculations with the same hash that can be cached.
+    """
+
+    def get_objects_to_hash(self):
+        """Return the objects included in the hash: the class of the node
+        and the hash of the content of its file."""
+        with self._node.open(mode="rb") as handle:
+            content_hash = chunked_file_hash(handle, hashlib.sha256)
+        return {
+            "class": str(self._node.__class__),
+            "content_hash": content_hash,
+        }
 
 
 def format_link_label(filename: str) -> str:
@@ -29,6 +60,139 @@ def format_link_label(filename: str) -> str:
     return link_label
 
 
+class PendingFile:
+    """Placeholder of an input file that does not exist yet, e.g. one that
+    an upstream process will write, set in the inputs of a process launched
+    once the upstream processes have finished.
+
+    :param filepath: Path to the local file.
+    :param node_class: The SinglefileData (sub)class of the node.
+    """
+
+    def __init__(self, filepath: str, node_class=SinglefileData):
+        self.filepath = filepath
+        self.filename = os.path.basename(filepath)
+        self.node_class = node_class
+
+    def __repr__(self):
+        return f"PendingFile({self.filepath!r})"
+
+
+@contextlib.contextmanager
+def defer_missing_files():
+    """Get a PendingFile instead of failing for the local files that do not
+    exist yet in the context."""
+    global _DEFER_MISSING  # pylint: disable=global-statement
+    previous = _DEFER_MISSING
+    _DEFER_MISSING = True
+    try:
+        yield
+    finally:
+        _DEFER_MISSING = previous
+
+
+def is_deferring_missing_files():
+    """Return whether files that do not exist yet are deferred."""
+    return _DEFER_MISSING
+
+
+def get_file_node(filepath: str, node_class=SinglefileData):
+    """Get a node holding a local file, reusing a stored node with the same
+    filename and content if there is one.
+
+    The file is hashed with the same algorithm used for the keys of the
+    repository, so identical files (e.g. a topology used for many runs) are
+    only ingested once and the existing node is linked to every calculation.
+
+    :param filepath: Path to the local file.
+    :param node_class: The SinglefileData (sub)class of the node, only nodes
+        of exactly this class are reused.
+    :returns: A stored node if one is found, otherwise a new unstored node,
+        or a PendingFile if the file does not exist and is deferred.
+    """
+    if _DEFER_MISSING and not os.path.exists(filepath):
+        return PendingFile(filepath, node_class)
+    if _FILE_NODE_CACHE is not None:
+        stat = os.stat(filepath)
+        key = (os.path.realpath(filepath), stat.st_size, stat.st_mtime_ns, node_class)
+        if key not in _FILE_NODE_CACHE:
+            _FILE_NODE_CACHE[key] = find_file_node(filepath, node_class)
+        return _FILE_NODE_CACHE[key]
+    return find_file_node(filepath, node_class)
+
+
+@contextlib.contextmanager
+def cache_file_nodes():
+    """Reuse the node of a local file for every process launched in the
+    context, e.g. a topology shared by a batch of calculations.
+
+    The node returned for a file is stored along with the first process
+    using it and is then linked to the following ones without querying the
+    database again. Files modified in the meantime get a new node.
+    """
+    global _FILE_NODE_CACHE  # pylint: disable=global-statement
+    previous = _FILE_NODE_CACHE
+    _FILE_NODE_CACHE = {} if previous is None else previous
+    try:
+        yield
+    finally:
+        _FILE_NODE_CACHE = previous
+
+
+def find_file_node(filepath: str, node_class=SinglefileData):
+    """Find a stored node with the filename and content of a local file.
+
+    :param filepath: Path to the local file.
+    :param node_class: The SinglefileData (sub)class of the node.
+    :returns: A stored node if one is found, otherwise a new unstored node.
+    """
+    filename = os.path.basename(filepath)
+    manager = get_manager()
+    repository = manager.get_profile_storage().get_repository()
+    if repository.key_format != "sha256":
+        return node_class(file=filepath)
+
+    with open(filepath, "rb") as handle:
+        key = chunked_file_hash(handle, hashlib.sha256)
+
+    # The repository metadata maps each filename to the key of its content.
+    # Filenames have dots, so the key can not be given as a path of the
+    # filter, it is matched by JSON containment instead.
+    qb = QueryBuilder()
+    if "sqlite" not in manager.get_profile().storage_backend:
+        qb.append(
+            node_class,
+            subclassing=False,
+            filters={
+                "attributes.filename": filename,
+                "repository_metadata.o": {"contains": {filename: {"k": key}}},
+            },
+            project="id",
+        )
+        pk = next(iter(qb.limit(1).all(flat=True)), None)
+    else:
+        # containment is not implemented for SQLite storage, so only the
+        # metadata of the nodes with the filename is compared
+        qb.append(
+            node_class,
+            subclassing=False,
+            filters={"attributes.filename": filename},
+            project=["id", "repository_metadata"],
+        )
+        pk = next(
+            (
+                pk
+                for pk, metadata in qb.iterall()
+                if metadata.get("o", {}).get(filename, {}).get("k") == key
+            ),
+            None,
+        )
+    if pk is not None:
+        return load_node(pk)
+
+    return node_class(file=filepath)
+
+
 def check_filepath(input_files: list):
     """Check if an input is a file or a path.
 
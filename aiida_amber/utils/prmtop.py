@@ -0,0 +1,138 @@
+"""Functions for indexing the %FLAG sections of Amber prmtop files and
+decoding their fixed width data into numpy arrays."""
+
+import re
+
+import numpy as np
+
+# Indices in the POINTERS section of a prmtop file.
+NATOM = 0
+NRES = 11
+IFBOX = 27
+
+# Box types given by IFBOX.
+BOX_TYPES = {0: "none", 1: "orthorhombic", 2: "octahedral"}
+# Angles of each box type, which ASCII trajectories do not store.
+BOX_ANGLES = {
+    "orthorhombic": (90.0, 90.0, 90.0),
+    "octahedral": (109.4712190, 109.4712190, 109.4712190),
+}
+
+# Fortran formats of the sections, e.g. 10I8, 5E16.8 or 20a4.
+FORMAT_PATTERN = re.compile(r"(\d*)([aAiIeEfF])(\d+)(?:\.\d+)?")
+
+# Amber stores charges in units of the electron charge times this factor.
+CHARGE_FACTOR = 18.2223
+
+
+def is_prmtop(handle):
+    """Check whether a binary file handle points to a prmtop file.
+
+    The position of the handle is restored after reading the first bytes.
+
+    :param handle: file handle opened in binary mode.
+    :returns: True if the file starts with a %VERSION or %FLAG line.
+    """
+    position = handle.tell()
+    start = handle.read(8)
+    handle.seek(position)
+    return start.startswith((b"%VERSION", b"%FLAG"))
+
+
+def index_sections(buffer):
+    """Find the position of the data of every %FLAG section.
+
+    Only the lines starting with % are visited, jumping from one to the next
+    with ``find``, so an mmap of the file can be indexed without reading the
+    pages holding the data.
+
+    :param buffer: bytes or mmap of the prmtop file.
+    :returns: Tuple of the version line and a dict of the sections, keyed by
+        flag, of [offset, length, format] of their data.
+    """
+    version = ""
+    sections = {}
+    flag = None
+    size = len(buffer)
+    pos = 0 if buffer[:1] == b"%" else buffer.find(b"\n%") + 1
+    while pos > 0 or buffer[:1] == b"%":
+        end_of_line = buffer.find(b"\n", pos)
+        if end_of_line == -1:
+            end_of_line = size
+        line = bytes(buffer[pos:end_of_line]).decode("ascii", errors="replace")
+        next_header = buffer.find(b"\n%", end_of_line)
+        data_end = size if next_header == -1 else next_header + 1
+        data_start = min(end_of_line + 1, data_end)
+
+        if line.startswith("%FLAG"):
+            flag = line.split()[1]
+            sections[flag] = [data_start, data_end - data_start, None]
+        elif line.startswith("%VERSION"):
+            version = line.strip()
+        elif flag is not None:
+            # %FORMAT and %COMMENT lines come before the data of the section
+            if line.startswith("%FORMAT"):
+                sections[flag][2] = line[len("%FORMAT") :].strip().strip("()")
+            sections[flag][0:2] = [data_start, data_end - data_start]
+
+        if next_header == -1:
+            break
+        pos = next_header + 1
+    return version, sections
+
+
+def decode_section(data, section_format):
+    """Decode the fixed width data of a section into an array.
+
+    :param data: bytes of the section data, including the line breaks.
+    :param section_format: Fortran format of the section, e.g. 5E16.8.
+    :returns: numpy array of ints, floats or strings.
+    """
+    match = FORMAT_PATTERN.fullmatch(section_format)
+    if match is None:
+        raise ValueError(f"unsupported prmtop format {section_format}")
+    count = int(match.group(1) or 1)
+    kind, width = match.group(2).lower(), int(match.group(3))
+
+    lines = bytes(data).replace(b"\r", b"").split(b"\n")
+    if lines[-1] == b"":
+        lines.pop()
+    if not lines:
+        return np.array([], dtype=str if kind == "a" else None)
+    # lines of strings can have their trailing spaces removed
+    line_width = count * width
+    if any(len(line) != line_width for line in lines[:-1]):
+        lines = [line.ljust(line_width) for line in lines[:-1]] + lines[-1:]
+    num_values = (len(lines) - 1) * count + -(-len(lines[-1]) // width)
+    data = b"".join(lines).ljust(num_values * width)
+    values = np.frombuffer(data, dtype=f"S{width}")
+    if kind == "a":
+        return np.char.strip(values.astype(str))
+    if kind == "i":
+        return values.astype(np.int64)
+    return values.astype(np.float64)
+
+
+def read_pointers(lines):
+    """Read the POINTERS section of a prmtop file.
+
+    The section is near the start of the file, so only the lines up to the
+    end of the section are consumed from the iterable.
+
+    :param lines: Iterable over the lines of a prmtop file.
+    :returns: list of ints, or an empty list if there is no POINTERS section.
+    """
+    pointers = []
+    in_section = False
+    for line in lines:
+        if line.startswith("%FLAG"):
+            if in_section:
+                break
+            in_section = line.split()[1] == "POINTERS"
+        elif in_section and not line.startswith("%"):
+            # fixed width fields of 8 characters, see %FORMAT(10I8)
+            line = line.rstrip("\n")
+            pointers.extend(
+                int(line[index : index + 8]) for index in range(0, len(line), 8)
+            )
+    return pointers
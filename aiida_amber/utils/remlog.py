@@ -0,0 +1,133 @@
+"""Functions for reading the exchange statistics of temperature replica
+exchange runs from the rem.log file written by sander.MPI, and for building
+the temperature ladder of the replicas."""
+
+import numpy as np
+
+# Columns of each line of a T-REMD rem.log:
+# Rep#, Neibr#, Temp0, PotE(x_1), PotE(x_2), left_fe, right_fe, Success, Success rate
+NUM_COLUMNS = 9
+
+
+def parse_remlog(lines):
+    """Parse a temperature replica exchange log into arrays.
+
+    All exchange lines are split into one table which is then reshaped to
+    (exchanges, replicas) so the columns are converted in one go.
+
+    :param lines: Iterable over the lines of a rem.log file.
+    :returns: dict of arrays with the shape (exchanges, replicas): replica
+        and neighbor numbers, temperature, potential_energy, success and
+        success_rate, the temperature_index of each replica in the ladder
+        and the measured acceptance ratio of each pair of neighbouring
+        temperatures. Empty if no exchanges were logged.
+    """
+    rows = []
+    num_replicas = None
+    for line in lines:
+        if line.startswith("#"):
+            if line.startswith("# exchange") and rows and num_replicas is None:
+                num_replicas = len(rows)
+            continue
+        fields = line.split()
+        if len(fields) == NUM_COLUMNS:
+            rows.append(fields)
+    if not rows:
+        return {}
+    if num_replicas is None:
+        num_replicas = len(rows)
+
+    # drop an incomplete last exchange of a run that was stopped
+    num_exchanges = len(rows) // num_replicas
+    table = np.array(rows[: num_exchanges * num_replicas])
+    table = table.reshape(num_exchanges, num_replicas, NUM_COLUMNS)
+
+    # order the lines of each exchange by replica number
+    replica = table[:, :, 0].astype(int)
+    order = np.argsort(replica, axis=1)
+    table = np.take_along_axis(table, order[:, :, np.newaxis], axis=1)
+
+    exchange = {
+        "replica": table[:, :, 0].astype(int),
+        "neighbor": table[:, :, 1].astype(int),
+        "temperature": table[:, :, 2].astype(float),
+        "potential_energy": table[:, :, 3].astype(float),
+        "success": table[:, :, 7] == "T",
+        "success_rate": table[:, :, 8].astype(float),
+    }
+    ladder = np.unique(exchange["temperature"])
+    exchange["temperature_index"] = np.searchsorted(ladder, exchange["temperature"])
+    exchange["acceptance"] = get_acceptance(exchange, len(ladder))
+    return exchange
+
+
+def get_acceptance(exchange, num_temperatures):
+    """Measure the acceptance ratio of exchanges between neighbouring
+    temperatures.
+
+    :param exchange: dict of arrays as returned by :func:`parse_remlog`.
+    :param num_temperatures: number of temperatures in the ladder.
+    :returns: array of the acceptance ratio between temperature i and i+1,
+        NaN for pairs that were never attempted.
+    """
+    index = exchange["temperature_index"]
+    # temperature index of the neighbor each replica attempted to exchange with
+    neighbor = np.take_along_axis(index, exchange["neighbor"] - 1, axis=1)
+    # count each attempt once, from the lower temperature of the pair
+    attempted = neighbor == index + 1
+    num_pairs = num_temperatures - 1
+    attempts = np.bincount(index[attempted], minlength=num_pairs)[:num_pairs]
+    accepted = np.bincount(index[attempted & exchange["success"]], minlength=num_pairs)[
+        :num_pairs
+    ]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(attempts > 0, accepted / attempts, np.nan)
+
+
+def get_final_temperature_index(exchange):
+    """Find the temperature of each replica after the last exchange.
+
+    The temperatures in rem.log are those the replicas ran at before each
+    exchange, so a successful last exchange moves a replica to the
+    temperature of its neighbour.
+
+    :param exchange: dict of arrays as returned by :func:`parse_remlog`.
+    :returns: array of the index in the ladder of each replica.
+    """
+    index = exchange["temperature_index"][-1]
+    neighbor = index[exchange["neighbor"][-1] - 1]
+    return np.where(exchange["success"][-1], neighbor, index)
+
+
+def geometric_ladder(t_min, t_max, num_replicas):
+    """Build a temperature ladder with a constant ratio between neighbours,
+    which gives roughly uniform acceptance for a constant heat capacity.
+
+    :param t_min: lowest temperature (K).
+    :param t_max: highest temperature (K).
+    :param num_replicas: number of temperatures.
+    :returns: array of temperatures from t_min to t_max.
+    """
+    if num_replicas == 1:
+        return np.array([float(t_min)])
+    return t_min * (t_max / t_min) ** (np.arange(num_replicas) / (num_replicas - 1))
+
+
+def respace_ladder(temperatures, acceptance, min_acceptance=1e-3):
+    """Re-space a temperature ladder towards uniform acceptance.
+
+    The cost of each gap is taken as -ln(acceptance), and the temperatures
+    are placed at equal cumulative cost, interpolating in ln(T). The lowest
+    and highest temperatures are kept.
+
+    :param temperatures: current ladder in increasing order.
+    :param acceptance: measured acceptance ratio of each neighbouring pair.
+    :param min_acceptance: acceptance assumed for gaps with no exchanges.
+    :returns: array of the new temperatures.
+    """
+    temperatures = np.asarray(temperatures, dtype=float)
+    acceptance = np.nan_to_num(np.asarray(acceptance, dtype=float), nan=min_acceptance)
+    cost = -np.log(np.clip(acceptance, min_acceptance, 1.0 - 1e-6))
+    cumulative = np.concatenate([[0.0], np.cumsum(cost)])
+    targets = np.linspace(0.0, cumulative[-1], len(temperatures))
+    return np.exp(np.interp(targets, cumulative, np.log(temperatures)))
@@ -0,0 +1,161 @@
+"""Methods for accessing the files stored in the repository of AiiDA nodes
+directly on the local file system."""
+
+import contextlib
+import os
+import shutil
+
+from aiida.orm import SinglefileData
+
+# Ways of exporting repository files to the local file system.
+EXPORT_MODES = ["copy", "reflink", "none"]
+# Options of the calculations setting where their outputs are exported to,
+# kept in the extras of the calculation nodes.
+EXPORT_OPTIONS = ["output_dir", "output_export"]
+
+# ioctl request to clone the extents of a file on Linux (btrfs, xfs, ...).
+FICLONE = 0x40049409
+
+# First bytes of the NetCDF classic/64-bit offset and NetCDF4 (HDF5) formats.
+NETCDF3_MAGIC = b"CDF"
+HDF5_MAGIC = b"\x89HDF"
+
+
+@contextlib.contextmanager
+def repository_file_path(node, path):
+    """Make a file in the repository of a node available as a local filepath.
+
+    Files of unstored nodes and files kept as loose objects in the
+    disk-objectstore are already individual files on disk, so their path is
+    returned as is and can be memory-mapped without copying any data. Only
+    if the file is not directly accessible (e.g. it has been packed) is its
+    content copied to a temporary file.
+
+    :param node: the node whose repository holds the file.
+    :param path: relative path of the file within the repository.
+    :returns: context manager yielding the absolute path to the file.
+    """
+    with node.base.repository.open(path, "rb") as handle:
+        filepath = getattr(handle, "name", None)
+        if isinstance(filepath, str) and os.path.isfile(filepath):
+            yield filepath
+            return
+
+    with node.base.repository.as_path(path) as filepath:
+        yield str(filepath)
+
+
+def is_netcdf(handle):
+    """Check whether a binary file handle points to a NetCDF file in the
+    classic or 64-bit offset format, as written by sander with ioutfm=1.
+
+    The position of the handle is restored after reading the magic bytes.
+
+    :param handle: file handle opened in binary mode.
+    :returns: True if the file starts with the NetCDF signature.
+    """
+    position = handle.tell()
+    magic = handle.read(len(NETCDF3_MAGIC))
+    handle.seek(position)
+    return magic == NETCDF3_MAGIC
+
+
+def validate_export_mode(value, _):
+    """Validate the ``output_export`` option of a calculation."""
+    if value not in EXPORT_MODES:
+        return f"`output_export` should be one of {EXPORT_MODES}, got: {value}"
+    return None
+
+
+def get_export_option(node, name):
+    """Get an export option of a calculation node.
+
+    :param node: the calculation node.
+    :param name: one of the EXPORT_OPTIONS.
+    :returns: the value in the extras of the node, set when the calculation
+        is run, or else its option.
+    """
+    return node.base.extras.get(name, node.get_option(name))
+
+
+def reflink(source, target):
+    """Clone a file so it shares its data blocks with the source.
+
+    :raises OSError: if the file system does not support cloning.
+    """
+    import fcntl  # pylint: disable=import-outside-toplevel
+
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def export_file(node, path, target, mode="copy"):
+    """Export a file from the repository of a node to the local file system.
+
+    With the ``reflink`` mode the file is cloned from the repository object
+    without writing its data again. This is only possible when the object is
+    an individual file, e.g. a loose object of the disk-objectstore, on a file
+    system that supports cloning, otherwise the file is copied. The clone is
+    a separate file, so the repository object is never modified through it.
+
+    :param node: the node whose repository holds the file.
+    :param path: relative path of the file within the repository.
+    :param target: path of the file to be written.
+    :param mode: one of copy or reflink.
+    """
+    if os.path.lexists(target):
+        os.remove(target)
+
+    with node.base.repository.open(path, "rb") as handle:
+        source = getattr(handle, "name", None)
+        if mode != "copy" and isinstance(source, str) and os.path.isfile(source):
+            try:
+                reflink(source, target)
+                return
+            except OSError:
+                # different file system or cloning not supported
+                if os.path.lexists(target):
+                    os.remove(target)
+        with open(target, "wb") as out:
+            shutil.copyfileobj(handle, out)
+
+
+def export_tree(node, output_dir, mode="copy"):
+    """Export all files in the repository of a node to a local directory.
+
+    :param node: the node whose repository is exported, e.g. retrieved.
+    :param output_dir: directory the files are written to.
+    :param mode: one of copy, reflink or none, with none nothing
+        is exported so it can be done later with ``aiida_amber_export``.
+    """
+    if mode == "none":
+        return
+    for dirpath, _, filenames in node.base.repository.walk():
+        target_dir = os.path.join(output_dir, dirpath)
+        os.makedirs(target_dir, exist_ok=True)
+        for filename in filenames:
+            export_file(
+                node, dirpath / filename, os.path.join(target_dir, filename), mode
+            )
+
+
+def export_outputs(node, output_dir, mode="copy"):
+    """Export the output files of a calculation to a local directory.
+
+    Besides the retrieved files, the single file outputs written by the
+    parser instead of retrieved are exported, e.g. the compressed
+    trajectories of sander.
+
+    :param node: the calculation node, with a retrieved output.
+    :param output_dir: directory the files are written to.
+    :param mode: one of copy, reflink or none, see :func:`export_tree`.
+    """
+    retrieved = node.outputs.retrieved
+    export_tree(retrieved, output_dir, mode)
+    if mode == "none":
+        return
+    filenames = retrieved.base.repository.list_object_names()
+    for output in node.base.links.get_outgoing().all_nodes():
+        if isinstance(output, SinglefileData) and output.filename not in filenames:
+            target = os.path.join(output_dir, output.filename)
+            export_file(output, output.filename, target, mode)
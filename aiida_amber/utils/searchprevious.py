@@ -2,14 +2,24 @@
 and appending nodes from previous processes to current process nodes.
 """
 
+import logging
 import os
 import re
-import sys
+import threading
 import time
 
+import kiwipy
+
 from aiida import orm
+from aiida.common.links import LinkType
+from aiida.manage import get_manager
 from aiida.orm.nodes.process.process import ProcessState
 
+LOGGER = logging.getLogger(__name__)
+
+# States in which a process will not change anymore.
+TERMINAL_STATES = [ProcessState.FINISHED, ProcessState.EXCEPTED, ProcessState.KILLED]
+
 
 def format_link_label(filename: str) -> str:
     """
@@ -52,59 +62,131 @@ def build_query():
 
 
 def check_prev_process(qb):
-    """Wait for a previous process to finish if it is still running. The
-    process state is checked every 10 seconds for up to 5 minutes and stops
-    when the process state is set to finished. If a previous processes takes
-    longer than 5 minutes, the latest submitted process is exited.
+    """Wait for the most recent previous process to finish if it is still
+    running, for at most 5 minutes.
 
     :param qb: The queries of previous processes in the AiiDA database
     :type qb: :py:class:`aiida.orm.querybuilder.QueryBuilder`
+    :raises TimeoutError: if the process is still running after 5 minutes
+    :raises RuntimeError: if the process did not finish successfully
     """
     if qb.count() > 0:
         # Get the most recently process that was already submitted to the
-        # daemon and check if it has finished, wait 10s if not.
+        # daemon and wait for it to finish.
         prev_calc = qb.first()[0]
-        if prev_calc.process_state != ProcessState.EXCEPTED:
-            timeout = time.time() + 60 * 5  # 5 minutes from now
-            while prev_calc.process_state != ProcessState.FINISHED:
-                print(f"Previous process status: {prev_calc.process_state}")
-                print("Waiting for previous process to finish...")
-                time.sleep(10)
-                if time.time() > timeout:
-                    sys.exit("Wait time exceeded for previous process to complete")
-        else:
-            sys.exit("Previous process did not complete successfully, please check")
-
-
-def find_previous_file_nodes(qb):
-    """
-    For any previous processes, store nodes that are files into a list
+        wait_for_processes([prev_calc.pk], timeout=60 * 5)
 
-    :param qb: The queries of previous processes in the AiiDA database
-    :type qb: :py:class:`aiida.orm.querybuilder.QueryBuilder`
+
+def wait_for_processes(pks, timeout=None, fallback_interval=60):
+    """Wait for the given processes to terminate and check they finished
+    successfully.
+
+    Rather than polling, a subscriber is added for the state change
+    broadcasts of each process so this returns as soon as the last one
+    terminates. As a fail-safe against a missed broadcast, and for profiles
+    without a broker, the process states are also checked from the
+    database every ``fallback_interval`` seconds.
+
+    :param pks: The pks of the processes to wait for
+    :type pks: list
+    :param timeout: Maximum time to wait in seconds, waits indefinitely if None
+    :param fallback_interval: Time in seconds between checks of the database
+    :raises TimeoutError: if processes are still running after ``timeout``
+    :raises RuntimeError: if processes did not finish successfully
     """
-    file_nodes = []
-    if qb.count() > 0:
-        for entry in qb.all():
-            # A previous calculation exists - use its output as input for the
-            # current calculation.
-            previous_calculation = entry[0]
-            for label in previous_calculation.outputs:
-                # Get the outputs from a previous process.
-                previous_output_node = previous_calculation.outputs[f"{label}"]
-                # check if the output node is a file.
-                if isinstance(previous_output_node, orm.SinglefileData):
-                    file_nodes.append(previous_output_node)
+    nodes = [orm.load_node(pk) for pk in pks]
+    pending = {node.pk for node in nodes if not node.is_terminated}
+    terminated = threading.Event()
+    lock = threading.Lock()
+
+    def on_terminated(_communicator, _body, sender, _subject, _correlation_id):
+        with lock:
+            pending.discard(sender)
+            if not pending:
+                terminated.set()
+
+    manager = get_manager()
+    communicator = None
+    if pending and manager.get_broker() is not None:
+        communicator = manager.get_communicator()
+    identifiers = []
+    if communicator is not None:
+        for pk in pending:
+            broadcast_filter = kiwipy.BroadcastFilter(on_terminated, sender=pk)
+            for state in TERMINAL_STATES:
+                broadcast_filter.add_subject_filter(f"state_changed.*.{state.value}")
+            identifiers.append(communicator.add_broadcast_subscriber(broadcast_filter))
+
+    try:
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            # also catches processes that terminated before subscribing
+            with lock:
+                pending.difference_update(
+                    [pk for pk in pending if orm.load_node(pk).is_terminated]
+                )
+                if not pending:
+                    break
+                LOGGER.info("Waiting for processes %s to finish", sorted(pending))
+            wait = fallback_interval
+            if deadline is not None:
+                wait = min(wait, deadline - time.time())
+                if wait <= 0:
+                    raise TimeoutError(
+                        f"wait time exceeded for processes {sorted(pending)}"
+                    )
+            terminated.wait(wait)
+    finally:
+        for identifier in identifiers:
+            communicator.remove_broadcast_subscriber(identifier)
+
+    failed = [node.pk for node in nodes if not node.is_finished_ok]
+    if failed:
+        raise RuntimeError(
+            f"processes {failed} did not complete successfully, please check"
+        )
+
+
+def find_previous_file_nodes(filenames):
+    """
+    Find the most recent file nodes output by previous processes with the
+    given filenames.
+
+    For each filename a query joins the processes to their output
+    SinglefileData nodes with that filename, newest first, and returns the
+    id of the first one only, so the lookup does not depend on the number of
+    processes in the database, whether the file is found or not. Only create
+    links are followed, so a file node also returned by a workflow is not
+    matched twice.
+
+    :param filenames: The filenames to search for
+    :type filenames: list
+    :returns: Dictionary of filenames and the most recent node for each
+    :rtype: dict
+    """
+    file_nodes = {}
+    for filename in sorted(set(filenames)):
+        qb = orm.QueryBuilder()
+        qb.append(orm.ProcessNode, tag="process")
+        qb.append(
+            orm.SinglefileData,
+            with_incoming="process",
+            edge_filters={"type": LinkType.CREATE.value},
+            filters={"attributes.filename": filename},
+            project="id",
+        )
+        qb.order_by({orm.SinglefileData: {"ctime": "desc"}})
+        pks = qb.limit(1).all(flat=True)
+        if pks:
+            file_nodes[filename] = orm.load_node(pks[0])
     return file_nodes
 
 
-def append_prev_nodes(qb, inputs, process_inputs, INPUT_DIR):
+def append_prev_nodes(inputs, process_inputs, INPUT_DIR):
     """Checks if previous processes exists for genericMD calcs and links the
     most recent SinglefileData type output nodes from previous processs as
     inputs to the new process if the file names match.
 
-    :param qb: The query entries of previous processes in the AiiDA database
-    :type qb: :py:class:`aiida.orm.querybuilder.QueryBuilder`
     :param inputs: Input files for the command to be run via AiiDA
     :type inputs: list
     :param process_inputs: All inputs for the current process to be submitted
@@ -113,30 +195,16 @@ def append_prev_nodes(qb, inputs, process_inputs, INPUT_DIR):
     :returns: Updated inputs for the current process
     :rtype: dict
     """
-    file_nodes = find_previous_file_nodes(qb)
+    # strip input file names of any paths.
+    file_nodes = find_previous_file_nodes([strip_path(inp) for inp in inputs])
     if file_nodes:
-        stripped_inputs = []
-        prev_files = []  # list of previous files already saved.
         prev = {}  # dict for genericMD inputs
-        for inp in inputs:  # strip input file names of any paths.
-            stripped_inputs.append(strip_path(inp))
-        for prev_file_node in file_nodes:
-            prev_output_filename = prev_file_node.base.attributes.get(
-                "filename"
-            )  # get filename of the node
-            # check if output file is an input for new process and
-            # hasn't already been included as an input.
-            if (
-                prev_output_filename in stripped_inputs
-                and prev_output_filename not in prev_files
-            ):
-                prev_files.append(prev_output_filename)
-                prev[format_link_label(prev_output_filename)] = prev_file_node
-
-        # save input files not found in previous nodes too.
         for filename in list(inputs):
             stripped_input = strip_path(filename)
-            if stripped_input not in prev_files:
+            if stripped_input in file_nodes:
+                prev[format_link_label(stripped_input)] = file_nodes[stripped_input]
+            else:
+                # save input files not found in previous nodes too.
                 prev[format_link_label(stripped_input)] = orm.SinglefileData(
                     file=os.path.join(INPUT_DIR, filename)
                 )
@@ -156,25 +224,12 @@ def link_previous_file_nodes(input_file_labels: dict, inputs: dict):
         label for the node
     :param inputs: dictionary used for all inputs for
     """
-    qb = build_query()
     # if previous processes exist then check if input files are stored as
     # previous nodes and use these nodes as inputs for new process.
-    file_nodes = find_previous_file_nodes(qb)
-    prev_files = []  # list of previous files already saved.
-    if file_nodes:
-        for prev_file_node in file_nodes:
-            prev_output_filename = prev_file_node.base.attributes.get(
-                "filename"
-            )  # get filename of the node
-            # save previous file nodes if the filenames match with current process
-            # input files
-            if (
-                prev_output_filename in input_file_labels.keys()
-                and prev_output_filename not in prev_files
-            ):
-                prev_files.append(prev_output_filename)
-                label = input_file_labels[prev_output_filename]
-                inputs[label] = prev_file_node
+    file_nodes = find_previous_file_nodes(input_file_labels.keys())
+    for prev_output_filename, prev_file_node in file_nodes.items():
+        label = input_file_labels[prev_output_filename]
+        inputs[label] = prev_file_node
     return inputs
 
 
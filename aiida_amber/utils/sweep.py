@@ -0,0 +1,179 @@
+"""Functions for expanding an mdin template into a parameter sweep over
+namelist variables and for submitting the variants with a cap on the number
+of calculations running at once."""
+
+import contextlib
+import itertools
+import re
+import threading
+
+import kiwipy
+
+from aiida import engine, orm
+from aiida.manage import get_manager
+
+from aiida_amber.utils.namelist import set_namelist_values, split_values
+from aiida_amber.utils.searchprevious import TERMINAL_STATES
+
+# States in which a submitted process still counts against the cap.
+ACTIVE_STATES = ["created", "waiting", "running"]
+# Numeric start:stop:step ranges, other values with a ":" are kept as is,
+# e.g. the ambmasks of restraintmask.
+NUMBER = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+RANGE_PATTERN = re.compile(rf"{NUMBER}:{NUMBER}:{NUMBER}")
+
+
+def parse_range(text: str) -> list:
+    """Expand a start:stop:step range including its end point.
+
+    Integer ranges stay integers, e.g. "300:330:10" gives [300, 310, 320, 330].
+
+    :param text: The range as start:stop:step.
+    :returns: List of the values in the range.
+    """
+    try:
+        start, stop, step = text.split(":")
+    except ValueError as exc:
+        raise ValueError(f"range should be start:stop:step, got: {text}") from exc
+    if all(value.lstrip("-").isdigit() for value in (start, stop, step)):
+        start, stop, step = int(start), int(stop), int(step)
+    else:
+        start, stop, step = float(start), float(stop), float(step)
+    if step == 0 or (stop - start) / step < 0:
+        raise ValueError(f"step of range {text} does not reach its end")
+    num_values = int(round((stop - start) / step)) + 1
+    values = [start + index * step for index in range(num_values)]
+    if isinstance(step, float):
+        # drop the rounding error of the steps, e.g. 0.30000000000000004
+        values = [round(value, 10) for value in values]
+    return values
+
+
+def parse_sweep(spec: str):
+    """Parse the values of a namelist variable to sweep over.
+
+    The values are either a list separated by commas as in a namelist, or a
+    numeric start:stop:step range, the namelist defaults to cntrl, e.g.
+    "temp0=300:330:10", "cut=8.0,10.0", "ewald.skinnb=1.0,2.0" or
+    "restraintmask=':1-10',':11-20'".
+
+    :param spec: The sweep as [namelist.]variable=values.
+    :returns: Tuple of the namelist, the variable and the list of values.
+    """
+    name, sep, values = spec.partition("=")
+    if not sep or not name.strip() or not values.strip():
+        raise ValueError(f"sweep should be [namelist.]variable=values, got: {spec}")
+    namelist, _, variable = name.strip().rpartition(".")
+    if RANGE_PATTERN.fullmatch(values.strip()):
+        values = parse_range(values.strip())
+    else:
+        values = split_values(values)
+    return namelist or "cntrl", variable, values
+
+
+def expand_sweeps(mdin: str, sweeps: list) -> list:
+    """Generate an mdin for every combination of the swept values.
+
+    :param mdin: Content of the mdin template.
+    :param sweeps: List of (namelist, variable, values) as returned by
+        :func:`parse_sweep`.
+    :returns: List of tuples of the values set, keyed by variable, and the
+        content of the mdin file.
+    """
+    variants = []
+    for combination in itertools.product(*(values for _, _, values in sweeps)):
+        by_namelist = {}
+        for (namelist, variable, _), value in zip(sweeps, combination):
+            by_namelist.setdefault(namelist, {})[variable] = value
+        text = mdin
+        for namelist, values in by_namelist.items():
+            text = set_namelist_values(text, namelist, values)
+        values = {
+            variable: value for (_, variable, _), value in zip(sweeps, combination)
+        }
+        variants.append((values, text))
+    return variants
+
+
+def store_nodes(nodes: list) -> list:
+    """Store nodes in a single transaction of the profile storage.
+
+    :param nodes: List of unstored nodes.
+    :returns: The list of stored nodes.
+    """
+    with get_manager().get_profile_storage().transaction():
+        for node in nodes:
+            node.store()
+    return nodes
+
+
+def get_active(pks: list) -> list:
+    """Get the pks of the given processes that have not terminated."""
+    if not pks:
+        return []
+    qb = orm.QueryBuilder()
+    qb.append(
+        orm.ProcessNode,
+        filters={"id": {"in": pks}, "attributes.process_state": {"in": ACTIVE_STATES}},
+        project="id",
+    )
+    return qb.all(flat=True)
+
+
+@contextlib.contextmanager
+def termination_event():
+    """Yield an event that is set when any process terminates.
+
+    The event is set from the state change broadcasts of the processes, it is
+    never set for profiles without a broker.
+    """
+    terminated = threading.Event()
+
+    def on_terminated(_communicator, _body, _sender, _subject, _correlation_id):
+        terminated.set()
+
+    manager = get_manager()
+    communicator = None
+    if manager.get_broker() is not None:
+        communicator = manager.get_communicator()
+    identifier = None
+    if communicator is not None:
+        broadcast_filter = kiwipy.BroadcastFilter(on_terminated)
+        for state in TERMINAL_STATES:
+            broadcast_filter.add_subject_filter(f"state_changed.*.{state.value}")
+        identifier = communicator.add_broadcast_subscriber(broadcast_filter)
+    try:
+        yield terminated
+    finally:
+        if identifier is not None:
+            communicator.remove_broadcast_subscriber(identifier)
+
+
+def submit_with_limit(processes, max_concurrent=None, poll_interval=10):
+    """Submit processes, waiting for running ones to terminate when the cap
+    on the number of active processes is reached.
+
+    Only the processes that were active at the last check are queried again,
+    after a process terminates or every ``poll_interval`` seconds as a
+    fallback for a missed broadcast.
+
+    :param processes: Iterable of tuples of the process class to submit, e.g.
+        SanderCalculation, and the dict of its inputs.
+    :param max_concurrent: Maximum number of active processes, None for no cap.
+    :param poll_interval: Time in seconds between checks of the active processes.
+    :returns: List of the submitted process nodes.
+    """
+    submitted = []
+    active = []
+    with termination_event() as terminated:
+        for process_class, inputs in processes:
+            while max_concurrent and len(active) >= max_concurrent:
+                # cleared before the check so no termination is missed
+                terminated.clear()
+                active = get_active(active)
+                if len(active) >= max_concurrent:
+                    terminated.wait(poll_interval)
+            node = engine.submit(process_class, **inputs)
+            submitted.append(node)
+            active.append(node.pk)
+    return submitted
@@ -0,0 +1,426 @@
+"""Functions for generating synthetic Amber files of a chosen size, in the
+formats written by sander and tleap, so the plugin can be benchmarked and
+load tested without an Amber installation.
+
+The systems are boxes of water, three atoms per residue, with random
+coordinates drawn from a seeded generator so the files are reproducible.
+"""
+
+import numpy as np
+
+from aiida_amber.utils.netcdf import NetcdfTrajectoryWriter
+from aiida_amber.utils.prmtop import CHARGE_FACTOR, IFBOX, NATOM, NRES
+
+# Atom names, charges, masses and atomic numbers of a TIP3P water residue.
+WATER = {
+    "names": ["O", "H1", "H2"],
+    "charges": [-0.834, 0.417, 0.417],
+    "masses": [16.0, 1.008, 1.008],
+    "numbers": [8, 1, 1],
+}
+NUM_POINTERS = 31
+# Energy terms printed in each mdout record, in the order sander prints them.
+MDOUT_TERMS = [
+    ["Etot", "EKtot", "EPtot"],
+    ["BOND", "ANGLE", "DIHED"],
+    ["1-4 NB", "1-4 EEL", "VDWAALS"],
+    ["EELEC", "EHBOND", "RESTRAINT"],
+    ["EKCMT", "VIRIAL", "VOLUME"],
+]
+# Width of the labels of the three columns of terms.
+MDOUT_WIDTHS = [7, 8, 11]
+# Terms of the records printed by sander during minimisation.
+MIN_TERMS = [
+    ["BOND", "ANGLE", "DIHED"],
+    ["VDWAALS", "EEL", "HBOND"],
+    ["1-4 VDW", "1-4 EEL", "RESTRAINT"],
+]
+MIN_WIDTHS = [8, 8, 11]
+MIN_HEADER = "   NSTEP       ENERGY          RMS            GMAX         NAME    NUMBER"
+SEPARATOR = " " + "-" * 78
+
+
+def get_box_length(natom):
+    """Return the edge (A) of a cubic box holding natom atoms of water."""
+    return round((natom / 3 * 29.9) ** (1 / 3), 3)
+
+
+def format_section(values, fmt, per_line):
+    """Format the values of a prmtop section in lines of fixed width fields.
+
+    :param values: sequence of values.
+    :param fmt: printf style format of a field, e.g. "%8d" or "%-4s".
+    :param per_line: number of fields per line.
+    :returns: the lines of the section as a string.
+    """
+    fields = np.char.mod(fmt, np.asarray(values))
+    lines = [
+        "".join(fields[start : start + per_line])
+        for start in range(0, len(fields), per_line)
+    ]
+    return "\n".join(lines or [""]) + "\n"
+
+
+def write_prmtop(handle, natom, box=True):
+    """Write a prmtop of a box of water.
+
+    Only the sections describing atoms and residues are written, enough to
+    be indexed and read by :class:`aiida_amber.data.prmtop.PrmtopData`.
+
+    :param handle: file handle opened in text mode.
+    :param natom: number of atoms, rounded up to whole residues.
+    :param box: whether the system is periodic.
+    """
+    nres = -(-natom // 3)
+    natom = nres * 3
+    pointers = [0] * NUM_POINTERS
+    pointers[NATOM] = natom
+    pointers[NRES] = nres
+    pointers[IFBOX] = 1 if box else 0
+
+    def section(flag, fmt, per_line, values, fortran_format):
+        handle.write(f"%FLAG {flag}\n%FORMAT({fortran_format})\n")
+        handle.write(format_section(values, fmt, per_line))
+
+    handle.write("%VERSION  VERSION_STAMP = V0001.000  DATE = 01/01/24  00:00:00\n")
+    section("TITLE", "%-4s", 20, ["WAT"], "20a4")
+    section("POINTERS", "%8d", 10, pointers, "10I8")
+    section("ATOM_NAME", "%-4s", 20, WATER["names"] * nres, "20a4")
+    charges = np.tile(WATER["charges"], nres) * CHARGE_FACTOR
+    section("CHARGE", "%16.8E", 5, charges, "5E16.8")
+    section("ATOMIC_NUMBER", "%8d", 10, WATER["numbers"] * nres, "10I8")
+    section("MASS", "%16.8E", 5, np.tile(WATER["masses"], nres), "5E16.8")
+    section("RESIDUE_LABEL", "%-4s", 20, ["WAT"] * nres, "20a4")
+    section("RESIDUE_POINTER", "%8d", 10, np.arange(nres) * 3 + 1, "10I8")
+    if box:
+        length = get_box_length(natom)
+        section("BOX_DIMENSIONS", "%16.8E", 5, [90.0] + [length] * 3, "5E16.8")
+
+
+def iter_coordinates(natom, nframes, chunk_frames=100, seed=0):
+    """Generate random coordinates inside the box, in chunks of frames.
+
+    :returns: generator of arrays of shape (frames, natom, 3).
+    """
+    rng = np.random.default_rng(seed)
+    length = get_box_length(natom)
+    for start in range(0, nframes, chunk_frames):
+        size = min(chunk_frames, nframes - start)
+        yield rng.uniform(0.0, length, (size, natom, 3)).round(3)
+
+
+def write_mdcrd(handle, natom, nframes, box=True):
+    """Write an ASCII mdcrd trajectory of 10F8.3 lines.
+
+    :param handle: file handle opened in text mode.
+    :param natom: number of atoms.
+    :param nframes: number of frames.
+    :param box: whether each frame ends with a line of box lengths.
+    """
+    handle.write("synthetic trajectory\n")
+    box_line = "%8.3f%8.3f%8.3f\n" % ((get_box_length(natom),) * 3)
+    for chunk in iter_coordinates(natom, nframes):
+        for frame in chunk:
+            handle.write(format_section(frame.ravel(), "%8.3f", 10))
+            if box:
+                handle.write(box_line)
+
+
+def write_netcdf_trajectory(path, natom, nframes, box=True, time_step=1.0):
+    """Write an Amber NetCDF trajectory, as sander does with ioutfm=1.
+
+    :param path: path of the file to be written.
+    :param natom: number of atoms.
+    :param nframes: number of frames.
+    :param box: whether the box lengths and angles are written.
+    :param time_step: time (ps) between frames.
+    """
+    length = get_box_length(natom)
+    with NetcdfTrajectoryWriter(path, natom, box=box, title="synthetic") as writer:
+        for chunk in iter_coordinates(natom, nframes):
+            frames = len(chunk)
+            start = writer.num_frames
+            writer.write(
+                chunk,
+                times=(start + 1 + np.arange(frames)) * time_step,
+                lengths=np.full((frames, 3), length) if box else None,
+                angles=np.full((frames, 3), 90.0) if box else None,
+            )
+
+
+def write_pdb(handle, natom):
+    """Write a PDB of a box of water.
+
+    :param handle: file handle opened in text mode.
+    :param natom: number of atoms, rounded up to whole residues.
+    """
+    nres = -(-natom // 3)
+    coordinates = next(iter_coordinates(nres * 3, 1))[0]
+    for index, (x, y, z) in enumerate(coordinates):
+        name = WATER["names"][index % 3]
+        element = name[0]
+        resid = (index // 3 + 1) % 10000
+        handle.write(
+            f"ATOM  {(index + 1) % 100000:5d}  {name:<3} WAT W{resid:4d}    "
+            f"{x:8.3f}{y:8.3f}{z:8.3f}  1.00  0.00          {element:>2}\n"
+        )
+    handle.write("END\n")
+
+
+def write_mol2(handle, natom, name="MOL"):
+    """Write a Tripos mol2 of a box of water, as written by antechamber.
+
+    :param handle: file handle opened in text mode.
+    :param natom: number of atoms, rounded up to whole residues.
+    :param name: name of the molecule and its residues.
+    """
+    nres = -(-natom // 3)
+    natom = nres * 3
+    coordinates = next(iter_coordinates(natom, 1))[0]
+    handle.write(
+        f"@<TRIPOS>MOLECULE\n{name}\n{natom:5d} {nres * 2:5d} {nres:5d}     0     0\n"
+        "SMALL\nbcc\n\n\n@<TRIPOS>ATOM\n"
+    )
+    for index, (x, y, z) in enumerate(coordinates):
+        atom = index % 3
+        handle.write(
+            f"{index + 1:7d} {WATER['names'][atom]:<4} {x:14.4f}{y:10.4f}{z:10.4f} "
+            f"{['ow', 'hw', 'hw'][atom]:<5} {index // 3 + 1:5d} {name:<4} "
+            f"{WATER['charges'][atom]:11.6f}\n"
+        )
+    handle.write("@<TRIPOS>BOND\n")
+    for index in range(nres * 2):
+        oxygen = index // 2 * 3 + 1
+        handle.write(f"{index + 1:6d}{oxygen:6d}{oxygen + 1 + index % 2:6d} 1\n")
+    handle.write("@<TRIPOS>SUBSTRUCTURE\n")
+    for index in range(nres):
+        handle.write(
+            f"{index + 1:6d} {name:<4} {index * 3 + 1:8d} TEMP  0 ****  ****  0 ROOT\n"
+        )
+
+
+def write_rst7(handle, natom, time=0.0, velocities=True, box=True):
+    """Write an ASCII rst7 restart file of 6F12.7 lines.
+
+    :param handle: file handle opened in text mode.
+    :param natom: number of atoms.
+    :param time: time (ps) written in the header.
+    :param velocities: whether velocities follow the coordinates.
+    :param box: whether a line of box lengths and angles is written last.
+    """
+    handle.write(f"synthetic\n{natom:6d}{time:15.7E}\n")
+    coordinates = next(iter_coordinates(natom, 1))[0]
+    handle.write(format_section(coordinates.ravel(), "%12.7f", 6))
+    if velocities:
+        rng = np.random.default_rng(1)
+        handle.write(format_section(rng.normal(0, 0.1, natom * 3), "%12.7f", 6))
+    if box:
+        length = get_box_length(natom)
+        handle.write(format_section([length] * 3 + [90.0] * 3, "%12.7f", 6))
+
+
+def format_energy_record(nstep, time, temperature, seed=0):
+    """Format an energy record as printed by sander in mdout and mdinfo.
+
+    :returns: the lines of the record as a string.
+    """
+    rng = np.random.default_rng(seed)
+    lines = [
+        f" NSTEP = {nstep:8d}   TIME(PS) = {time:11.3f}  "
+        f"TEMP(K) = {temperature:8.2f}  PRESS = {rng.normal(0, 300):7.1f}"
+    ]
+    for terms in MDOUT_TERMS:
+        values = rng.normal(0, 10000, len(terms))
+        fields = [
+            f"{term:<{width}}= {value:14.4f}"
+            for term, width, value in zip(terms, MDOUT_WIDTHS, values)
+        ]
+        lines.append(" " + "  ".join(fields))
+    lines.append(" " * 52 + f"Density    = {rng.uniform(0.9, 1.1):14.4f}")
+    lines.append(SEPARATOR)
+    return "\n".join(lines) + "\n\n"
+
+
+def format_min_record(nstep, seed=0):
+    """Format a minimisation step as printed by sander in mdout and mdinfo.
+
+    :returns: the lines of the record as a string.
+    """
+    rng = np.random.default_rng(seed)
+    energy, rms, gmax = -abs(rng.normal(50000, 10000)), *rng.uniform(1, 100, 2)
+    lines = [
+        MIN_HEADER,
+        f"{nstep:7d}     {energy:11.4E}  {rms:13.4E}  {gmax:13.4E}     O"
+        f"{int(rng.integers(1, 10000)):11d}",
+        "",
+    ]
+    for terms in MIN_TERMS:
+        values = rng.normal(0, 10000, len(terms))
+        fields = [
+            f"{term:<{width}}= {value:14.4f}"
+            for term, width, value in zip(terms, MIN_WIDTHS, values)
+        ]
+        lines.append(" " + "  ".join(fields))
+    return "\n".join(lines) + "\n\n\n"
+
+
+def write_mdout(handle, nrecords, ntpr=500, dt=0.002, minimisation=False):
+    """Write an mdout of an MD run with a number of energy records.
+
+    :param handle: file handle opened in text mode.
+    :param nrecords: number of energy records printed every ntpr steps.
+    :param ntpr: steps between the energy records.
+    :param dt: time step (ps).
+    :param minimisation: whether to write the records of a minimisation
+        (imin=1), followed by the final step, instead of MD.
+    """
+    handle.write(
+        "          -------------------------------------------------------\n"
+        "          Amber 24 SANDER                              2024\n"
+        "          -------------------------------------------------------\n\n"
+        "--------------------------------------------------------------------------------\n"
+        "   4.  RESULTS\n"
+        "--------------------------------------------------------------------------------\n\n"
+    )
+    if minimisation:
+        for record in range(nrecords):
+            handle.write(format_min_record((record + 1) * ntpr, seed=record))
+        handle.write("                    FINAL RESULTS\n\n\n\n")
+        handle.write(format_min_record(nrecords * ntpr, seed=nrecords - 1))
+        handle.write(
+            "--------------------------------------------------------------------------------\n"
+            "   5.  TIMINGS\n"
+            "--------------------------------------------------------------------------------\n\n"
+            "|  Total CPU time:            1.00 seconds     0.00 hours\n"
+        )
+        return
+    for record in range(nrecords):
+        nstep = (record + 1) * ntpr
+        handle.write(format_energy_record(nstep, nstep * dt, 300.0, seed=record))
+    nstep = nrecords * ntpr
+    handle.write(f"\n      A V E R A G E S   O V E R {nrecords:6d} S T E P S\n\n\n")
+    handle.write(format_energy_record(nstep, nstep * dt, 300.0))
+    handle.write("\n      R M S  F L U C T U A T I O N S\n\n\n")
+    handle.write(format_energy_record(nstep, nstep * dt, 3.0))
+    handle.write(
+        "\n--------------------------------------------------------------------------------\n"
+        "   5.  TIMINGS\n"
+        "--------------------------------------------------------------------------------\n\n"
+        "|  Total CPU time:            1.00 seconds     0.00 hours\n"
+    )
+
+
+def write_mdinfo(handle, nstep, nstlim, dt=0.002, elapsed=1.0, minimisation=False):
+    """Write an mdinfo with the last energy record and the timings.
+
+    :param handle: file handle opened in text mode.
+    :param nstep: number of completed steps.
+    :param nstlim: total number of steps of the run.
+    :param dt: time step (ps).
+    :param elapsed: elapsed time (s) of the completed steps.
+    :param minimisation: whether to write the last step of a minimisation,
+        which has no timings, instead of MD.
+    """
+    if minimisation:
+        handle.write(format_min_record(nstep))
+        return
+    handle.write(format_energy_record(nstep, nstep * dt, 300.0))
+    per_step = 1000 * elapsed / max(nstep, 1)
+    ns_per_day = nstep * dt / 1000 / max(elapsed, 1e-9) * 86400
+    handle.write(
+        "\n| Current Timing Info\n"
+        "| -------------------\n"
+        f"| Total steps: {nstlim:9d} | Completed: {nstep:9d} "
+        f"({100 * nstep / max(nstlim, 1):4.1f}%) | Remaining: {nstlim - nstep:9d}\n"
+        "|\n"
+        "| Average timings for all steps:\n"
+        f"|     Elapsed(s) = {elapsed:10.2f} Per Step(ms) = {per_step:10.2f}\n"
+        f"|         ns/day = {ns_per_day:10.2f}   seconds/ns = "
+        f"{86400 / max(ns_per_day, 1e-9):10.2f}\n"
+        "|\n"
+    )
+
+
+def write_remlog(handle, temperatures, numexchg, seed=0):
+    """Write a temperature replica exchange log as written by multisander.
+
+    Exchanges are attempted between neighbouring temperatures, alternating
+    between the even and odd pairs of the ladder, and accepted at random.
+    A replica at the end of the ladder without a pair in an exchange is
+    logged as its own neighbour.
+
+    :param handle: file handle opened in text mode.
+    :param temperatures: temp0 of each replica at the start of the run.
+    :param numexchg: number of exchanges.
+    :param seed: seed of the random acceptance and energies.
+    """
+    rng = np.random.default_rng(seed)
+    ladder = sorted(set(temperatures))
+    position = [ladder.index(temperature) for temperature in temperatures]
+    attempts = np.zeros(len(ladder))
+    accepted = np.zeros(len(ladder))
+    handle.write(
+        "# Replica Exchange log file\n"
+        f"# numexchg is {numexchg:10d}\n"
+        "# LOG FORMAT:\n"
+        "# Rep#, Neibr#, Temp0, PotE(x_1), PotE(x_2), left_fe, right_fe, "
+        "Success, Success rate (i,i+1)\n"
+    )
+    for exchange in range(numexchg):
+        # replica at each position of the ladder
+        replica_at = {pos: replica for replica, pos in enumerate(position)}
+        success = {}
+        for lower in range(exchange % 2, len(ladder) - 1, 2):
+            attempts[lower] += 1
+            success[lower] = success[lower + 1] = rng.random() < 0.5
+            accepted[lower] += success[lower]
+        handle.write(f"# exchange {exchange + 1:8d}\n")
+        for replica, pos in enumerate(position):
+            if pos not in success:
+                neighbor = pos
+            elif pos - exchange % 2 in range(0, len(ladder), 2):
+                neighbor = pos + 1
+            else:
+                neighbor = pos - 1
+            lower = min(pos, neighbor)
+            rate = accepted[lower] / attempts[lower] if attempts[lower] else 0.0
+            energies = rng.normal(-3400, 10, 2)
+            handle.write(
+                f"{replica + 1:6d}{replica_at[neighbor] + 1:6d}{ladder[pos]:10.2f}"
+                f"{energies[0]:10.2f}{energies[1]:10.2f}{0.0:10.2f}{0.0:10.2f}"
+                f"    {'T' if success.get(pos) else 'F'}{rate:12.2f}\n"
+            )
+        position = [
+            (pos + 1 if pos - exchange % 2 in range(0, len(ladder), 2) else pos - 1)
+            if success.get(pos)
+            else pos
+            for pos in position
+        ]
+
+
+def write_tleap_script(handle, nlines):
+    """Write a tleap script that loads and saves files on most of its lines.
+
+    :param handle: file handle opened in text mode.
+    :param nlines: approximate number of lines.
+    """
+    handle.write("source leaprc.protein.ff14SB\nsource leaprc.water.tip3p\n")
+    for index in range(max(nlines // 4, 1)):
+        handle.write(f"mol{index} = loadpdb mol{index}.pdb  # input structure\n")
+        handle.write(f"solvatebox mol{index} TIP3PBOX 10.0\n")
+        handle.write(f"saveAmberParm mol{index} mol{index}.prmtop mol{index}.inpcrd\n")
+        handle.write(f"savepdb mol{index} mol{index}_solv.pdb\n")
+    handle.write("quit\n")
+
+
+def write_parmed_script(handle, nlines):
+    """Write a parmed script that reads and writes files on most of its lines.
+
+    :param handle: file handle opened in text mode.
+    :param nlines: approximate number of lines.
+    """
+    for index in range(max(nlines // 4, 1)):
+        handle.write(f"parm mol{index}.prmtop\n")
+        handle.write(f"loadRestart mol{index}.rst7\n")
+        handle.write("HMassRepartition  # heavy hydrogens\n")
+        handle.write(f"outparm mol{index}_hmr.prmtop mol{index}_hmr.rst7\n")
@@ -0,0 +1,300 @@
+"""Methods to find the files read and written by a tleap script.
+
+The script is split into tokens as tleap reads it: ``#`` starts a comment
+outside of quotes, double quotes group a filename with spaces, braces and
+``=`` are tokens of their own and commands are case insensitive, so that
+``mol = loadPdb "my protein.pdb"`` loads ``my protein.pdb``. Scripts included
+with ``source`` are followed, looked up as tleap does in the working
+directory, then in the ``-I`` directories and those added with ``addPath``,
+and last in the leap directories of ``$AMBERHOME``.
+
+The files found are classified as:
+
+- ``input_files``: files read from the working directory, or not found
+  anywhere, which need to be uploaded with the calculation. Sourced scripts
+  found in the working directory are input files too.
+- ``output_files``: files written by the ``save*`` and ``logFile`` commands.
+- ``sources``: sourced scripts that were followed, i.e. found in the working
+  directory or in an ``-I`` directory.
+- ``include_files``: files found in an ``-I`` or ``addPath`` directory, which
+  are uploaded with their directory.
+- ``system_files``: files of the Amber installation and sourced scripts not
+  found locally, e.g. ``leaprc.protein.ff14SB``, which are not uploaded.
+
+Resolving a script is memoized on the content hash of the script and of each
+sourced script, so build scripts sourcing the same leaprcs and loading
+thousands of ligand libraries are only scanned once per process. Since the
+classification of the files depends on where they are found, every path
+looked up is recorded too, and the script is resolved again if one of them
+has been added or removed.
+"""
+
+import hashlib
+import os
+import re
+
+# Commands reading a file and the index of its argument.
+INPUT_COMMANDS = {
+    "source": 0,
+    "loadamberparams": 0,
+    "loadamberprep": 0,
+    "loadoff": 0,
+    "loadmol2": 0,
+    "loadmol3": 0,
+    "loadpdb": 0,
+    "loadpdbusingseq": 0,
+}
+# Commands writing files and the indices of their arguments.
+OUTPUT_COMMANDS = {
+    "saveamberparm": (1, 2),
+    "saveamberparmpol": (1, 2),
+    "saveamberparmpert": (1, 2),
+    "saveamberparmnetcdf": (1, 2),
+    "saveamberprep": (1,),
+    "savemol2": (1,),
+    "savemol3": (1,),
+    "savepdb": (1,),
+    "saveoff": (1,),
+    "logfile": (0,),
+}
+# Directories of $AMBERHOME searched by tleap after the -I directories.
+SYSTEM_SUBDIRS = ["prep", "lib", "parm", "cmd"]
+SYSTEM_SUBDIRS += [os.path.join(subdir, "oldff") for subdir in SYSTEM_SUBDIRS]
+
+# Tokens of a line without quotes.
+TOKEN_REGEX = re.compile(r"[{}=]|[^\s{}=]+")
+
+# Resolved scripts keyed by the hash of their content and the search path,
+# each with the hashes of the scripts they source and the paths looked up.
+_RESOLVED = {}
+# Content hashes of sourced scripts keyed by path, size and modification time.
+_FILE_HASHES = {}
+
+
+def tokenize_line(line):
+    """Split a line of a tleap script into tokens.
+
+    :param line: line of the script.
+    :returns: list of the tokens, without the comment and quotes.
+    """
+    if '"' not in line:
+        return TOKEN_REGEX.findall(line.partition("#")[0])
+    tokens = []
+    token = []
+    quoted = False
+    for char in line:
+        if quoted:
+            if char == '"':
+                quoted = False
+                tokens.append("".join(token))
+                token = []
+            else:
+                token.append(char)
+        elif char == "#":
+            break
+        elif char == '"':
+            quoted = True
+        elif char.isspace() or char in "{}=":
+            if token:
+                tokens.append("".join(token))
+                token = []
+            if not char.isspace():
+                tokens.append(char)
+        else:
+            token.append(char)
+    if token:
+        tokens.append("".join(token))
+    return tokens
+
+
+def scan_lines(lines):
+    """Find the files referenced by the commands of a tleap script.
+
+    :param lines: iterable of the lines of the script.
+    :returns: generator of (kind, path) tuples in the order of the script,
+        where kind is "source", "input", "output" or "addpath".
+    """
+    for line in lines:
+        tokens = tokenize_line(line)
+        # commands whose result is assigned to a variable, e.g. mol = loadpdb
+        if len(tokens) > 2 and tokens[1] == "=":
+            tokens = tokens[2:]
+        if not tokens:
+            continue
+        command = tokens[0].lower()
+        args = tokens[1:]
+        if command == "addpath" and args:
+            yield "addpath", args[0]
+        elif command in INPUT_COMMANDS or command.startswith("load"):
+            index = INPUT_COMMANDS.get(command, 0)
+            if len(args) > index:
+                kind = "source" if command == "source" else "input"
+                yield kind, args[index]
+        elif command in OUTPUT_COMMANDS or command.startswith("save"):
+            for index in OUTPUT_COMMANDS.get(command, (1,)):
+                if len(args) > index:
+                    yield "output", args[index]
+
+
+def parse_lines(lines):
+    """Find the files loaded and saved by a tleap script, without looking
+    them up or following sourced scripts.
+
+    :param lines: iterable of the lines of the script.
+    :returns: dict of the "input_files" and "output_files".
+    """
+    parsed_info = {"input_files": [], "output_files": []}
+    for kind, path in scan_lines(lines):
+        if kind == "input":
+            parsed_info["input_files"].append(path)
+        elif kind == "output":
+            parsed_info["output_files"].append(path)
+    return parsed_info
+
+
+def get_system_dirs():
+    """Get the directories of the Amber installation searched by tleap."""
+    amberhome = os.environ.get("AMBERHOME")
+    if not amberhome:
+        return []
+    leap = os.path.join(amberhome, "dat", "leap")
+    return [os.path.join(leap, subdir) for subdir in SYSTEM_SUBDIRS]
+
+
+def file_hash(path):
+    """Get the sha256 hash of the content of a file, hashing it again only
+    if its size or modification time changed."""
+    stat = os.stat(path)
+    key = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _FILE_HASHES:
+        with open(path, "rb") as handle:
+            _FILE_HASHES[key] = hashlib.sha256(handle.read()).hexdigest()
+    return _FILE_HASHES[key]
+
+
+def find_file(path, directory, include_dirs, probed=None):
+    """Find a file referenced in a tleap script on the search path.
+
+    :param path: path as written in the script.
+    :param directory: working directory of tleap.
+    :param include_dirs: list of the -I and addPath directories.
+    :param probed: dict in which the paths looked up are set to True if the
+        file was found there and None otherwise.
+    :returns: tuple of where the file was found, "local", "include",
+        "system" or None, and its path.
+    """
+    probed = {} if probed is None else probed
+    if os.path.isabs(path):
+        candidates = [("local", path)]
+    else:
+        candidates = [("local", os.path.join(directory, path))]
+        for location, dirs in [
+            ("include", include_dirs),
+            ("system", get_system_dirs()),
+        ]:
+            candidates += [
+                (location, os.path.join(directory, search_dir, path))
+                for search_dir in dirs
+            ]
+    for location, candidate in candidates:
+        if os.path.isfile(candidate):
+            probed[candidate] = True
+            return location, candidate
+        probed[candidate] = None
+    return None, path
+
+
+def _resolve(lines, directory, include_dirs, resolved, visited, probed):
+    """Add the files referenced by a script and by the scripts it sources
+    to the resolved dict of ordered dicts, collecting the hashes of the
+    sourced scripts followed in visited and the paths looked up in probed."""
+    for kind, path in scan_lines(lines):
+        if kind == "addpath":
+            include_dirs.append(path)
+        elif kind == "output":
+            resolved["output_files"][path] = None
+        elif kind == "input":
+            location, found = find_file(path, directory, include_dirs, probed)
+            if location == "include":
+                resolved["include_files"][path] = None
+            elif location == "system":
+                resolved["system_files"][path] = None
+            else:
+                # files not found are kept so that the submission reports them
+                resolved["input_files"][path] = None
+        else:
+            location, found = find_file(path, directory, include_dirs, probed)
+            if location in ("local", "include"):
+                if location == "local":
+                    resolved["input_files"][path] = None
+                resolved["sources"][path] = None
+                realpath = os.path.realpath(found)
+                if realpath not in visited:
+                    visited[realpath] = file_hash(found)
+                    with open(found, encoding="utf-8") as handle:
+                        _resolve(
+                            handle, directory, include_dirs, resolved, visited, probed
+                        )
+            else:
+                # leaprcs of the Amber installation are not uploaded, the
+                # script is resolved again if one is added locally
+                resolved["system_files"][path] = None
+
+
+def _unchanged(path, digest):
+    """Check if a sourced script has the same content, or if a path looked
+    up still exists (digest True) or is still missing (digest None)."""
+    if digest is None:
+        return not os.path.isfile(path)
+    if digest is True:
+        return os.path.isfile(path)
+    return os.path.isfile(path) and file_hash(path) == digest
+
+
+def resolve_script(content, directory=None, include_dirs=()):
+    """Find all the files read and written by a tleap script and the scripts
+    it sources.
+
+    :param content: text of the script.
+    :param directory: working directory of tleap, from which relative paths
+        are found, defaults to the current directory.
+    :param include_dirs: list of the directories given with -I.
+    :returns: dict of the "input_files", "output_files", "sources",
+        "include_files" and "system_files", see the module docstring.
+    """
+    directory = os.path.abspath(directory or os.getcwd())
+    key = (
+        hashlib.sha256(content.encode("utf-8")).hexdigest(),
+        directory,
+        tuple(include_dirs),
+        os.environ.get("AMBERHOME"),
+    )
+    if key in _RESOLVED:
+        hashes, resolved = _RESOLVED[key]
+        if all(_unchanged(path, digest) for path, digest in hashes.items()):
+            return {name: list(files) for name, files in resolved.items()}
+
+    resolved = {
+        name: {}
+        for name in [
+            "input_files",
+            "output_files",
+            "sources",
+            "include_files",
+            "system_files",
+        ]
+    }
+    visited = {}
+    probed = {}
+    _resolve(
+        content.splitlines(), directory, list(include_dirs), resolved, visited, probed
+    )
+    # the hashes of the sourced scripts take precedence over their lookup
+    _RESOLVED[key] = ({**probed, **visited}, resolved)
+    return {name: list(files) for name, files in resolved.items()}
+
+
+def clear_cache():
+    """Forget the resolved scripts and the hashes of the sourced scripts."""
+    _RESOLVED.clear()
+    _FILE_HASHES.clear()
@@ -0,0 +1,5 @@
+"""
+Workflows provided by aiida_amber.
+
+Register workflows via the "aiida.workflows" entry point in pyproject.toml.
+"""
@@ -0,0 +1,234 @@
+"""
+WorkChain launching a calculation once the processes it depends on have
+finished, used by the ``--wait-for`` option of the command line utilities.
+
+Rather than blocking the shell until the upstream processes terminate, the
+command line utility submits this workchain and returns. The daemon then
+waits on the upstream processes, takes the input files they produce from
+their outputs and submits the calculation.
+"""
+from collections.abc import Mapping
+import functools
+import os
+
+from aiida.common.links import LinkType
+from aiida.engine import ToContext, WorkChain, calcfunction, run_get_node, submit
+from aiida.orm import Data, Dict, List, SinglefileData, Str, WorkflowNode, load_node
+from aiida.orm.utils.node import load_node_class
+from aiida.plugins import CalculationFactory
+
+from aiida_amber.utils import node_utils
+
+
+@calcfunction
+def convert_file(file, node_type):
+    """Return a copy of a file node of the given node type, e.g. a
+    SinglefileData output taken as the PrmtopData input of a calculation."""
+    node_class = load_node_class(node_type.value)
+    with file.open(mode="rb") as handle:
+        return node_class(handle, filename=file.filename)
+
+
+def to_dict(inputs):
+    """Convert the nested namespaces of process inputs to dicts."""
+    return {
+        name: to_dict(value) if isinstance(value, Mapping) else value
+        for name, value in inputs.items()
+    }
+
+
+def set_nested(inputs, path, value):
+    """Set a value of a nested inputs dict from its dotted port path."""
+    *namespaces, name = path.split(".")
+    for namespace in namespaces:
+        inputs = inputs.setdefault(namespace, {})
+    inputs[name] = value
+
+
+def pop_pending_files(inputs, prefix=""):
+    """Remove the PendingFile placeholders from a nested inputs dict.
+
+    :returns: dict of the dotted port paths and the path and node type of the
+        file of each placeholder.
+    """
+    pending = {}
+    for name, value in list(inputs.items()):
+        if isinstance(value, node_utils.PendingFile):
+            del inputs[name]
+            pending[f"{prefix}{name}"] = {
+                "filename": value.filename,
+                "filepath": value.filepath,
+                "node_type": value.node_class._plugin_type_string,
+            }
+        elif isinstance(value, dict):
+            pending.update(pop_pending_files(value, f"{prefix}{name}."))
+    return pending
+
+
+def defers_missing_files(launch):
+    """Decorate the launch function of a command line utility, so the input
+    files that do not exist yet are deferred when it waits for upstream
+    processes, which are expected to write them."""
+
+    @functools.wraps(launch)
+    def wrapper(params):
+        if params.get("wait_for"):
+            with node_utils.defer_missing_files():
+                return launch(params)
+        return launch(params)
+
+    return wrapper
+
+
+def launch_after(wait_for, entry_point, inputs):
+    """Launch a calculation once the given processes finish successfully.
+
+    :param wait_for: pks of the upstream processes.
+    :param entry_point: entry point of the calculation, e.g. amber.sander.
+    :param inputs: inputs of the calculation, where the files not written yet
+        by the upstream processes are PendingFile placeholders.
+    :returns: the workchain node, or the outputs when run in a test.
+    """
+    inputs = dict(inputs)
+    metadata = dict(inputs.pop("metadata", {}))
+    # the daemon does not run from the directory the outputs are exported to
+    metadata["options"] = dict(metadata.get("options", {}))
+    metadata["options"].setdefault("output_dir", os.getcwd())
+    pending = pop_pending_files(inputs)
+
+    workchain_inputs = {
+        "wait_for": List(list(wait_for)),
+        "calculation": Str(entry_point),
+        "calculation_inputs": inputs,
+        "calculation_metadata": metadata,
+        "pending_files": Dict(pending),
+        "metadata": {
+            "description": f"{metadata.get('description', '')} "
+            f"(after processes {list(wait_for)})".strip(),
+        },
+    }
+    if "PYTEST_CURRENT_TEST" in os.environ:
+        return run_get_node(DependentWorkChain, **workchain_inputs)[0]
+    return submit(DependentWorkChain, **workchain_inputs)
+
+
+class DependentWorkChain(WorkChain):
+    """
+    WorkChain waiting for processes to finish successfully and then running a
+    calculation.
+
+    Input files that did not exist when the workchain was launched are taken
+    from the outputs of the upstream processes, or the calculations they
+    called, with the same filename. As a fallback the file is read from its
+    local path, if the daemon can access it.
+    """
+
+    @classmethod
+    def define(cls, spec):
+        """Define inputs, outputs and outline of the workchain."""
+        # yapf: disable
+        super().define(spec)
+
+        spec.input("wait_for", valid_type=List,
+                help="PKs of the processes to wait for.")
+        spec.input("calculation", valid_type=Str,
+                help="Entry point of the calculation to run, e.g. amber.sander.")
+        spec.input_namespace("calculation_inputs", valid_type=Data, dynamic=True,
+                help="Inputs of the calculation, other than its metadata.")
+        spec.input("calculation_metadata", valid_type=dict, non_db=True,
+                required=False, help="Metadata of the calculation.")
+        spec.input("pending_files", valid_type=Dict, default=lambda: Dict(),
+                help="Input files written by the upstream processes, with their "
+                "filename, local path and node type keyed by dotted port path.")
+
+        spec.outline(
+            cls.wait,
+            cls.check_upstream,
+            cls.resolve_pending_files,
+            cls.run_calculation,
+            cls.results,
+        )
+
+        spec.outputs.dynamic = True
+
+        spec.exit_code(400, "ERROR_UPSTREAM_FAILED",
+            message="The upstream processes {pks} did not finish successfully.")
+        spec.exit_code(401, "ERROR_MISSING_INPUT_FILE",
+            message="The input file {filename} was not output by the upstream "
+            "processes and does not exist locally.")
+        spec.exit_code(402, "ERROR_CALCULATION_FAILED",
+            message="The calculation {label}<{pk}> failed.")
+
+    def wait(self):
+        """Wait for the upstream processes to terminate."""
+        upstream = {
+            f"upstream_{pk}": load_node(pk) for pk in self.inputs.wait_for.get_list()
+        }
+        return ToContext(**upstream)
+
+    def check_upstream(self):
+        """Check the upstream processes finished successfully."""
+        failed = [
+            pk for pk in self.inputs.wait_for.get_list()
+            if not self.ctx[f"upstream_{pk}"].is_finished_ok
+        ]  # fmt: skip
+        if failed:
+            return self.exit_codes.ERROR_UPSTREAM_FAILED.format(pks=failed)
+        return None
+
+    def find_output_file(self, filename):
+        """Find the newest file node with the filename output by the upstream
+        processes or the calculations they called."""
+        processes = []
+        for pk in self.inputs.wait_for.get_list():
+            node = self.ctx[f"upstream_{pk}"]
+            processes.append(node)
+            if isinstance(node, WorkflowNode):
+                processes.extend(node.called_descendants)
+        found = [
+            output
+            for process in processes
+            for output in process.base.links.get_outgoing(
+                link_type=LinkType.CREATE
+            ).all_nodes()
+            if isinstance(output, SinglefileData) and output.filename == filename
+        ]
+        return max(found, key=lambda output: output.ctime, default=None)
+
+    def resolve_pending_files(self):
+        """Set the input files that did not exist at launch."""
+        self.ctx.inputs = to_dict(self.inputs.calculation_inputs)
+        for path, pending in self.inputs.pending_files.get_dict().items():
+            node_class = load_node_class(pending["node_type"])
+            node = self.find_output_file(pending["filename"])
+            if node is None and os.path.isfile(pending["filepath"]):
+                node = node_utils.get_file_node(pending["filepath"], node_class)
+            if node is None:
+                return self.exit_codes.ERROR_MISSING_INPUT_FILE.format(
+                    filename=pending["filename"]
+                )
+            if not isinstance(node, node_class):
+                node = convert_file(node, Str(pending["node_type"]))
+            set_nested(self.ctx.inputs, path, node)
+        return None
+
+    def run_calculation(self):
+        """Submit the calculation."""
+        process_class = CalculationFactory(self.inputs.calculation.value)
+        metadata = dict(self.inputs.get("calculation_metadata", {}))
+        metadata["call_link_label"] = "calculation"
+        calculation = self.submit(process_class, **self.ctx.inputs, metadata=metadata)
+        return ToContext(calculation=calculation)
+
+    def results(self):
+        """Attach the outputs of the calculation."""
+        calculation = self.ctx.calculation
+        if not calculation.is_finished_ok:
+            return self.exit_codes.ERROR_CALCULATION_FAILED.format(
+                label=calculation.process_label, pk=calculation.pk
+            )
+        for link in calculation.base.links.get_outgoing(
+            link_type=LinkType.CREATE
+        ).all():
+            self.out(link.link_label.replace("__", "."), link.node)
+        return None
@@ -0,0 +1,189 @@
+"""
+WorkChain running a protocol of sander stages, e.g. minimisation, heating,
+NVT and NPT equilibration and production, on one or more systems.
+"""
+from aiida.common import AttributeDict
+from aiida.engine import ToContext, WorkChain, if_, while_
+from aiida.orm import Bool, Dict, List, SinglefileData
+from aiida.plugins import CalculationFactory, DataFactory
+
+SanderCalculation = CalculationFactory("amber.sander")
+SanderParameters = DataFactory("amber.sander")
+
+DEFAULT_STAGES = ["min", "heat", "nvt", "npt", "prod"]
+
+
+def validate_inputs(inputs, _):
+    """Validate that every stage has an mdin and every system has coordinates."""
+    stages = inputs["stages"].get_list()
+    if not stages:
+        return "`stages` should contain at least one stage."
+    missing = [stage for stage in stages if stage not in inputs["mdin"]]
+    if missing:
+        return f"no `mdin` given for stages {missing}"
+    unknown = [stage for stage in inputs.get("parameters", {}) if stage not in stages]
+    if unknown:
+        return f"`parameters` given for stages {unknown} that are not in `stages`"
+    if set(inputs["prmtop"]) != set(inputs["inpcrd"]):
+        return "`prmtop` and `inpcrd` should be given for the same systems"
+    if not inputs["prmtop"]:
+        return "at least one system should be given in `prmtop` and `inpcrd`"
+    retention = inputs["sander"]["metadata"]["options"].get("output_retention", {})
+    if retention.get("r", "retrieve") != "retrieve":
+        return "the restart file `r` must be retrieved to start the next stage"
+    return None
+
+
+class EquilibrationWorkChain(WorkChain):
+    """
+    WorkChain running a list of sander stages one after the other.
+
+    The ``restrt`` output of each stage is used as the ``inpcrd`` of the next
+    one, while the same ``prmtop`` node is used throughout, so no files are
+    passed through the local disk. When several systems are given, each one
+    runs its stages in its own child workchain, so the systems progress
+    concurrently and independently of each other.
+    """
+
+    @classmethod
+    def define(cls, spec):
+        """Define inputs, outputs and outline of the workchain."""
+        # yapf: disable
+        super().define(spec)
+
+        spec.expose_inputs(SanderCalculation, namespace="sander",
+                exclude=("parameters", "mdin", "prmtop", "inpcrd"),
+                namespace_options={"help": "Inputs passed on to every sander "
+                "calculation, e.g. the code and metadata options."})
+        spec.input("stages", valid_type=List, default=lambda: List(DEFAULT_STAGES),
+                help="Names of the stages in the order they are run.")
+        spec.input_namespace("mdin", valid_type=SinglefileData, dynamic=True,
+                help="Input control data for each stage, keyed by stage name.")
+        spec.input_namespace("parameters", valid_type=SanderParameters,
+                dynamic=True, required=False,
+                help="Command line parameters for each stage, keyed by stage "
+                "name. The output files default to <stage>.out, <stage>.mdinfo "
+                "and <stage>.rst7.")
+        spec.input("link_parent_files", valid_type=Bool, default=lambda: Bool(False),
+                help="Take the prmtop and restart file of each stage after the first "
+                "from the remote folder of the previous stage instead of uploading "
+                "them, the stages must then run on the same computer.")
+        spec.input_namespace("prmtop", valid_type=SinglefileData, dynamic=True,
+                help="Molecular topology of each system, keyed by system name.")
+        spec.input_namespace("inpcrd", valid_type=SinglefileData, dynamic=True,
+                help="Initial coordinates of each system, keyed by system name.")
+        spec.inputs.validator = validate_inputs
+
+        spec.outline(
+            cls.setup,
+            if_(cls.has_multiple_systems)(
+                cls.run_systems,
+                cls.inspect_systems,
+            ).else_(
+                while_(cls.has_next_stage)(
+                    cls.run_stage,
+                    cls.inspect_stage,
+                ),
+            ),
+        )
+
+        spec.output_namespace("restrt", valid_type=SinglefileData, dynamic=True,
+                help="Final restart file of each system, keyed by system name.")
+
+        spec.exit_code(400, "ERROR_STAGE_FAILED",
+            message="The sander calculation of stage {stage} failed.")
+        spec.exit_code(401, "ERROR_SYSTEM_FAILED",
+            message="The stages of systems {systems} did not all complete.")
+
+    def setup(self):
+        """Set the starting coordinates and the index of the first stage."""
+        self.ctx.systems = list(self.inputs.prmtop)
+        self.ctx.stages = self.inputs.stages.get_list()
+        self.ctx.stage_index = 0
+        self.ctx.inpcrd = self.inputs.inpcrd[self.ctx.systems[0]]
+
+    def has_multiple_systems(self):
+        """Return whether more than one system should be run."""
+        return len(self.ctx.systems) > 1
+
+    def run_systems(self):
+        """Run the stages of each system in a separate child workchain."""
+        inputs = AttributeDict(self.exposed_inputs(SanderCalculation, "sander"))
+        children = {}
+        for system in self.ctx.systems:
+            children[f"children.{system}"] = self.submit(
+                EquilibrationWorkChain,
+                sander=inputs,
+                stages=self.inputs.stages,
+                link_parent_files=self.inputs.link_parent_files,
+                mdin=self.inputs.mdin,
+                parameters=self.inputs.get("parameters", {}),
+                prmtop={system: self.inputs.prmtop[system]},
+                inpcrd={system: self.inputs.inpcrd[system]},
+                metadata={"call_link_label": system},
+            )
+        return ToContext(**children)
+
+    def inspect_systems(self):
+        """Collect the final restart file of each system."""
+        failed = []
+        for system, child in self.ctx.children.items():
+            if not child.is_finished_ok:
+                failed.append(system)
+                continue
+            self.out(f"restrt.{system}", child.outputs.restrt[system])
+        if failed:
+            return self.exit_codes.ERROR_SYSTEM_FAILED.format(systems=failed)
+        return None
+
+    def has_next_stage(self):
+        """Return whether there are stages left to run."""
+        return self.ctx.stage_index < len(self.ctx.stages)
+
+    def run_stage(self):
+        """Run the next stage from the restart file of the previous one."""
+        stage = self.ctx.stages[self.ctx.stage_index]
+        system = self.ctx.systems[0]
+
+        parameters = {}
+        if stage in self.inputs.get("parameters", {}):
+            parameters = self.inputs.parameters[stage].get_dict()
+        parameters.setdefault("o", f"{stage}.out")
+        parameters.setdefault("inf", f"{stage}.mdinfo")
+        parameters.setdefault("r", f"{stage}.rst7")
+
+        inputs = AttributeDict(self.exposed_inputs(SanderCalculation, "sander"))
+        inputs.parameters = SanderParameters(parameters)
+        inputs.mdin = self.inputs.mdin[stage]
+        if self.inputs.link_parent_files and self.ctx.stage_index > 0:
+            previous = self.ctx.calculation
+            inputs.parent_folder = previous.outputs.remote_folder
+            inputs.parent_files = Dict(
+                {
+                    "prmtop": self.inputs.prmtop[system].filename,
+                    "inpcrd": previous.inputs.parameters["r"],
+                }
+            )
+        else:
+            inputs.prmtop = self.inputs.prmtop[system]
+            inputs.inpcrd = self.ctx.inpcrd
+        inputs.metadata = AttributeDict(inputs.get("metadata", {}))
+        inputs.metadata.call_link_label = stage
+
+        return ToContext(calculation=self.submit(SanderCalculation, **inputs))
+
+    def inspect_stage(self):
+        """Check the stage finished and pass on its restart file."""
+        stage = self.ctx.stages[self.ctx.stage_index]
+        calculation = self.ctx.calculation
+        if not calculation.is_finished_ok or "restrt" not in calculation.outputs:
+            self.report(
+                f"{calculation.process_label}<{calculation.pk}> of stage {stage} failed"
+            )
+            return self.exit_codes.ERROR_STAGE_FAILED.format(stage=stage)
+
+        self.ctx.inpcrd = calculation.outputs.restrt
+        self.ctx.stage_index += 1
+        if not self.has_next_stage():
+            self.out(f"restrt.{self.ctx.systems[0]}", self.ctx.inpcrd)
+        return None
@@ -0,0 +1,199 @@
+"""
+WorkChain running temperature replica exchange MD (T-REMD) with multisander,
+optionally re-spacing the temperature ladder between rounds from the
+measured exchange acceptance.
+"""
+from aiida.common import AttributeDict
+from aiida.engine import ToContext, WorkChain, calcfunction, while_
+from aiida.orm import ArrayData, Bool, Dict, Float, Int, List, SinglefileData
+from aiida.plugins import CalculationFactory
+
+from aiida_amber.utils import remlog
+
+MultiSanderCalculation = CalculationFactory("amber.multisander")
+
+# &cntrl values to continue a replica from its restart file in later rounds.
+RESTART_CNTRL = {"irest": 1, "ntx": 5}
+
+
+@calcfunction
+def build_ladder(t_min: Float, t_max: Float, num_replicas: Int) -> List:
+    """Build a geometric temperature ladder."""
+    ladder = remlog.geometric_ladder(t_min.value, t_max.value, num_replicas.value)
+    return List([round(float(temperature), 2) for temperature in ladder])
+
+
+@calcfunction
+def respace_ladder(temperatures: List, exchange: ArrayData) -> List:
+    """Re-space a temperature ladder from the acceptance of a round."""
+    ladder = remlog.respace_ladder(
+        temperatures.get_list(), exchange.get_array("acceptance")
+    )
+    return List([round(float(temperature), 2) for temperature in ladder])
+
+
+def validate_inputs(inputs, _):
+    """Validate that either a ladder or its range and size are given."""
+    range_inputs = [
+        item for item in ("t_min", "t_max", "num_replicas") if item in inputs
+    ]
+    if "temperatures" in inputs:
+        if range_inputs:
+            return f"`temperatures` cannot be given together with {range_inputs}"
+        temperatures = inputs["temperatures"].get_list()
+        if len(temperatures) < 2:
+            return "`temperatures` should contain at least two temperatures"
+        if sorted(temperatures) != temperatures or len(set(temperatures)) != len(
+            temperatures
+        ):
+            return "`temperatures` should be strictly increasing"
+    elif len(range_inputs) != 3:
+        return "either `temperatures` or `t_min`, `t_max` and `num_replicas` are needed"
+    elif inputs["num_replicas"].value < 2:
+        return "`num_replicas` should be at least 2"
+    elif inputs["t_min"].value >= inputs["t_max"].value:
+        return "`t_min` should be lower than `t_max`"
+    if inputs["num_rounds"].value < 1:
+        return "`num_rounds` should be at least 1"
+    parameters = inputs["multisander"]["parameters"].get_dict()
+    if inputs["num_rounds"].value > 1 and "r" not in parameters:
+        return "the restart file `r` should be in the parameters to run more rounds"
+    return None
+
+
+class RemdWorkChain(WorkChain):
+    """
+    WorkChain running rounds of temperature replica exchange MD.
+
+    Each round is one multisander calculation with ``-rem 1``, in which every
+    replica runs at its temperature of the ladder (temp0) and exchanges are
+    attempted numexchg times, as set in mdin. Later rounds continue every
+    replica from its restart file at the temperature it ended the previous
+    round at, after the ladder has optionally been re-spaced towards uniform
+    acceptance between neighbouring temperatures.
+    """
+
+    @classmethod
+    def define(cls, spec):
+        """Define inputs, outputs and outline of the workchain."""
+        # yapf: disable
+        super().define(spec)
+
+        spec.expose_inputs(MultiSanderCalculation, namespace="multisander",
+                exclude=("inpcrd", "cntrl", "rem"),
+                namespace_options={"help": "Inputs passed on to every multisander "
+                "calculation, e.g. the code, mdin, prmtop and metadata options."})
+        spec.input("inpcrd", valid_type=SinglefileData,
+                help="Initial coordinates shared by all replicas.")
+        spec.input("temperatures", valid_type=List, required=False,
+                help="Temperatures (K) of the replicas in increasing order.")
+        spec.input("t_min", valid_type=Float, required=False,
+                help="Lowest temperature (K) of a geometric ladder.")
+        spec.input("t_max", valid_type=Float, required=False,
+                help="Highest temperature (K) of a geometric ladder.")
+        spec.input("num_replicas", valid_type=Int, required=False,
+                help="Number of temperatures of a geometric ladder.")
+        spec.input("num_rounds", valid_type=Int, default=lambda: Int(1),
+                help="Number of multisander calculations run one after the other.")
+        spec.input("respace", valid_type=Bool, default=lambda: Bool(True),
+                help="Re-space the ladder between rounds so the acceptance of "
+                "neighbouring temperatures becomes uniform. The lowest and highest "
+                "temperatures are kept.")
+        spec.inputs.validator = validate_inputs
+
+        spec.outline(
+            cls.setup,
+            while_(cls.has_next_round)(
+                cls.run_round,
+                cls.inspect_round,
+            ),
+            cls.results,
+        )
+
+        spec.output("temperatures", valid_type=List,
+                help="Temperature ladder used in the last round.")
+        spec.output_namespace("exchange", valid_type=ArrayData, dynamic=True,
+                help="Exchange statistics of each round, keyed by round name.")
+        spec.output_namespace("restrt", valid_type=SinglefileData, dynamic=True,
+                help="Final restart file of each replica, keyed by replica name.")
+
+        spec.exit_code(400, "ERROR_ROUND_FAILED",
+            message="The multisander calculation of round {round} failed.")
+
+    def setup(self):
+        """Build the ladder and assign one temperature to each replica."""
+        if "temperatures" in self.inputs:
+            self.ctx.temperatures = self.inputs.temperatures
+        else:
+            self.ctx.temperatures = build_ladder(
+                self.inputs.t_min, self.inputs.t_max, self.inputs.num_replicas
+            )
+        num_replicas = len(self.ctx.temperatures.get_list())
+        self.ctx.replicas = [f"replica_{index:03d}" for index in range(num_replicas)]
+        # index in the ladder of the temperature of each replica
+        self.ctx.temperature_index = list(range(num_replicas))
+        self.ctx.inpcrd = {replica: self.inputs.inpcrd for replica in self.ctx.replicas}
+        self.ctx.round = 0
+
+    def has_next_round(self):
+        """Return whether there are rounds left to run."""
+        return self.ctx.round < self.inputs.num_rounds.value
+
+    def run_round(self):
+        """Run a multisander calculation with every replica at its temperature."""
+        temperatures = self.ctx.temperatures.get_list()
+        cntrl = {}
+        for replica, index in zip(self.ctx.replicas, self.ctx.temperature_index):
+            cntrl[replica] = {"temp0": temperatures[index]}
+            if self.ctx.round > 0:
+                cntrl[replica].update(RESTART_CNTRL)
+
+        inputs = AttributeDict(
+            self.exposed_inputs(MultiSanderCalculation, "multisander")
+        )
+        inputs.inpcrd = self.ctx.inpcrd
+        inputs.cntrl = Dict(cntrl)
+        inputs.rem = Int(1)
+        inputs.metadata = AttributeDict(inputs.get("metadata", {}))
+        inputs.metadata.call_link_label = f"round_{self.ctx.round}"
+
+        return ToContext(calculation=self.submit(MultiSanderCalculation, **inputs))
+
+    def inspect_round(self):
+        """Check the round finished, then update the replica temperatures and
+        restart files and re-space the ladder for the next round."""
+        calculation = self.ctx.calculation
+        name = f"round_{self.ctx.round}"
+        replicas = calculation.outputs.replicas if calculation.is_finished_ok else {}
+        if "exchange" not in calculation.outputs or not all(
+            "restrt" in replicas.get(replica, {}) for replica in self.ctx.replicas
+        ):
+            self.report(
+                f"{calculation.process_label}<{calculation.pk}> of {name} failed"
+            )
+            return self.exit_codes.ERROR_ROUND_FAILED.format(round=name)
+
+        exchange = calculation.outputs.exchange
+        self.out(f"exchange.{name}", exchange)
+        acceptance = exchange.get_array("acceptance")
+        self.report(f"acceptance of {name}: {acceptance.round(2).tolist()}")
+
+        # the replicas are ordered as in the groupfile, i.e. by label
+        final_index = remlog.get_final_temperature_index(
+            {item: exchange.get_array(item) for item in exchange.get_arraynames()}
+        )
+        self.ctx.temperature_index = [int(index) for index in final_index]
+        self.ctx.inpcrd = {
+            replica: replicas[replica]["restrt"] for replica in self.ctx.replicas
+        }
+
+        self.ctx.round += 1
+        if self.inputs.respace and self.has_next_round():
+            self.ctx.temperatures = respace_ladder(self.ctx.temperatures, exchange)
+        return None
+
+    def results(self):
+        """Output the final ladder and restart file of each replica."""
+        self.out("temperatures", self.ctx.temperatures)
+        for replica, inpcrd in self.ctx.inpcrd.items():
+            self.out(f"restrt.{replica}", inpcrd)
@@ -0,0 +1,25 @@
+""" Benchmarks of the plugin overhead.
+
+Run with pytest-benchmark, see the developer guide for storing and comparing
+results across commits.
+"""
+import os
+
+BENCHMARK_DIR = os.path.dirname(os.path.realpath(__file__))
+TEST_INPUT_DIR = os.path.join(
+    os.path.dirname(BENCHMARK_DIR), "tests", "input_files", "sander"
+)
+
+
+def write_synthetic(directory, filename, writer, *args, **kwargs):
+    """Write a synthetic file with one of the functions of utils.synthetic.
+
+    :param directory: directory the file is written to.
+    :param filename: name of the file.
+    :param writer: function taking a text file handle as first argument.
+    :returns: path of the file as a string.
+    """
+    path = os.path.join(directory, filename)
+    with open(path, "w", encoding="utf-8") as handle:
+        writer(handle, *args, **kwargs)
+    return path
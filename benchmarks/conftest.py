@@ -0,0 +1,62 @@
+"""pytest fixtures for the benchmarks."""
+import os
+
+import pytest
+
+from aiida import orm
+from aiida.common.links import LinkType
+from aiida.plugins import CalculationFactory
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip the benchmarks when pytest-benchmark, from the benchmark extra, is
+    not installed or disabled, e.g. when collected by ``pytest .``."""
+    if config.pluginmanager.hasplugin("benchmark"):
+        return
+    skip = pytest.mark.skip(reason="the benchmarks need pytest-benchmark")
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for item in items:
+        if str(item.path).startswith(directory + os.sep):
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="function")
+def generate_calc_job_node(aiida_localhost, tmp_path):
+    """Create a calculation node with retrieved files, as left by the engine
+    before the parser is run."""
+
+    def _generate_calc_job_node(entry_point, files, inputs=None, options=None):
+        """
+        :param entry_point: entry point of the calculation, e.g. amber.sander.
+        :param files: dict of the names of the retrieved files to their paths.
+        :param inputs: dict of link labels to input nodes.
+        :param options: dict of metadata options, on top of the defaults.
+        :returns: the stored CalcJobNode
+        """
+        process_class = CalculationFactory(entry_point)
+        node = orm.CalcJobNode(
+            computer=aiida_localhost, process_type=f"aiida.calculations:{entry_point}"
+        )
+        for name, port in process_class.spec().inputs["metadata"]["options"].items():
+            if port.has_default():
+                default = port.default() if callable(port.default) else port.default
+                node.set_option(name, default)
+        node.set_option("output_dir", str(tmp_path))
+        node.set_option("output_export", "none")
+        for name, value in (options or {}).items():
+            node.set_option(name, value)
+        node.set_retrieve_list(list(files))
+        for label, input_node in (inputs or {}).items():
+            node.base.links.add_incoming(input_node.store(), LinkType.INPUT_CALC, label)
+        node.store()
+
+        retrieved = orm.FolderData()
+        for filename, path in files.items():
+            retrieved.base.repository.put_object_from_file(
+                os.path.abspath(path), filename
+            )
+        retrieved.base.links.add_incoming(node, LinkType.CREATE, "retrieved")
+        retrieved.store()
+        return node
+
+    return _generate_calc_job_node
@@ -0,0 +1,32 @@
+"""Benchmarks of building and storing the inputs of many calculations."""
+import pytest
+
+from aiida_amber.batch import prepare_many
+from aiida_amber.utils import synthetic
+
+from . import TEST_INPUT_DIR, write_synthetic
+
+
+@pytest.mark.parametrize("ncalcs", [10, 100, 1000])
+def test_prepare_many(benchmark, aiida_local_code_factory, tmp_path, ncalcs):
+    """Build and store the inputs of sander calculations sharing a system."""
+    write_synthetic(tmp_path, "box.prmtop", synthetic.write_prmtop, 3000)
+    write_synthetic(tmp_path, "box.rst7", synthetic.write_rst7, 3000)
+    code = aiida_local_code_factory(executable="bash", entry_point="amber")
+    specs = [
+        {
+            "calculation": "amber.sander",
+            "directory": str(tmp_path),
+            "inputs": {
+                "code": code,
+                "parameters": {"o": f"md{index}.out", "r": f"md{index}.rst7"},
+                "mdin": f"{TEST_INPUT_DIR}/01_Min.in",
+                "prmtop": "box.prmtop",
+                "inpcrd": "box.rst7",
+            },
+        }
+        for index in range(ncalcs)
+    ]
+
+    prepared = benchmark(prepare_many, specs)
+    assert len(prepared) == ncalcs
@@ -0,0 +1,59 @@
+"""Benchmarks of the validation and preparation of calculations."""
+import os
+
+import pytest
+
+from aiida.common.folders import SandboxFolder
+from aiida.engine.utils import instantiate_process
+from aiida.manage import get_manager
+from aiida.orm import SinglefileData
+from aiida.plugins import CalculationFactory, DataFactory
+
+from aiida_amber.data.mdin import MdinData
+from aiida_amber.data.prmtop import PrmtopData
+from aiida_amber.utils import synthetic
+
+from . import TEST_INPUT_DIR, write_synthetic
+
+
+@pytest.fixture(scope="function")
+def sander_inputs(aiida_localhost, aiida_local_code_factory, tmp_path):
+    """Generate the inputs of a sander calculation for a box of natom atoms."""
+
+    def _sander_inputs(natom):
+        prmtop = write_synthetic(tmp_path, "box.prmtop", synthetic.write_prmtop, natom)
+        inpcrd = write_synthetic(tmp_path, "box.rst7", synthetic.write_rst7, natom)
+        return {
+            "code": aiida_local_code_factory(executable="bash", entry_point="amber"),
+            "parameters": DataFactory("amber.sander")(
+                {"o": "md.out", "inf": "md.mdinfo", "r": "md.rst7", "x": "md.nc"}
+            ),
+            "mdin": MdinData(file=os.path.join(TEST_INPUT_DIR, "01_Min.in")),
+            "prmtop": PrmtopData(file=prmtop),
+            "inpcrd": SinglefileData(file=inpcrd),
+            "metadata": {"options": {"output_budget": 10**12}},
+        }
+
+    return _sander_inputs
+
+
+@pytest.mark.parametrize("natom", [1000, 100000])
+def test_sander_validation(benchmark, sander_inputs, natom):
+    """Instantiate a sander calculation, which validates its inputs."""
+    inputs = sander_inputs(natom)
+    runner = get_manager().get_runner()
+    process_class = CalculationFactory("amber.sander")
+
+    benchmark(instantiate_process, runner, process_class, **inputs)
+
+
+@pytest.mark.parametrize("natom", [1000, 100000])
+def test_sander_prepare_for_submission(benchmark, sander_inputs, natom):
+    """Prepare the submission of a sander calculation."""
+    inputs = sander_inputs(natom)
+    runner = get_manager().get_runner()
+    process = instantiate_process(runner, CalculationFactory("amber.sander"), **inputs)
+
+    with SandboxFolder() as folder:
+        calcinfo = benchmark(process.prepare_for_submission, folder)
+    assert "md.nc" in calcinfo.retrieve_list
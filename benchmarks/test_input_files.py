@@ -0,0 +1,50 @@
+"""Benchmarks of the parsing of tleap and parmed scripts for their files."""
+import io
+
+import pytest
+
+from aiida_amber.data.parmed_input import parse_parmed_input_file
+from aiida_amber.data.tleap_input import parse_tleap_input_file
+from aiida_amber.utils import synthetic, tleap_script
+
+SCRIPT_LINES = [100, 10000, 100000]
+
+
+@pytest.mark.parametrize("nlines", SCRIPT_LINES)
+def test_parse_tleap_input_file(benchmark, nlines):
+    """Find the files loaded and saved by a tleap script."""
+    handle = io.StringIO()
+    synthetic.write_tleap_script(handle, nlines)
+    lines = handle.getvalue().splitlines()
+
+    files = benchmark(parse_tleap_input_file, lines)
+    assert len(files["input_files"]) == nlines // 4
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_resolve_tleap_script(benchmark, tmp_path, cached):
+    """Resolve the files of a tleap script sourcing a local leaprc, again
+    or from the cache."""
+    handle = io.StringIO()
+    synthetic.write_tleap_script(handle, 10000)
+    (tmp_path / "leaprc.ligands").write_text(handle.getvalue())
+    content = "source leaprc.gaff2\nsource leaprc.ligands\n"
+
+    def resolve():
+        if not cached:
+            tleap_script.clear_cache()
+        return tleap_script.resolve_script(content, str(tmp_path))
+
+    files = benchmark(resolve)
+    assert len(files["input_files"]) == 10000 // 4 + 1
+
+
+@pytest.mark.parametrize("nlines", SCRIPT_LINES)
+def test_parse_parmed_input_file(benchmark, nlines):
+    """Find the files read and written by a parmed script."""
+    handle = io.StringIO()
+    synthetic.write_parmed_script(handle, nlines)
+    lines = handle.getvalue().splitlines()
+
+    files = benchmark(parse_parmed_input_file, lines)
+    assert len(files["output_files"]) == nlines // 2
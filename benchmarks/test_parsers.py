@@ -0,0 +1,151 @@
+"""Benchmarks of the parsers on synthetic outputs of increasing size."""
+import pytest
+
+from aiida.orm import List, SinglefileData
+from aiida.plugins import DataFactory, ParserFactory
+
+from aiida_amber.data.mdin import MdinData
+from aiida_amber.data.prmtop import PrmtopData
+from aiida_amber.utils import synthetic
+
+from . import write_synthetic
+
+NATOM = 3000
+# Command line parameters of the programs writing a prmtop.
+TOPOLOGY_PARAMETERS = {
+    "tleap": {},
+    "parmed": {"parm": "mol.prmtop", "inpcrd": "mol.rst7"},
+}
+
+
+def run_parser(entry_point, node):
+    """Parse the retrieved files of a calculation node.
+
+    :returns: the parser, holding the output nodes it created.
+    """
+    parser = ParserFactory(entry_point)(node)
+    parser.parse()
+    return parser
+
+
+@pytest.fixture(scope="function")
+def sander_inputs(tmp_path):
+    """Inputs of a sander calculation writing a NetCDF trajectory."""
+    mdin = tmp_path / "md.in"
+    mdin.write_text(" &cntrl\n  imin=0, nstlim=500000, dt=0.002, ntwx=500,\n /\n")
+    prmtop = write_synthetic(tmp_path, "box.prmtop", synthetic.write_prmtop, NATOM)
+    parameters = DataFactory("amber.sander")(
+        {"o": "md.out", "inf": "md.mdinfo", "r": "md.rst7", "x": "md.nc"}
+    )
+    return {
+        "parameters": parameters,
+        "mdin": MdinData(file=str(mdin)),
+        "prmtop": PrmtopData(file=prmtop),
+    }
+
+
+def write_sander_outputs(directory, nrecords, nframes):
+    """Write the files retrieved from a sander run."""
+    mdcrd = str(directory / "md.nc")
+    synthetic.write_netcdf_trajectory(mdcrd, NATOM, nframes)
+    return {
+        "sander.out": write_synthetic(directory, "sander.out", lambda handle: None),
+        "md.out": write_synthetic(directory, "md.out", synthetic.write_mdout, nrecords),
+        "md.mdinfo": write_synthetic(
+            directory, "md.mdinfo", synthetic.write_mdinfo, nrecords * 500, 500000
+        ),
+        "md.rst7": write_synthetic(directory, "md.rst7", synthetic.write_rst7, NATOM),
+        "md.nc": mdcrd,
+    }
+
+
+@pytest.mark.parametrize("nrecords", [100, 1000, 10000])
+def test_sander_parser_mdout(
+    benchmark, generate_calc_job_node, sander_inputs, tmp_path, nrecords
+):
+    """Parse sander outputs with a growing number of mdout energy records."""
+    files = write_sander_outputs(tmp_path, nrecords, nframes=10)
+    node = generate_calc_job_node("amber.sander", files, sander_inputs)
+    parser = benchmark(run_parser, "amber.sander", node)
+    assert len(parser.outputs["energies"].get_array("etot")) == nrecords
+
+
+@pytest.mark.parametrize("nframes", [10, 100, 1000])
+def test_sander_parser_trajectory(
+    benchmark, generate_calc_job_node, sander_inputs, tmp_path, nframes
+):
+    """Parse sander outputs with a growing NetCDF trajectory."""
+    files = write_sander_outputs(tmp_path, nrecords=10, nframes=nframes)
+    node = generate_calc_job_node("amber.sander", files, sander_inputs)
+    parser = benchmark(run_parser, "amber.sander", node)
+    assert parser.outputs["mdcrd"].nframes == nframes
+
+
+@pytest.mark.parametrize("compression", ["xtc", "netcdf"])
+def test_sander_parser_compression(
+    benchmark, generate_calc_job_node, sander_inputs, tmp_path, compression
+):
+    """Parse sander outputs, compressing an ASCII trajectory of 100 frames."""
+    files = write_sander_outputs(tmp_path, nrecords=10, nframes=1)
+    files["md.nc"] = write_synthetic(
+        tmp_path, "md.mdcrd", synthetic.write_mdcrd, NATOM, 100
+    )
+    node = generate_calc_job_node(
+        "amber.sander",
+        files,
+        sander_inputs,
+        {"trajectory_compression": {"format": compression, "keep_original": True}},
+    )
+    parser = benchmark(run_parser, "amber.sander", node)
+    assert parser.outputs["mdcrd"].base.attributes.get("compression")["nframes"] == 100
+
+
+@pytest.mark.parametrize("natom", [1000, 10000, 100000])
+@pytest.mark.parametrize("program", ["tleap", "parmed"])
+def test_topology_parser(benchmark, generate_calc_job_node, tmp_path, program, natom):
+    """Parse tleap and parmed outputs with a growing prmtop."""
+    files = {
+        f"{program}.out": write_synthetic(tmp_path, "out", lambda handle: None),
+        "box.prmtop": write_synthetic(
+            tmp_path, "box.prmtop", synthetic.write_prmtop, natom
+        ),
+    }
+    inputs = {
+        "parameters": DataFactory(f"amber.{program}")(TOPOLOGY_PARAMETERS[program]),
+        f"{program}_outfiles": List(["box.prmtop"]),
+    }
+    node = generate_calc_job_node(f"amber.{program}", files, inputs)
+    parser = benchmark(run_parser, f"amber.{program}", node)
+    assert parser.outputs["box_prmtop"].natom >= natom
+
+
+@pytest.mark.parametrize("natom", [1000, 10000, 100000])
+def test_antechamber_parser(benchmark, generate_calc_job_node, tmp_path, natom):
+    """Parse antechamber outputs with a growing output structure."""
+    files = {
+        "antechamber.out": write_synthetic(tmp_path, "out", lambda handle: None),
+        "mol.pdb": write_synthetic(tmp_path, "mol.pdb", synthetic.write_pdb, natom),
+    }
+    inputs = {
+        "parameters": DataFactory("amber.antechamber")({"o": "mol.pdb", "fo": "pdb"}),
+        "input_file": SinglefileData(file=files["mol.pdb"]),
+    }
+    node = generate_calc_job_node("amber.antechamber", files, inputs)
+    parser = benchmark(run_parser, "amber.antechamber", node)
+    assert "output_file" in parser.outputs
+
+
+@pytest.mark.parametrize("natom", [1000, 10000, 100000])
+def test_pdb4amber_parser(benchmark, generate_calc_job_node, tmp_path, natom):
+    """Parse pdb4amber outputs with a growing output structure."""
+    files = {
+        "pdb4amber.out": write_synthetic(tmp_path, "out", lambda handle: None),
+        "amber.pdb": write_synthetic(tmp_path, "amber.pdb", synthetic.write_pdb, natom),
+    }
+    inputs = {
+        "parameters": DataFactory("amber.pdb4amber")({"out": "amber.pdb"}),
+        "pdb4amber_outfiles": List(["amber.pdb"]),
+    }
+    node = generate_calc_job_node("amber.pdb4amber", files, inputs)
+    parser = benchmark(run_parser, "amber.pdb4amber", node)
+    assert "amber_pdb" in parser.outputs
@@ -0,0 +1,35 @@
+"""Benchmarks of the lookup of files output by previous processes."""
+import io
+
+import pytest
+
+from aiida.common.links import LinkType
+from aiida.manage import get_manager
+from aiida.orm import CalcJobNode, SinglefileData
+
+from aiida_amber.utils import searchprevious
+
+
+def store_processes(nprocesses, files_per_process=4):
+    """Store processes that each created a few output files."""
+    storage = get_manager().get_profile_storage()
+    with storage.transaction():
+        for index in range(nprocesses):
+            process = CalcJobNode()
+            process.store()
+            for number in range(files_per_process):
+                filename = f"step{index}_{number}.rst7"
+                node = SinglefileData(io.BytesIO(b"content"), filename=filename)
+                label = searchprevious.format_link_label(filename)
+                node.base.links.add_incoming(process, LinkType.CREATE, label)
+                node.store()
+
+
+@pytest.mark.parametrize("nprocesses", [10, 100, 1000])
+def test_find_previous_file_nodes(benchmark, nprocesses):
+    """Find the newest nodes of a few files among a growing database."""
+    store_processes(nprocesses)
+    filenames = [f"step{nprocesses - 1}_0.rst7", "step0_1.rst7", "missing.in"]
+
+    file_nodes = benchmark(searchprevious.find_previous_file_nodes, filenames)
+    assert len(file_nodes) == 2
@@ -1,12 +1,15 @@
 """pytest fixtures for simplified testing."""
 import pytest
 
+from aiida_amber import helpers
+
 pytest_plugins = ["aiida.manage.tests.pytest_fixtures"]
 
 
 @pytest.fixture(scope="function", autouse=True)
 def clear_database_auto(clear_database):  # pylint: disable=unused-argument
     """Automatically clear database in between tests."""
+    helpers.clear_cache()
 
 
 @pytest.fixture(scope="function")
@@ -15,12 +18,24 @@ def amber_code(aiida_local_code_factory):
     return aiida_local_code_factory(executable="sander", entry_point="amber")
 
 
+@pytest.fixture(scope="function")
+def mock_amber_code(aiida_local_code_factory):
+    """Get mock sander code, which needs no Amber installation."""
+    return aiida_local_code_factory(executable="mock_sander", entry_point="amber")
+
+
 @pytest.fixture(scope="function")
 def tleap_code(aiida_local_code_factory):
     """Get tleap code."""
     return aiida_local_code_factory(executable="tleap", entry_point="amber")
 
 
+@pytest.fixture(scope="function")
+def mock_tleap_code(aiida_local_code_factory):
+    """Get mock tleap code, which needs no Amber installation."""
+    return aiida_local_code_factory(executable="mock_tleap", entry_point="amber")
+
+
 @pytest.fixture(scope="function")
 def antechamber_code(aiida_local_code_factory):
     """Get antechamber code."""
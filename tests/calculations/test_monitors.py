@@ -0,0 +1,84 @@
+""" Tests for the monitors of sander calculations."""
+import io
+import types
+
+from aiida.common.links import LinkType
+from aiida.orm import CalcJobNode
+from aiida.plugins import DataFactory
+
+from aiida_amber.calculations.monitors import sander as monitor
+from aiida_amber.utils import synthetic
+
+
+class FakeTransport:
+    """Transport serving the files of a remote working directory from a dict."""
+
+    def __init__(self):
+        self.files = {}
+
+    def isfile(self, path):
+        """Return whether the remote file exists."""
+        return path in self.files
+
+    def getfile(self, remotepath, localpath):
+        """Copy a remote file to a local path."""
+        with open(localpath, "w", encoding="utf-8") as handle:
+            handle.write(self.files[remotepath])
+
+
+def get_mdinfo(nstep, nstlim=1000):
+    """Return the content of an mdinfo file after nstep steps."""
+    handle = io.StringIO()
+    synthetic.write_mdinfo(handle, nstep, nstlim)
+    return handle.getvalue()
+
+
+def test_monitor_progress(monkeypatch):
+    """Test the progress is recorded and a stalled job is killed."""
+    clock = types.SimpleNamespace(now=0.0)
+    monkeypatch.setattr(monitor, "time", types.SimpleNamespace(time=lambda: clock.now))
+    parameters = DataFactory("amber.sander")({"o": "md.out", "inf": "md.info"})
+    node = CalcJobNode()
+    node.base.links.add_incoming(parameters.store(), LinkType.INPUT_CALC, "parameters")
+    node.store()
+    transport = FakeTransport()
+
+    # mdinfo is not written before the first step
+    assert monitor.monitor_progress(node, transport, stall_timeout=100) is None
+    assert monitor.PROGRESS_EXTRA not in node.base.extras.all
+
+    transport.files["md.info"] = get_mdinfo(100)
+    assert monitor.monitor_progress(node, transport, stall_timeout=100) is None
+    progress = node.base.extras.get(monitor.PROGRESS_EXTRA)
+    assert progress["nstep"] == 100
+    assert progress["completed_steps"] == 100
+    assert progress["last_advanced"] == 0.0
+
+    # stalled, but not for longer than the timeout
+    clock.now = 50.0
+    assert monitor.monitor_progress(node, transport, stall_timeout=100) is None
+    progress = node.base.extras.get(monitor.PROGRESS_EXTRA)
+    assert progress["last_advanced"] == 0.0
+    assert progress["last_checked"] == 50.0
+
+    clock.now = 150.0
+    message = monitor.monitor_progress(node, transport, stall_timeout=100)
+    assert "beyond step 100" in message
+    # without a timeout the job is never killed
+    assert monitor.monitor_progress(node, transport) is None
+
+    # progressing again
+    transport.files["md.info"] = get_mdinfo(200)
+    clock.now = 200.0
+    assert monitor.monitor_progress(node, transport, stall_timeout=100) is None
+    progress = node.base.extras.get(monitor.PROGRESS_EXTRA)
+    assert progress["nstep"] == 200
+    assert progress["last_advanced"] == 200.0
+
+    # overflowed fields are left out of the progress stored in the extras
+    mdinfo = get_mdinfo(200).replace("NSTEP =      200", "NSTEP = ********")
+    transport.files["md.info"] = mdinfo
+    assert monitor.monitor_progress(node, transport, stall_timeout=100) is None
+    progress = node.base.extras.get(monitor.PROGRESS_EXTRA)
+    assert "nstep" not in progress
+    assert progress["completed_steps"] == 200
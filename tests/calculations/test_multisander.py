@@ -0,0 +1,128 @@
+""" Tests for multisander calculations."""
+import io
+import os
+
+from plumpy.ports import PortNamespace
+import pytest
+
+from aiida.engine import run_get_node
+from aiida.orm import Dict, Int
+from aiida.plugins import CalculationFactory, DataFactory
+
+from aiida_amber.calculations.multisander import validate_inputs
+
+from .. import TEST_DIR
+
+
+def test_groupfile(amber_code, tmp_path, monkeypatch):
+    """Test the groupfile and the replica inputs are written."""
+    # the dry run writes its submit_test folder in the working directory
+    monkeypatch.chdir(tmp_path)
+
+    SanderParameters = DataFactory("amber.sander")
+    SinglefileData = DataFactory("core.singlefile")
+    inpcrd = SinglefileData(
+        file=os.path.join(TEST_DIR, "input_files", "sander", "rst7")
+    )
+    inputs = {
+        "code": amber_code,
+        "parameters": SanderParameters({"o": "md.out", "r": "md.rst7", "O": True}),
+        "mdin": SinglefileData(
+            file=os.path.join(TEST_DIR, "input_files", "sander", "01_Min.in")
+        ),
+        "prmtop": SinglefileData(
+            file=os.path.join(TEST_DIR, "input_files", "sander", "parm7")
+        ),
+        "inpcrd": {"replica_0": inpcrd, "replica_1": inpcrd},
+        "seeds": Dict({"replica_0": 1, "replica_1": 2}),
+        "metadata": {
+            "dry_run": True,
+            "options": {
+                "resources": {"num_machines": 1, "num_mpiprocs_per_machine": 2},
+            },
+        },
+    }
+    _, node = run_get_node(CalculationFactory("amber.multisander"), **inputs)
+    folder = node.dry_run_info["folder"]
+
+    with open(os.path.join(folder, "groupfile"), encoding="utf-8") as handle:
+        groupfile = handle.read().splitlines()
+    assert len(groupfile) == 2
+    assert groupfile[1].split() == [
+        "-i", "replica_1/mdin",
+        "-p", "parm7",
+        "-c", "replica_1/rst7",
+        "-o", "replica_1/md.out",
+        "-r", "replica_1/md.rst7",
+        "-O",
+        "-inf", "replica_1/mdinfo",
+    ]  # fmt: skip
+    with open(os.path.join(folder, "replica_1", "mdin"), encoding="utf-8") as handle:
+        assert "ig=2," in handle.read()
+
+
+def test_replica_exchange(amber_code, tmp_path, monkeypatch):
+    """Test the temperature of each replica is set and exchanges are logged."""
+    monkeypatch.chdir(tmp_path)
+
+    SanderParameters = DataFactory("amber.sander")
+    SinglefileData = DataFactory("core.singlefile")
+    inpcrd = SinglefileData(
+        file=os.path.join(TEST_DIR, "input_files", "sander", "rst7")
+    )
+    inputs = {
+        "code": amber_code,
+        "parameters": SanderParameters({"o": "md.out", "r": "md.rst7", "O": True}),
+        "mdin": SinglefileData(
+            file=os.path.join(TEST_DIR, "input_files", "sander", "01_Min.in")
+        ),
+        "prmtop": SinglefileData(
+            file=os.path.join(TEST_DIR, "input_files", "sander", "parm7")
+        ),
+        "inpcrd": {"replica_0": inpcrd, "replica_1": inpcrd},
+        "cntrl": Dict({"replica_0": {"temp0": 300.0}, "replica_1": {"temp0": 310.0}}),
+        "rem": Int(1),
+        "metadata": {
+            "dry_run": True,
+            "options": {
+                "resources": {"num_machines": 1, "num_mpiprocs_per_machine": 2},
+            },
+        },
+    }
+    _, node = run_get_node(CalculationFactory("amber.multisander"), **inputs)
+    folder = node.dry_run_info["folder"]
+
+    with open(os.path.join(folder, "_aiidasubmit.sh"), encoding="utf-8") as handle:
+        assert "'-rem' '1' '-remlog' 'rem.log'" in handle.read()
+    with open(os.path.join(folder, "replica_1", "mdin"), encoding="utf-8") as handle:
+        assert "temp0=310.0," in handle.read()
+    assert "rem.log" in node.get_retrieve_list()
+
+
+def test_mdin_without_cntrl(amber_code):
+    """Test seeds are rejected for an mdin without a &cntrl namelist."""
+    SinglefileData = DataFactory("core.singlefile")
+    inpcrd = SinglefileData(
+        file=os.path.join(TEST_DIR, "input_files", "sander", "rst7")
+    )
+    inputs = {
+        "code": amber_code,
+        "parameters": DataFactory("amber.sander")({"o": "md.out"}),
+        "mdin": SinglefileData(io.BytesIO(b"title\n &ewald\n  nfft1=64,\n /\n")),
+        "prmtop": SinglefileData(
+            file=os.path.join(TEST_DIR, "input_files", "sander", "parm7")
+        ),
+        "inpcrd": {"replica_0": inpcrd},
+        "seeds": Dict({"replica_0": 1}),
+    }
+    with pytest.raises(ValueError, match="&cntrl"):
+        run_get_node(CalculationFactory("amber.multisander"), **inputs)
+
+
+def test_rem_without_inpcrd():
+    """Test the replica exchange type is checked when the replicas are
+    excluded from the inputs, e.g. when they are set by a workchain."""
+    # a namespace without the inpcrd, code and computer ports
+    ctx = PortNamespace()
+    assert validate_inputs({"rem": Int(1)}, ctx) is None
+    assert "`rem`" in validate_inputs({"rem": Int(2)}, ctx)
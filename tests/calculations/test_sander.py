@@ -1,13 +1,20 @@
 """ Tests for sander calculations."""
 import os
 
-from aiida.engine import run
+import numpy as np
+import pytest
+
+from aiida.engine import run, run_get_node
+from aiida.orm import Dict, RemoteData
 from aiida.plugins import CalculationFactory, DataFactory
 
+from aiida_amber.data.mdin import MdinData
+from aiida_amber.data.netcdf_trajectory import NetcdfTrajectoryData
+
 from .. import TEST_DIR
 
 
-def run_sander(amber_code):
+def run_sander(amber_code, options=None):
     """Run an instance of sander and return the results."""
 
     # profile = load_profile()
@@ -44,6 +51,7 @@ def run_sander(amber_code):
         "inpcrd": inpcrd,
         "metadata": {
             "description": "sander test",
+            "options": options or {},
         },
     }
 
@@ -64,6 +72,15 @@ def test_process(amber_code):
     assert "restrt" in result
 
 
+def test_process_mock(mock_amber_code):
+    """Test running a sander calculation with the mock sander."""
+
+    result = run_sander(mock_amber_code)
+
+    assert result["restrt"].natom == 2818
+    assert result["energies"].get_array("nstep")[-1] == 200
+
+
 def test_file_name_match(amber_code):
     """Test that the file names returned match what was specified on inputs."""
 
@@ -73,3 +90,149 @@ def test_file_name_match(amber_code):
     assert result["mdinfo"].list_object_names()[0] == "01_Min.mdinfo"
     assert result["mdout"].list_object_names()[0] == "01_Min.out"
     assert result["restrt"].list_object_names()[0] == "01_Min.ncrst"
+
+
+def test_energies(amber_code):
+    """Test that the energies printed in mdout are parsed into arrays."""
+
+    result = run_sander(amber_code)
+
+    assert "energies" in result
+    assert "nstep" in result["energies"].get_arraynames()
+    assert "energy" in result["energies"].get_arraynames()
+
+
+def test_output_retention(amber_code):
+    """Test that outputs kept on the remote are registered as RemoteData."""
+
+    result = run_sander(amber_code, options={"output_retention": {"r": "remote"}})
+
+    assert isinstance(result["restrt"], RemoteData)
+    assert result["restrt"].get_remote_path().endswith("01_Min.ncrst")
+    assert "01_Min.ncrst" not in result["retrieved"].list_object_names()
+
+
+def test_parent_folder(amber_code):
+    """Test that input files can be taken from the folder of a previous run."""
+
+    parent = run_sander(amber_code)
+
+    SanderParameters = DataFactory("amber.sander")
+    SinglefileData = DataFactory("core.singlefile")
+    inputs = {
+        "code": amber_code,
+        "parameters": SanderParameters(
+            {"o": "02_Min.out", "r": "02_Min.ncrst", "inf": "02_Min.mdinfo"}
+        ),
+        "mdin": SinglefileData(
+            file=os.path.join(TEST_DIR, "input_files", "sander", "01_Min.in")
+        ),
+        "parent_folder": parent["remote_folder"],
+        "parent_files": Dict({"prmtop": "parm7", "inpcrd": "01_Min.ncrst"}),
+    }
+    result, node = run_get_node(CalculationFactory("amber.sander"), **inputs)
+
+    assert node.is_finished_ok
+    assert "restrt" in result
+    workdir = result["remote_folder"].get_remote_path()
+    assert os.path.islink(os.path.join(workdir, "01_Min.ncrst"))
+
+
+def test_output_budget(amber_code):
+    """Test a run predicted to write more output than the budget is rejected."""
+
+    with pytest.raises(ValueError, match="output_budget"):
+        run_sander(amber_code, {"output_budget": 1000})
+
+
+def test_trajectory_compression_netcdf(amber_code):
+    """Test the lossless compression is rejected for a NetCDF trajectory,
+    which it would only copy."""
+
+    with pytest.raises(ValueError, match="ioutfm"):
+        run_sander(amber_code, {"trajectory_compression": {"format": "netcdf"}})
+
+
+@pytest.mark.parametrize("keep_original", [False, True])
+def test_trajectory_compression(mock_amber_code, tmp_path, monkeypatch, keep_original):
+    """Test that the mdcrd is compressed by the parser into the mdcrd output
+    and exported, and that the original is only retrieved if it is kept."""
+    # the outputs are only exported outside of tests
+    monkeypatch.delenv("PYTEST_CURRENT_TEST")
+    (tmp_path / "md.in").write_text(
+        "MD\n &cntrl\n  imin=0, nstlim=100, ntpr=50, ntwx=10, ioutfm=0,\n /\n"
+    )
+    SinglefileData = DataFactory("core.singlefile")
+    inputs = {
+        "code": mock_amber_code,
+        "parameters": DataFactory("amber.sander")(
+            {"o": "md.out", "r": "md.rst7", "inf": "md.mdinfo", "x": "md.mdcrd"}
+        ),
+        "mdin": MdinData(file=str(tmp_path / "md.in")),
+        "prmtop": SinglefileData(
+            file=os.path.join(TEST_DIR, "input_files", "sander", "parm7")
+        ),
+        "inpcrd": SinglefileData(
+            file=os.path.join(TEST_DIR, "input_files", "sander", "rst7")
+        ),
+        "metadata": {
+            "options": {
+                "output_dir": str(tmp_path / "outputs"),
+                "output_export": "reflink",
+                "trajectory_compression": {
+                    "format": "netcdf",
+                    "keep_original": keep_original,
+                },
+            },
+        },
+    }
+    result, node = run_get_node(CalculationFactory("amber.sander"), **inputs)
+
+    assert node.is_finished_ok
+    temporary = [] if keep_original else ["md.mdcrd"]
+    assert (node.get_retrieve_temporary_list() or []) == temporary
+    assert ("md.mdcrd" in result["retrieved"].list_object_names()) is keep_original
+    mdcrd = result["mdcrd"]
+    assert isinstance(mdcrd, NetcdfTrajectoryData)
+    assert mdcrd.filename == "md.nc"
+    assert mdcrd.nframes == 10
+    compression = mdcrd.base.attributes.get("compression")
+    assert compression["original_filename"] == "md.mdcrd"
+    assert compression["keep_original"] is keep_original
+    # the compressed trajectory is exported with the retrieved files
+    for filename in ["md.nc", "md.out"]:
+        assert (tmp_path / "outputs" / filename).is_file()
+    assert (tmp_path / "outputs" / "md.mdcrd").is_file() is keep_original
+
+
+@pytest.mark.parametrize("prmtop_type", ["core.singlefile", "amber.prmtop"])
+def test_trajectory_compression_box_angles(mock_amber_code, tmp_path, prmtop_type):
+    """Test the angles of a truncated octahedron, which mdcrd does not store,
+    are taken from the prmtop when the trajectory is compressed."""
+    (tmp_path / "md.in").write_text(
+        "MD\n &cntrl\n  imin=0, nstlim=20, ntpr=10, ntwx=10, ioutfm=0,\n /\n"
+    )
+    SinglefileData = DataFactory("core.singlefile")
+    inputs = {
+        "code": mock_amber_code,
+        "parameters": DataFactory("amber.sander")(
+            {"o": "md.out", "r": "md.rst7", "x": "md.mdcrd"}
+        ),
+        "mdin": MdinData(file=str(tmp_path / "md.in")),
+        # the test topology is a truncated octahedron (IFBOX=2)
+        "prmtop": DataFactory(prmtop_type)(
+            file=os.path.join(TEST_DIR, "input_files", "sander", "parm7")
+        ),
+        "inpcrd": SinglefileData(
+            file=os.path.join(TEST_DIR, "input_files", "sander", "rst7")
+        ),
+        "metadata": {
+            "options": {"trajectory_compression": {"format": "netcdf"}},
+        },
+    }
+    result, node = run_get_node(CalculationFactory("amber.sander"), **inputs)
+
+    assert node.is_finished_ok
+    box = result["mdcrd"].get_box()
+    assert box.shape == (2, 6)
+    assert np.allclose(box[:, 3:], 109.4712190)
@@ -1,7 +1,8 @@
 """ Tests for tleap calculations."""
 import os
 
-from aiida.engine import run
+from aiida.engine import run, run_get_node
+from aiida.manage.caching import enable_caching
 from aiida.plugins import CalculationFactory, DataFactory
 
 from aiida_amber.data.tleap_input import TleapInputData
@@ -58,3 +59,28 @@ def test_file_name_match(tleap_code):
     assert result["stdout"].list_object_names()[0] == "tleap.out"
     assert result["complex_prmtop"].list_object_names()[0] == "complex.prmtop"
     assert result["complex_inpcrd"].list_object_names()[0] == "complex.inpcrd"
+
+
+def test_caching(mock_tleap_code, tmp_path):
+    """Test that the same script run from another directory, under another
+    name, is taken from the cache and its outputs are exported."""
+    script = "mol = sequence { ALA }\nsaveamberparm mol mol.prmtop mol.rst7\nquit\n"
+    nodes = []
+    for name in ["run1", "run2"]:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / f"{name}.in").write_text(script)
+        inputs = {
+            "code": mock_tleap_code,
+            "parameters": DataFactory("amber.tleap")({}),
+            "tleapscript": TleapInputData(file=str(tmp_path / name / f"{name}.in")),
+            "metadata": {"options": {"output_dir": str(tmp_path / name)}},
+        }
+        inputs.update(inputs["tleapscript"].calculation_inputs_outputs[1])
+        with enable_caching(identifier="aiida.calculations:amber.tleap"):
+            _, node = run_get_node(CalculationFactory("amber.tleap"), **inputs)
+        nodes.append(node)
+
+    assert nodes[0].is_finished_ok
+    assert nodes[1].base.caching.get_cache_source() == nodes[0].uuid
+    assert nodes[1].base.extras.get("output_dir") == str(tmp_path / "run2")
+    assert (tmp_path / "run2" / "mol.prmtop").is_file()
@@ -0,0 +1,89 @@
+""" Tests for batch cli script
+
+"""
+
+import json
+
+from aiida.orm.nodes.process.process import ProcessState
+
+from aiida_amber.cli import batch, sander
+from aiida_amber.utils import searchprevious
+
+TLEAP_SCRIPT = "mol = sequence { ALA }\nsaveamberparm mol mol.prmtop mol.rst7\nquit\n"
+
+
+def test_get_job_args():
+    """
+    Check the options of a job are converted to command line arguments.
+    """
+    job = {
+        "args": "-i md.in",
+        "options": {"p": "parm7", "wait-for": [1, 2], "keep_remote": ["x"]},
+    }
+    args = batch.get_job_args(sander.cli, job)
+    assert args == [
+        "-i", "md.in", "-p", "parm7", "--wait-for", "1", "--wait-for", "2",
+        "--keep-remote", "x",
+    ]  # fmt: skip
+
+
+def test_read_manifest(tmp_path):
+    """
+    Check the jobs of JSONL and YAML manifests are launched from their
+    directory relative to the manifest.
+    """
+    (tmp_path / "jobs.jsonl").write_text(
+        json.dumps({"program": "tleap", "directory": "lig1"}) + "\n\n"
+    )
+    (tmp_path / "jobs.yaml").write_text("- program: tleap\n  args: -f tleap.in\n")
+
+    jobs = batch.read_manifest(str(tmp_path / "jobs.jsonl"))
+    assert jobs == [{"program": "tleap", "directory": str(tmp_path / "lig1")}]
+    jobs = batch.read_manifest(str(tmp_path / "jobs.yaml"))
+    assert jobs[0]["args"] == "-f tleap.in"
+    assert jobs[0]["directory"] == str(tmp_path)
+
+
+def test_launch_jobs(tmp_path, monkeypatch):
+    """
+    Launch tleap jobs given by a glob with the mock tleap, carrying on past
+    a job that fails.
+    """
+    monkeypatch.setenv("AIIDA_AMBER_MOCK", "1")
+    for name in ["lig1", "lig2"]:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "tleap.in").write_text(TLEAP_SCRIPT)
+
+    jobs = batch.jobs_from_glob(str(tmp_path / "*" / "tleap.in"), "tleap")
+    jobs.append({"program": "tleap", "options": {"f": "missing.in"}})
+    results, errors = batch.launch_jobs(jobs)
+
+    assert len(results) == 2
+    assert [index for index, _ in errors] == [2]
+    # pylint: disable=unsubscriptable-object
+    for calc in searchprevious.build_query().all(flat=True):
+        assert calc.process_state == ProcessState.FINISHED
+        assert calc.exit_status == 0
+
+
+def test_launch_jobs_unexpected_error(monkeypatch):
+    """
+    Check an unexpected exception of a job is reported with its index and
+    the jobs after it are still launched.
+    """
+
+    def launch_job(job, _default_program=None):
+        if job["fail"]:
+            raise RuntimeError("unexpected")
+        return job["name"]
+
+    monkeypatch.setattr(batch, "launch_job", launch_job)
+    jobs = [
+        {"name": "first", "fail": False},
+        {"name": "second", "fail": True},
+        {"name": "third", "fail": False},
+    ]
+    results, errors = batch.launch_jobs(jobs)
+
+    assert results == ["first", "third"]
+    assert errors == [(1, "RuntimeError: unexpected")]
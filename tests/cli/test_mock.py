@@ -0,0 +1,152 @@
+""" Tests for the mock Amber executables
+
+"""
+
+import os
+import shutil
+import subprocess
+
+from scipy.io import netcdf_file
+
+from aiida_amber.data.restart import parse_rst7
+from aiida_amber.utils import mdinfo, mdout, remlog
+
+from .. import TEST_DIR
+
+MDIN = """MD
+ &cntrl
+  imin=0, nstlim=1000, dt=0.002, ntpr=100, ntwx=250,
+ /
+"""
+
+
+def run_mock_sander(directory, *args, mdin=MDIN):
+    """Run the mock sander on the test topology and coordinates."""
+    for filename in ["parm7", "rst7"]:
+        shutil.copy(
+            os.path.join(TEST_DIR, "input_files", "sander", filename), directory
+        )
+    with open(os.path.join(directory, "md.in"), "w", encoding="utf-8") as handle:
+        handle.write(mdin)
+    return subprocess.run(
+        ["mock_sander", "-i", "md.in", "-p", "parm7", "-c", "rst7", "-o", "md.out"]
+        + list(args),
+        cwd=directory,
+        capture_output=True,
+        check=False,
+    )
+
+
+def test_mock_sander(tmp_path):
+    """
+    Check the outputs of the mock sander follow the mdin and prmtop.
+    """
+    process = run_mock_sander(tmp_path, "-O", "-x", "md.nc", "-ref", "rst7")
+    assert process.returncode == 0
+
+    with open(tmp_path / "md.out", encoding="utf-8") as handle:
+        energies = mdout.parse_mdout_energies(handle)
+    assert list(energies["nstep"]) == list(range(100, 1001, 100))
+    with open(tmp_path / "mdinfo", encoding="utf-8") as handle:
+        assert mdinfo.parse_mdinfo(handle)["completed_steps"] == 1000
+    restart = parse_rst7((tmp_path / "restrt").read_bytes())
+    assert restart["natom"] == 2818
+    assert restart["time"] == 2.0
+    with netcdf_file(tmp_path / "md.nc", "r", mmap=False) as trajectory:
+        assert trajectory.variables["coordinates"].shape == (4, 2818, 3)
+
+
+def test_mock_sander_minimisation(tmp_path):
+    """
+    Check the mock sander writes the minimisation records for imin=1.
+    """
+    mdin = "Min\n &cntrl\n  imin=1, maxcyc=500, ntpr=100,\n /\n"
+    assert run_mock_sander(tmp_path, mdin=mdin).returncode == 0
+
+    with open(tmp_path / "md.out", encoding="utf-8") as handle:
+        energies = mdout.parse_mdout_energies(handle)
+    assert list(energies["nstep"]) == [100, 200, 300, 400, 500]
+    assert {"energy", "rms", "gmax", "bond", "1_4_vdw"} <= set(energies)
+    assert "time_ps" not in energies
+    with open(tmp_path / "mdinfo", encoding="utf-8") as handle:
+        assert mdinfo.parse_mdinfo(handle) == {"nstep": 500}
+    assert parse_rst7((tmp_path / "restrt").read_bytes())["velocities"] is None
+
+
+def test_mock_sander_overwrite(tmp_path):
+    """
+    Check the mock sander keeps existing outputs without -O, like sander.
+    """
+    assert run_mock_sander(tmp_path).returncode == 0
+    process = run_mock_sander(tmp_path)
+    assert process.returncode == 1
+    assert b"use -O to overwrite" in process.stderr
+
+
+def test_mock_sander_groupfile(tmp_path):
+    """
+    Check the mock sander runs each replica of a groupfile and logs the
+    temperature exchanges.
+    """
+    groupfile = []
+    for index, temp0 in enumerate([300.0, 310.0]):
+        mdin = MDIN.replace("ntwx=250,", f"ntwx=250, temp0={temp0}, numexchg=4,")
+        (tmp_path / f"r{index}").mkdir()
+        (tmp_path / f"r{index}" / "md.in").write_text(mdin)
+        groupfile.append(
+            f"-i r{index}/md.in -p parm7 -c rst7 -o r{index}/md.out "
+            f"-r r{index}/md.rst7 -inf r{index}/mdinfo -x r{index}/md.nc"
+        )
+    (tmp_path / "groupfile").write_text("\n".join(groupfile) + "\n")
+    process = run_mock_sander(
+        tmp_path, "-ng", "2", "-groupfile", "groupfile", "-rem", "1"
+    )
+    assert process.returncode == 0
+
+    for index in range(2):
+        for filename in ["md.out", "md.rst7", "mdinfo", "md.nc"]:
+            assert (tmp_path / f"r{index}" / filename).is_file()
+    with open(tmp_path / "rem.log", encoding="utf-8") as handle:
+        exchange = remlog.parse_remlog(handle)
+    assert exchange["temperature"].shape == (4, 2)
+    assert sorted(exchange["temperature"][0]) == [300.0, 310.0]
+
+
+def test_mock_tleap(tmp_path):
+    """
+    Check the mock tleap writes the files saved by the script.
+    """
+    with open(tmp_path / "tleap.in", "w", encoding="utf-8") as handle:
+        handle.write("mol = loadpdb mol.pdb\nsaveamberparm mol mol.prmtop mol.rst7\n")
+    subprocess.run(
+        ["mock_tleap", "-f", "tleap.in", "--mock-natom", "30"],
+        cwd=tmp_path,
+        check=True,
+    )
+    restart = parse_rst7((tmp_path / "mol.rst7").read_bytes())
+    assert restart["natom"] == 30
+    assert (tmp_path / "mol.prmtop").read_text().startswith("%VERSION")
+
+
+def test_mock_pdb4amber(tmp_path):
+    """
+    Check the mock pdb4amber writes the files of the options it is given.
+    """
+    with open(tmp_path / "in.pdb", "w", encoding="utf-8") as handle:
+        handle.write(
+            "ATOM      1  CA  ALA A   1       0.000   0.000   0.000\n"
+            "HETATM    2  O   HOH A   2       1.000   0.000   0.000\n"
+        )
+    subprocess.run(
+        ["mock_pdb4amber", "-i", "in.pdb", "--out", "test.pdb", "--dry"]
+        + ["--logfile", "test.log", "--leap-template", "--reduce"],
+        cwd=tmp_path,
+        check=True,
+    )
+    for filename in [
+        "test.pdb", "test.log", "test_water.pdb", "test_sslink", "leap.template.in",
+        "test_nonprot.pdb", "test_renum.txt",
+    ]:  # fmt: skip
+        assert (tmp_path / filename).is_file()
+    assert "HOH" not in (tmp_path / "test.pdb").read_text()
+    assert "HOH" in (tmp_path / "test_water.pdb").read_text()
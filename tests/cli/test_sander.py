@@ -5,8 +5,11 @@
 import os
 import subprocess
 
+from aiida.orm import SinglefileData
 from aiida.orm.nodes.process.process import ProcessState
 
+from aiida_amber.cli.sander import get_coordinates_node
+from aiida_amber.data.restart import RestartData
 from aiida_amber.utils import searchprevious
 
 from .. import TEST_DIR
@@ -46,3 +49,15 @@ def test_launch_sander():
     # check the process has finished and exited correctly
     assert prev_calc.process_state == ProcessState.FINISHED
     assert prev_calc.exit_status == 0
+
+
+def test_get_coordinates_node(tmp_path):
+    """Check coordinates files that cannot be read as a restart file are
+    taken as plain files instead of failing"""
+    inpcrd = os.path.join(TEST_DIR, "input_files", "sander", "rst7")
+    assert isinstance(get_coordinates_node(inpcrd), RestartData)
+
+    unreadable = tmp_path / "coords.crd"
+    unreadable.write_text("title\nnot an atom count\n")
+    node = get_coordinates_node(str(unreadable))
+    assert type(node) is SinglefileData  # pylint: disable=unidiomatic-typecheck
@@ -0,0 +1,84 @@
+""" Tests for the submission of many calculations."""
+import os
+
+from aiida.engine import run_get_node
+
+from aiida_amber.batch import iter_nodes, prepare_many
+from aiida_amber.data.prmtop import PrmtopData
+from aiida_amber.data.sander import SanderParameters
+
+from . import TEST_DIR
+
+
+def test_prepare_many(amber_code):
+    """Test that the inputs of many calculations are built and stored, with
+    the nodes of shared files built once."""
+    specs = [
+        {
+            "calculation": "amber.sander",
+            "directory": os.path.join(TEST_DIR, "input_files", "sander"),
+            "inputs": {
+                "code": amber_code,
+                "parameters": {"o": f"md{index}.out", "r": f"md{index}.rst7"},
+                "mdin": "01_Min.in",
+                "prmtop": "parm7",
+                "inpcrd": "rst7",
+                "metadata": {"label": f"md{index}"},
+            },
+        }
+        for index in range(3)
+    ]
+    prepared = prepare_many(specs)
+
+    assert len(prepared) == 3
+    for _, inputs in prepared:
+        assert all(node.is_stored for node in iter_nodes(inputs))
+        assert isinstance(inputs["parameters"], SanderParameters)
+        assert isinstance(inputs["prmtop"], PrmtopData)
+    assert len({inputs["prmtop"].pk for _, inputs in prepared}) == 1
+    assert prepared[2][1]["parameters"]["o"] == "md2.out"
+    assert prepared[2][1]["metadata"] == {"label": "md2"}
+
+
+def test_prepare_many_tleap(amber_code):
+    """Test that the files referenced in a tleap script are added."""
+    spec = {
+        "calculation": "amber.tleap",
+        "directory": os.path.join(TEST_DIR, "input_files", "tleap"),
+        "inputs": {"code": amber_code, "parameters": {}, "tleapscript": "tleap.in"},
+    }
+    [(_, inputs)] = prepare_many([spec])
+
+    assert "tleap_inpfiles" in inputs
+    assert "tleap_outfiles" in inputs
+    assert all(node.is_stored for node in iter_nodes(inputs))
+
+
+def test_prepare_many_tleap_include_dirs(mock_tleap_code, tmp_path):
+    """Test that the -I dirs of a tleap spec are uploaded, and the files found
+    in them are not input files."""
+    (tmp_path / "leaprc").mkdir()
+    (tmp_path / "leaprc" / "lig.frcmod").write_text("")
+    (tmp_path / "run").mkdir()
+    (tmp_path / "run" / "tleap.in").write_text(
+        "loadamberparams lig.frcmod\nmol = sequence { ALA }\n"
+        "saveamberparm mol mol.prmtop mol.rst7\nquit\n"
+    )
+    spec = {
+        "calculation": "amber.tleap",
+        "directory": str(tmp_path / "run"),
+        "include_dirs": ["../leaprc"],
+        "inputs": {
+            "code": mock_tleap_code,
+            "parameters": {},
+            "tleapscript": "tleap.in",
+        },
+    }
+    [(process_class, inputs)] = prepare_many([spec])
+
+    assert "tleap_inpfiles" not in inputs
+    assert inputs["dirs"]["leaprc"].list_object_names() == ["lig.frcmod"]
+
+    result, node = run_get_node(process_class, **inputs)
+    assert node.is_finished_ok
+    assert "-I: Adding leaprc" in result["stdout"].get_content()
@@ -0,0 +1,50 @@
+""" Tests for the set up of computers and codes."""
+import json
+
+import pytest
+
+from aiida_amber import helpers
+
+
+@pytest.fixture
+def code_cache(tmp_path, monkeypatch):
+    """Keep the cache of the code PKs in a temporary folder."""
+    path = tmp_path / helpers.CODE_CACHE_FILENAME
+    monkeypatch.setattr(helpers, "get_code_cache_path", lambda: str(path))
+    helpers.clear_cache()
+    yield path
+    helpers.clear_cache()
+
+
+def test_get_code_cached(code_cache):
+    """Test that a code is resolved once and then loaded from the caches."""
+    computer = helpers.get_computer()
+    code = helpers.get_code("bash", computer)
+
+    assert helpers.get_computer() is computer
+    assert helpers.get_code("bash", computer) is code
+
+    cache = json.loads(code_cache.read_text())
+    entry = next(iter(cache.values()))[f"{computer.label}:bash:bash"]
+    assert entry["uuid"] == code.uuid
+
+    # a new process finds the code through the cache on disk
+    helpers.clear_cache()
+    assert helpers.get_code("bash", computer).uuid == code.uuid
+
+
+def test_get_code_stale_cache(code_cache):
+    """Test that a cache entry of a code that no longer exists is replaced."""
+    computer = helpers.get_computer()
+    code = helpers.get_code("bash", computer)
+    cache = json.loads(code_cache.read_text())
+    for entries in cache.values():
+        entries[f"{computer.label}:bash:bash"]["uuid"] = "deleted"
+    code_cache.write_text(json.dumps(cache))
+
+    helpers.clear_cache()
+    assert helpers.get_code("bash", computer).uuid == code.uuid
+    cache = json.loads(code_cache.read_text())
+    assert (
+        next(iter(cache.values()))[f"{computer.label}:bash:bash"]["uuid"] == code.uuid
+    )
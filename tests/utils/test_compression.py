@@ -0,0 +1,104 @@
+"""Test for the compression of trajectories"""
+
+import os
+
+from MDAnalysis.coordinates.XTC import XTCReader
+import numpy as np
+import pytest
+
+from aiida_amber.calculations.sander import validate_trajectory_compression
+from aiida_amber.data.netcdf_trajectory import NetcdfTrajectoryData
+from aiida_amber.utils.compression import (
+    compress_trajectory,
+    get_compressed_filename,
+    iter_trajectory_chunks,
+)
+
+from .. import TEST_DIR
+
+NETCDF = os.path.join(TEST_DIR, "input_files", "sander", "md.nc")
+
+
+@pytest.fixture
+def mdcrd(tmp_path):
+    """Write an ASCII trajectory of 10 frames of 20 atoms with a box."""
+    rng = np.random.default_rng(0)
+    coordinates = np.round(rng.uniform(-50, 50, (10, 20, 3)), 3)
+    lines = ["test trajectory"]
+    for frame in coordinates:
+        values = "".join(f"{value:8.3f}" for value in frame.ravel())
+        lines += [values[i : i + 80] for i in range(0, len(values), 80)]
+        lines.append("  40.000  40.000  40.000")
+    filepath = tmp_path / "md.mdcrd"
+    filepath.write_text("\n".join(lines) + "\n")
+    return str(filepath), coordinates
+
+
+def test_get_compressed_filename():
+    """Check the extension of the compressed trajectory"""
+    assert get_compressed_filename("md.mdcrd", "xtc") == "md.xtc"
+    assert get_compressed_filename("mdcrd", "netcdf") == "mdcrd.nc"
+
+
+def test_iter_trajectory_chunks(mdcrd):
+    """Check NetCDF and ASCII trajectories are read the same way"""
+    filepath, coordinates = mdcrd
+    chunks = list(iter_trajectory_chunks(filepath, 20, time_step=2.0))
+    assert np.allclose(chunks[0][0], coordinates)
+    assert chunks[0][1][0].tolist() == [40.0, 40.0, 40.0, 90.0, 90.0, 90.0]
+    assert chunks[0][2][-1] == 18.0
+
+    chunks = list(iter_trajectory_chunks(NETCDF))
+    assert chunks[0][0].shape[0] == 6
+
+
+def test_compress_xtc(mdcrd, tmp_path):
+    """Check coordinates are kept to the precision of the XTC file"""
+    filepath, coordinates = mdcrd
+    target = str(tmp_path / "md.xtc")
+    settings = compress_trajectory(filepath, target, "xtc", natom=20, precision=2)
+    assert settings["nframes"] == 10
+    assert settings["precision"] == 2
+    assert not settings["lossless"]
+    assert settings["compressed_size"] < settings["original_size"] / 2
+
+    reader = XTCReader(target)
+    assert reader.n_frames == 10
+    # 2 decimals in nm, so within 0.05 Angstrom
+    assert np.allclose(reader[3].positions, coordinates[3], atol=0.05)
+    reader.close()
+
+    with pytest.raises(ValueError):
+        compress_trajectory(filepath, target, "xtc")
+
+
+def test_compress_netcdf(mdcrd, tmp_path):
+    """Check the ASCII trajectory is converted to NetCDF without loss"""
+    filepath, coordinates = mdcrd
+    target = str(tmp_path / "md.nc")
+    settings = compress_trajectory(filepath, target, "netcdf", natom=20)
+    assert settings["lossless"]
+    assert settings["original_format"] == "mdcrd"
+
+    trajectory = NetcdfTrajectoryData(file=target)
+    assert trajectory.nframes == 10
+    formatted = np.char.mod("%8.3f", trajectory.get_frames().astype(float))
+    assert (formatted == np.char.mod("%8.3f", coordinates)).all()
+
+    # NetCDF trajectories are not copied as if they were compressed
+    with pytest.raises(ValueError):
+        compress_trajectory(NETCDF, target, "netcdf")
+
+
+def test_validate_trajectory_compression():
+    """Check the settings of the trajectory_compression option"""
+    assert (
+        validate_trajectory_compression({"format": "xtc", "precision": 2}, None) is None
+    )
+    assert "format" in validate_trajectory_compression({"format": "gz"}, None)
+    assert "precision" in validate_trajectory_compression(
+        {"format": "xtc", "precision": 0}, None
+    )
+    assert "level" in validate_trajectory_compression(
+        {"format": "xtc", "level": 9}, None
+    )
@@ -0,0 +1,81 @@
+"""Test for the chunked mdcrd reader and the streaming NetCDF writer"""
+
+import io
+
+import numpy as np
+
+from aiida_amber.data.netcdf_trajectory import NetcdfTrajectoryData
+from aiida_amber.utils.mdcrd import (
+    get_frame_layout,
+    iter_mdcrd_chunks,
+    iter_mdcrd_frames,
+    mdcrd_to_netcdf,
+)
+
+
+def make_mdcrd(coordinates, box=None):
+    """Format frames of coordinates as an mdcrd file, in 10F8.3 lines."""
+    lines = ["test trajectory"]
+    for frame in coordinates:
+        values = "".join(f"{value:8.3f}" for value in frame.ravel())
+        lines += [values[i : i + 80] for i in range(0, len(values), 80)]
+        if box is not None:
+            lines.append("".join(f"{value:8.3f}" for value in box))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def get_coordinates(nframes, natom):
+    """Generate coordinates with three decimals, as written in mdcrd files."""
+    rng = np.random.default_rng(0)
+    return np.round(rng.uniform(-50, 50, (nframes, natom, 3)), 3)
+
+
+def test_get_frame_layout():
+    """Check the mask skips the line breaks of a frame"""
+    mask = get_frame_layout(4, box=True)
+    # 12 values on lines of 10 and 2, then the box line
+    assert mask.size == 81 + 17 + 25
+    assert not mask[80] and not mask[97] and not mask[-1]
+    assert mask.sum() == 15 * 8
+
+
+def test_iter_mdcrd_chunks():
+    """Check frames are decoded in chunks, with or without a box"""
+    coordinates = get_coordinates(25, 4)
+    data = make_mdcrd(coordinates, box=[30.0, 31.0, 32.0])
+    chunks = list(iter_mdcrd_chunks(io.BytesIO(data), 4, chunk_frames=10))
+    assert [len(chunk) for chunk, _ in chunks] == [10, 10, 5]
+    assert np.allclose(np.concatenate([chunk for chunk, _ in chunks]), coordinates)
+    assert chunks[-1][1][-1].tolist() == [30.0, 31.0, 32.0]
+
+    coordinates = get_coordinates(3, 7)
+    frames = list(iter_mdcrd_frames(io.BytesIO(make_mdcrd(coordinates)), 7))
+    assert len(frames) == 3
+    assert frames[0][1] is None
+    assert np.allclose(frames[2][0], coordinates[2])
+
+
+def test_incomplete_frame():
+    """Check the last frame of an interrupted run is dropped"""
+    data = make_mdcrd(get_coordinates(5, 4), box=[30.0, 30.0, 30.0])
+    frames = list(iter_mdcrd_frames(io.BytesIO(data[:-30]), 4))
+    assert len(frames) == 4
+
+
+def test_mdcrd_to_netcdf(tmp_path):
+    """Check the converted trajectory is read back by NetcdfTrajectoryData"""
+    coordinates = get_coordinates(12, 5)
+    data = make_mdcrd(coordinates, box=[30.0, 31.0, 32.0])
+    target = tmp_path / "mdcrd.nc"
+    nframes = mdcrd_to_netcdf(
+        io.BytesIO(data), target, 5, time_step=2.0, chunk_frames=5
+    )
+    assert nframes == 12
+
+    trajectory = NetcdfTrajectoryData(file=str(target))
+    assert trajectory.natoms == 5
+    assert trajectory.nframes == 12
+    assert trajectory.base.attributes.get("title") == "test trajectory"
+    assert trajectory.time_range == [0.0, 22.0]
+    assert np.allclose(trajectory.get_frames(), coordinates, atol=1e-4)
+    assert trajectory.get_box()[3].tolist() == [30.0, 31.0, 32.0, 90.0, 90.0, 90.0]
@@ -0,0 +1,76 @@
+"""Test for the mdin file class"""
+
+import io
+import os
+
+import pytest
+
+from aiida_amber.data.mdin import MdinData, parse_mdin
+from aiida_amber.utils.namelist import iter_namelists, parse_namelist
+
+from .. import TEST_DIR
+
+MDIN = """Heating &cntrl title
+ &cntrl
+  imin=0, nstlim=500000, dt=0.002, ! 1 ns
+  ntpr=1000, ntwx=1, ntwr=-100000,
+  restraintmask=':1-10 & !@H=', restraint_wt=2.0d0,
+ /
+ &ewald skinnb=1.5, /
+ &wt type='TEMP0', istep1=0, istep2=1000, value1=0.0, value2=300.0, /
+ &wt type='END' /
+"""
+
+
+@pytest.fixture
+def mdindatafile():
+    yield MdinData(io.BytesIO(MDIN.encode()), filename="md.in")
+
+
+def test_parse_namelist():
+    """Check namelists are parsed into typed values"""
+    cntrl = parse_namelist(MDIN, "cntrl")
+    assert cntrl["nstlim"] == 500000
+    assert cntrl["dt"] == 0.002
+    assert cntrl["restraintmask"] == ":1-10 & !@H="
+    assert cntrl["restraint_wt"] == 2.0
+    assert [wt["type"] for wt in iter_namelists(MDIN, "wt")] == ["TEMP0", "END"]
+    assert parse_namelist(MDIN, "pb") == {}
+
+
+def test_parse_mdin_comment_slash():
+    """Check a "/" in a comment does not end the namelist"""
+    settings = parse_mdin(
+        "Heating\n &cntrl\n  imin=0, ! heat 0/300 K\n  nstlim=100, ntwx=10,\n /\n"
+    )
+    assert settings["nstlim"] == 100
+    assert settings["ntwx"] == 10
+
+
+def test_mdin_attributes(mdindatafile):
+    """Check the main &cntrl variables are stored with their defaults"""
+    attributes = mdindatafile.base.attributes.all
+    assert attributes["imin"] == 0
+    assert attributes["ntwx"] == 1
+    assert attributes["ntwv"] == 0
+    assert attributes["ioutfm"] == 1
+    assert mdindatafile.ewald == {"skinnb": 1.5}
+    assert len(mdindatafile.wt) == 2
+    assert mdindatafile.nsteps == 500000
+
+    minimisation = MdinData(
+        os.path.join(TEST_DIR, "input_files", "sander", "01_Min.in")
+    )
+    assert minimisation.nsteps == 200
+    assert minimisation.base.attributes.get("ntwr") == 1
+
+
+def test_predict_output_size(mdindatafile):
+    """Check every frame of the trajectory is counted"""
+    sizes = mdindatafile.predict_output_size(natom=1000000)
+    # float32 coordinates of every step dominate
+    assert sizes["mdcrd"] > 500000 * 1000000 * 3 * 4
+    assert sizes["mdcrd"] > 100 * sizes["mdout"]
+    # a new restart file of doubles is written every 100000 steps
+    assert sizes["restrt"] > 5 * 1000000 * 3 * 8 * 2
+    assert sizes["mdvel"] == 0
@@ -0,0 +1,51 @@
+"""Test for mdinfo progress parsing functions"""
+
+import os
+
+from aiida_amber.utils import mdinfo
+
+from .. import TEST_DIR
+
+
+def test_parse_mdinfo():
+    """Check the step count and timings are parsed from mdinfo"""
+    with open(
+        os.path.join(TEST_DIR, "input_files", "sander", "02_Heat.mdinfo"),
+        encoding="utf-8",
+    ) as handle:
+        progress = mdinfo.parse_mdinfo(handle)
+
+    assert progress["nstep"] == 5000
+    assert progress["time_ps"] == 10.0
+    assert progress["total_steps"] == 500000
+    assert progress["completed_steps"] == 5000
+    assert progress["remaining_steps"] == 495000
+    # the average over all steps is used rather than the last steps
+    assert progress["ns_per_day"] == 68.57
+    assert progress["time_remaining"] == 20.8 * 60
+
+
+def test_parse_mdinfo_without_timings():
+    """Check only the step count is returned when no timings are printed"""
+    lines = [
+        " NSTEP =      500   TIME(PS) =       1.000  TEMP(K) =   150.37  PRESS =     0.0",
+        " Etot   =     -8592.5547  EKtot   =      1262.0613  EPtot      =     -9854.6160",
+        " ------------------------------------------------------------------------------",
+    ]
+    assert mdinfo.parse_mdinfo(lines) == {"nstep": 500, "time_ps": 1.0}
+
+
+def test_parse_mdinfo_overflow():
+    """Check overflowed fields are left out rather than read as NaN"""
+    lines = [
+        " NSTEP = ********   TIME(PS) = ***********  TEMP(K) =   150.37  PRESS =     0.0",
+        " Etot   =     -8592.5547  EKtot   =      1262.0613  EPtot      =     -9854.6160",
+        " ------------------------------------------------------------------------------",
+        "| Total steps: 500000000 | Completed: 200000000 (40.0%) | Remaining: 300000000",
+        "|         ns/day =   ******   seconds/ns =    1234.56",
+    ]
+    assert mdinfo.parse_mdinfo(lines) == {
+        "total_steps": 500000000,
+        "completed_steps": 200000000,
+        "remaining_steps": 300000000,
+    }
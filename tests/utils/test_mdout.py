@@ -0,0 +1,71 @@
+"""Test for mdout energy parsing functions"""
+
+import math
+import os
+
+from aiida_amber.utils import mdout
+
+from .. import TEST_DIR
+
+MIN_OUT = """
+   NSTEP       ENERGY          RMS            GMAX         NAME    NUMBER
+      1      -8.0013E+03     1.5186E+01     1.0346E+02     O        2374
+
+ BOND    =        0.0000  ANGLE   =        0.0000  DIHED      =        0.0000
+ VDWAALS =     1036.7004  EEL     =   -10306.8727  HBOND      =        0.0000
+ 1-4 VDW =        0.0000  1-4 EEL =        0.0000  RESTRAINT  =        0.0000
+
+
+   NSTEP       ENERGY          RMS            GMAX         NAME    NUMBER
+     10      -8.9713E+03     4.1530E+00     2.3125E+01     H1       733
+
+ BOND    =        0.0000  ANGLE   =        0.0000  DIHED      =        0.0000
+ VDWAALS =      843.0187  EEL     =    -9814.3420  HBOND      =        0.0000
+ 1-4 VDW =        0.0000  1-4 EEL =        0.0000  RESTRAINT  =        0.0000
+
+
+                    FINAL RESULTS
+
+
+
+   NSTEP       ENERGY          RMS            GMAX         NAME    NUMBER
+     10      -8.9713E+03     4.1530E+00     2.3125E+01     H1       733
+
+ BOND    =        0.0000  ANGLE   =        0.0000  DIHED      =        0.0000
+ VDWAALS =      843.0187  EEL     =    -9814.3420  HBOND      =        0.0000
+ 1-4 VDW =        0.0000  1-4 EEL =        0.0000  RESTRAINT  =        0.0000
+"""
+
+
+def test_format_term_label():
+    """Check mdout terms are converted to valid array names"""
+    assert mdout.format_term_label("TIME(PS)") == "time_ps"
+    assert mdout.format_term_label("1-4 NB") == "1_4_nb"
+    assert mdout.format_term_label("Etot") == "etot"
+
+
+def test_parse_md_energies():
+    """Check the MD records are parsed and the summary blocks skipped"""
+    with open(
+        os.path.join(TEST_DIR, "input_files", "sander", "02_Heat.out"),
+        encoding="utf-8",
+    ) as handle:
+        energies = mdout.parse_mdout_energies(handle)
+
+    assert list(energies["nstep"]) == [0, 500, 1000]
+    assert list(energies["time_ps"]) == [0.0, 1.0, 2.0]
+    assert energies["etot"][-1] == -7314.2091
+    assert energies["1_4_nb"][1] == 4.5066
+    # overflowed fields and terms missing from a record are NaN
+    assert math.isnan(energies["press"][2])
+    assert math.isnan(energies["density"][0])
+    assert energies["density"][1] == 0.9851
+
+
+def test_parse_min_energies():
+    """Check the minimisation records are parsed"""
+    energies = mdout.parse_mdout_energies(MIN_OUT.splitlines())
+
+    assert list(energies["nstep"]) == [1, 10]
+    assert list(energies["energy"]) == [-8.0013e03, -8.9713e03]
+    assert energies["vdwaals"][1] == 843.0187
@@ -0,0 +1,51 @@
+"""Test for editing mdin namelists"""
+
+import pytest
+
+from aiida_amber.utils.namelist import parse_namelist, set_namelist_values
+
+MDIN = """Heating &cntrl title
+ &cntrl
+  imin=0, nstlim=1000,
+  ig=-1, temp0=300.0,
+ /
+ &wt type='TEMP0', istep1=0, /
+ &wt type='END' /
+"""
+
+
+def test_set_namelist_values():
+    """Check existing values are replaced and new ones added in place"""
+    text = set_namelist_values(MDIN, "cntrl", {"ig": 42, "ntwx": 500})
+    assert "ig=42, temp0=300.0," in text
+    assert "  ntwx=500,\n /" in text
+    # the title and the other namelists are untouched
+    assert text.startswith("Heating &cntrl title\n &cntrl\n  imin=0, nstlim=1000,")
+    assert text.endswith(" &wt type='TEMP0', istep1=0, /\n &wt type='END' /\n")
+
+
+def test_set_namelist_values_tokens():
+    """Check comments, quoted strings and space separated assignments are
+    left untouched when a value is replaced"""
+    mdin = """Restrained MD
+ &cntrl
+  temp0=300 ntt=3  ! temp0=250 in the previous run
+  restraintmask=':1-10 & !@H= | temp0=1', ntr=1,
+  TEMP0 = 300.0
+ /
+"""
+    text = set_namelist_values(mdin, "cntrl", {"temp0": 310, "ntr": 0})
+    assert "  temp0=310 ntt=3  ! temp0=250 in the previous run\n" in text
+    assert "  restraintmask=':1-10 & !@H= | temp0=1', ntr=0,\n" in text
+    # every assignment of the variable is replaced, so the last one is set
+    assert "  TEMP0 = 310\n" in text
+    cntrl = parse_namelist(text, "cntrl")
+    assert cntrl["temp0"] == 310
+    assert cntrl["ntt"] == 3
+    assert cntrl["restraintmask"] == ":1-10 & !@H= | temp0=1"
+
+
+def test_missing_namelist():
+    """Check a namelist that is not present raises"""
+    with pytest.raises(ValueError):
+        set_namelist_values(MDIN, "ewald", {"skinnb": 2.0})
@@ -0,0 +1,41 @@
+"""Test for NetCDF trajectory data class"""
+
+import os
+
+import numpy as np
+import pytest
+
+from aiida_amber.data.netcdf_trajectory import NetcdfTrajectoryData
+
+from .. import TEST_DIR
+
+
+@pytest.fixture
+def trajectory():
+    yield NetcdfTrajectoryData(os.path.join(TEST_DIR, "input_files", "sander", "md.nc"))
+
+
+def test_header_attributes(trajectory):
+    """Check the trajectory header is stored as attributes"""
+    assert trajectory.natoms == 12
+    assert trajectory.nframes == 6
+    assert trajectory.time_range == [2.0, 12.0]
+    assert trajectory.variables == ["coordinates"]
+    assert trajectory.base.attributes.get("conventions") == "AMBER"
+
+
+def test_frame_access(trajectory):
+    """Check frames and atoms can be selected from the stored trajectory"""
+    trajectory.store()
+    expected = np.arange(6 * 12 * 3, dtype=np.float32).reshape(6, 12, 3) / 10
+
+    np.testing.assert_allclose(trajectory.get_last_frame(), expected[-1])
+    np.testing.assert_allclose(
+        trajectory.get_frames(slice(1, 4), [0, 5]), expected[1:4][:, [0, 5]]
+    )
+    np.testing.assert_allclose(
+        trajectory.get_frames([0, 2, 4], [1, 3]), expected[[0, 2, 4]][:, [1, 3]]
+    )
+    assert trajectory.get_frames([0, 2], [1, 3]).shape == (2, 2, 3)
+    np.testing.assert_allclose(trajectory.get_box(0), [30, 31, 32, 90, 90, 90])
+    np.testing.assert_allclose(trajectory.get_times(), [2, 4, 6, 8, 10, 12])
@@ -0,0 +1,25 @@
+"""Test for node_utils functions"""
+
+import os
+
+from aiida_amber.data.tleap_input import TleapInputData
+from aiida_amber.utils import node_utils
+
+from .. import TEST_DIR
+
+
+def test_get_file_node_reuse(tmp_path):
+    """Check stored nodes are reused only for identical files"""
+    prmtop = os.path.join(TEST_DIR, "input_files", "sander", "parm7")
+    node = node_utils.get_file_node(prmtop)
+    assert not node.is_stored
+    node.store()
+
+    assert node_utils.get_file_node(prmtop).pk == node.pk
+
+    # same filename but different content
+    (tmp_path / "parm7").write_text("modified\n")
+    assert not node_utils.get_file_node(str(tmp_path / "parm7")).is_stored
+
+    # same content but a different node class
+    assert not node_utils.get_file_node(prmtop, TleapInputData).is_stored
@@ -0,0 +1,67 @@
+"""Test for the prmtop file class"""
+
+import os
+
+import numpy as np
+import pytest
+
+from aiida_amber.data.prmtop import PrmtopData
+from aiida_amber.utils.prmtop import decode_section, index_sections, read_pointers
+
+from .. import TEST_DIR
+
+PRMTOP = os.path.join(TEST_DIR, "input_files", "sander", "parm7")
+
+
+@pytest.fixture
+def prmtopdatafile():
+    yield PrmtopData(PRMTOP)
+
+
+def test_index_sections():
+    """Check the data of each section is found between the % lines"""
+    with open(PRMTOP, "rb") as handle:
+        buffer = handle.read()
+    version, sections = index_sections(buffer)
+
+    assert version.startswith("%VERSION")
+    assert list(sections)[:3] == ["TITLE", "POINTERS", "ATOM_NAME"]
+    offset, length, section_format = sections["POINTERS"]
+    assert section_format == "10I8"
+    pointers = decode_section(buffer[offset : offset + length], section_format)
+    with open(PRMTOP, encoding="utf-8") as handle:
+        assert pointers.tolist() == read_pointers(handle)
+
+
+def test_decode_section():
+    """Check fields are split by width, also on lines with trailing spaces removed"""
+    names = decode_section(b"H1  CH3 H2\nO   H\n", "3a4")
+    assert names.tolist() == ["H1", "CH3", "H2", "O", "H"]
+    charges = decode_section(b"  1.0E+00 -2.5E-01\n  3.0E+00\n", "2E9.2")
+    assert np.allclose(charges, [1.0, -0.25, 3.0])
+    assert decode_section(b"", "10I8").size == 0
+
+
+def test_prmtop_attributes(prmtopdatafile):
+    """Check the system size and box are stored as attributes"""
+    assert prmtopdatafile.natom == 2818
+    assert prmtopdatafile.nres == 702
+    assert prmtopdatafile.box_type == "octahedral"
+    assert len(prmtopdatafile.pointers) == 31
+    assert "RESIDUE_POINTER" in prmtopdatafile.flags
+
+
+def test_get_section(prmtopdatafile):
+    """Check single sections are read as arrays"""
+    assert prmtopdatafile.get_section("ATOM_NAME").shape == (2818,)
+    assert prmtopdatafile.get_section("RESIDUE_LABEL")[:3].tolist() == [
+        "ACE",
+        "ALA",
+        "NME",
+    ]
+    assert prmtopdatafile.get_section("RESIDUE_POINTER")[:2].tolist() == [1, 7]
+    charges = prmtopdatafile.get_charges()
+    assert charges.shape == (2818,)
+    assert abs(charges.sum()) < 1e-3
+    with pytest.raises(KeyError):
+        prmtopdatafile.get_section("NOT_A_FLAG")
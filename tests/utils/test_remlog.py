@@ -0,0 +1,51 @@
+"""Test for reading replica exchange logs and building temperature ladders"""
+
+import os
+
+import numpy as np
+
+from aiida_amber.utils import remlog
+
+from .. import TEST_DIR
+
+
+def test_parse_remlog():
+    """Check the exchanges are read into (exchanges, replicas) arrays"""
+    filepath = os.path.join(TEST_DIR, "input_files", "sander", "rem.log")
+    with open(filepath, encoding="utf-8") as handle:
+        exchange = remlog.parse_remlog(handle)
+
+    assert exchange["temperature"].shape == (6, 4)
+    assert exchange["replica"][0].tolist() == [1, 2, 3, 4]
+    assert exchange["temperature"][1].tolist() == [310.0, 300.0, 320.0, 330.0]
+    assert exchange["success"][0].tolist() == [True, True, False, False]
+    # replica 1 moves up the ladder by one exchange at a time
+    assert exchange["temperature_index"][:4, 0].tolist() == [0, 1, 2, 2]
+    assert np.allclose(exchange["acceptance"], [0.5, 1.0, 0.0])
+    # the last exchange swaps back replicas 2 and 3
+    assert exchange["temperature_index"][-1].tolist() == [0, 2, 1, 3]
+    assert remlog.get_final_temperature_index(exchange).tolist() == [0, 1, 2, 3]
+
+
+def test_incomplete_exchange():
+    """Check the lines of an exchange cut off by a stopped run are dropped"""
+    filepath = os.path.join(TEST_DIR, "input_files", "sander", "rem.log")
+    with open(filepath, encoding="utf-8") as handle:
+        lines = handle.readlines()
+    exchange = remlog.parse_remlog(lines[:-2])
+    assert exchange["temperature"].shape == (5, 4)
+    assert remlog.parse_remlog(lines[:4]) == {}
+
+
+def test_ladders():
+    """Check the geometric ladder and its re-spacing keep the end points"""
+    ladder = remlog.geometric_ladder(300.0, 400.0, 5)
+    assert np.allclose(ladder[[0, -1]], [300.0, 400.0])
+    assert np.allclose(ladder[1:] / ladder[:-1], ladder[1] / ladder[0])
+
+    # uniform acceptance keeps the spacing in ln(T)
+    assert np.allclose(remlog.respace_ladder(ladder, [0.3] * 4), ladder)
+    # a gap with low acceptance is narrowed
+    respaced = remlog.respace_ladder(ladder, [0.5, 0.5, 0.5, 0.05])
+    assert np.allclose(respaced[[0, -1]], [300.0, 400.0])
+    assert respaced[4] - respaced[3] < ladder[4] - ladder[3]
@@ -0,0 +1,76 @@
+"""Test for exporting repository files"""
+
+import io
+import os
+
+import pytest
+
+from aiida.common.links import LinkType
+from aiida.orm import CalcJobNode, FolderData, SinglefileData
+
+from aiida_amber.utils.repository import (
+    export_outputs,
+    export_tree,
+    repository_file_path,
+    validate_export_mode,
+)
+
+
+@pytest.fixture
+def folder():
+    node = FolderData()
+    node.base.repository.put_object_from_bytes(b"mdout\n", "mdout")
+    node.base.repository.put_object_from_bytes(b"frame\n", "traj/mdcrd")
+    yield node
+
+
+@pytest.mark.parametrize("mode", ["copy", "reflink"])
+def test_export_tree(folder, tmp_path, mode):
+    """Check all files are exported whatever the file system supports"""
+    # an existing file is replaced rather than written through
+    (tmp_path / "mdout").write_text("old\n")
+    export_tree(folder, str(tmp_path), mode)
+    assert (tmp_path / "mdout").read_text() == "mdout\n"
+    assert (tmp_path / "traj" / "mdcrd").read_text() == "frame\n"
+
+
+def test_export_none(folder, tmp_path):
+    """Check nothing is written when export is deferred"""
+    export_tree(folder, str(tmp_path), "none")
+    assert not os.listdir(tmp_path)
+
+
+@pytest.mark.parametrize("mode", ["copy", "reflink"])
+def test_export_leaves_repository(folder, tmp_path, mode):
+    """Check exported files are separate from the repository objects"""
+    folder.store()
+    with repository_file_path(folder, "mdout") as filepath:
+        source = os.stat(filepath)
+    export_tree(folder, str(tmp_path), mode)
+    target = tmp_path / "mdout"
+    assert os.stat(target).st_ino != source.st_ino
+    target.write_text("edited\n")
+    with repository_file_path(folder, "mdout") as filepath:
+        assert os.stat(filepath).st_mode == source.st_mode
+    assert folder.base.repository.get_object_content("mdout") == "mdout\n"
+
+
+def test_export_outputs(folder, tmp_path):
+    """Check outputs written by the parser are exported with retrieved"""
+    process = CalcJobNode()
+    process.store()
+    folder.base.links.add_incoming(process, LinkType.CREATE, "retrieved")
+    folder.store()
+    trajectory = SinglefileData(io.BytesIO(b"compressed\n"), filename="md.nc")
+    trajectory.base.links.add_incoming(process, LinkType.CREATE, "mdcrd")
+    trajectory.store()
+
+    export_outputs(process, str(tmp_path))
+    assert (tmp_path / "mdout").read_text() == "mdout\n"
+    assert (tmp_path / "md.nc").read_text() == "compressed\n"
+
+
+def test_validate_export_mode():
+    """Check hardlinks to the repository objects are not an export mode"""
+    assert validate_export_mode("reflink", None) is None
+    assert "output_export" in validate_export_mode("hardlink", None)
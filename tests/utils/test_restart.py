@@ -0,0 +1,86 @@
+"""Test for the restart/coordinates file class"""
+
+import io
+import os
+
+import numpy as np
+import pytest
+
+from aiida_amber.data.restart import VELOCITY_SCALE, RestartData, parse_rst7
+
+from .. import TEST_DIR
+
+# Three atoms with velocities and a box, the last line of coordinates is
+# shorter and the velocities start on a new line.
+RST7 = b"""water
+     3  0.2000000E+02
+   1.0000000   2.0000000   3.0000000  -4.0000000   5.0000000   6.0000000
+   7.0000000   8.0000000   9.0000000
+   0.1000000   0.2000000   0.3000000   0.4000000   0.5000000   0.6000000
+   0.7000000   0.8000000  -0.9000000
+  30.0000000  30.0000000  30.0000000  90.0000000  90.0000000  90.0000000
+"""
+
+
+def test_parse_rst7():
+    """Check coordinates, velocities and box are split by their number"""
+    restart = parse_rst7(RST7)
+    assert restart["natom"] == 3
+    assert restart["time"] == 20.0
+    assert restart["coordinates"][1].tolist() == [-4.0, 5.0, 6.0]
+    assert np.allclose(restart["velocities"][2] / VELOCITY_SCALE, [0.7, 0.8, -0.9])
+    assert restart["box"].tolist() == [30.0, 30.0, 30.0, 90.0, 90.0, 90.0]
+
+    # without velocities and box
+    restart = parse_rst7(b"".join(RST7.splitlines(keepends=True)[:4]))
+    assert restart["velocities"] is None
+    assert restart["box"] is None
+
+    with pytest.raises(ValueError):
+        parse_rst7(b"".join(RST7.splitlines(keepends=True)[:3]))
+
+
+def test_parse_rst7_two_atoms():
+    """Check six values after the coordinates of two atoms are the box"""
+    lines = RST7.splitlines(keepends=True)
+    data = b"water\n     2\n" + lines[2] + lines[-1]
+    restart = parse_rst7(data)
+    assert restart["velocities"] is None
+    assert restart["box"].tolist() == [30.0, 30.0, 30.0, 90.0, 90.0, 90.0]
+
+    restart = parse_rst7(b"water\n     2\n" + lines[2] + lines[4] + lines[-1])
+    assert np.allclose(restart["velocities"][1] / VELOCITY_SCALE, [0.4, 0.5, 0.6])
+    assert restart["box"][0] == 30.0
+
+
+@pytest.mark.parametrize("header", [b"", b"   \n", b"  abc\n"])
+def test_parse_rst7_invalid_header(header):
+    """Check a missing or invalid number of atoms raises a ValueError"""
+    lines = RST7.splitlines(keepends=True)
+    with pytest.raises(ValueError):
+        parse_rst7(lines[0] + header + b"".join(lines[2:]))
+
+
+def test_rst7_attributes():
+    """Check the number of atoms and box of an inpcrd are stored"""
+    restart = RestartData(os.path.join(TEST_DIR, "input_files", "sander", "rst7"))
+    assert restart.natom == 2818
+    assert restart.time is None
+    assert restart.has_velocities is False
+    assert restart.box[3] == pytest.approx(109.471219)
+    assert restart.get_coordinates().shape == (2818, 3)
+
+    restart = RestartData(io.BytesIO(RST7), filename="md.rst7")
+    assert restart.base.attributes.get("format") == "rst7"
+    assert restart.get_velocities().shape == (3, 3)
+
+
+def test_netcdf_restart():
+    """Check NetCDF restarts are read with their velocities in A/ps"""
+    restart = RestartData(os.path.join(TEST_DIR, "input_files", "sander", "md.ncrst"))
+    assert restart.base.attributes.get("format") == "netcdf"
+    assert restart.natom == 4
+    assert restart.time == 20.0
+    assert restart.has_velocities
+    assert np.allclose(restart.get_velocities(), 0.5 * VELOCITY_SCALE)
+    assert restart.get_coordinates()[0].tolist() == [18.0520652, 14.4774053, 12.5238459]
@@ -1,6 +1,14 @@
 """ Test for searchprevious utility functions
 
 """
+import io
+
+import pytest
+
+from aiida.common.links import LinkType
+from aiida.orm import CalcJobNode, SinglefileData
+from aiida.orm.nodes.process.process import ProcessState
+
 from aiida_amber.utils import searchprevious
 
 
@@ -12,3 +20,45 @@ def test_link_formats():
 
     str1 = searchprevious.format_link_label("1?.consecutive__underscores..txt")
     assert str1 == "1_consecutive_underscores_txt"
+
+
+def test_find_previous_file_nodes():
+    """
+    Tests the newest output file node of previous processes is found for
+    each filename
+    """
+    nodes = []
+    for content in ["old", "new"]:
+        process = CalcJobNode()
+        process.store()
+        for filename in ["a.rst", "a.out"]:
+            node = SinglefileData(io.BytesIO(content.encode()), filename=filename)
+            link_label = searchprevious.format_link_label(filename)
+            node.base.links.add_incoming(process, LinkType.CREATE, link_label)
+            node.store()
+            nodes.append(node)
+
+    file_nodes = searchprevious.find_previous_file_nodes(["a.rst", "missing.in"])
+    assert list(file_nodes) == ["a.rst"]
+    assert file_nodes["a.rst"].pk == nodes[2].pk
+
+
+def test_wait_for_processes():
+    """
+    Tests waiting only returns for processes that finished successfully
+    """
+    nodes = {}
+    for exit_status in [0, 1]:
+        process = CalcJobNode()
+        process.set_process_state(ProcessState.FINISHED)
+        process.set_exit_status(exit_status)
+        nodes[exit_status] = process.store()
+    running = CalcJobNode()
+    running.set_process_state(ProcessState.RUNNING)
+    running.store()
+
+    searchprevious.wait_for_processes([nodes[0].pk])
+    with pytest.raises(RuntimeError):
+        searchprevious.wait_for_processes([nodes[0].pk, nodes[1].pk])
+    with pytest.raises(TimeoutError):
+        searchprevious.wait_for_processes([running.pk], timeout=0.1)
@@ -0,0 +1,80 @@
+"""Test for expanding mdin templates into parameter sweeps"""
+
+import pytest
+
+from aiida.orm import CalcJobNode
+
+from aiida_amber.utils import sweep
+from aiida_amber.utils.sweep import expand_sweeps, parse_range, parse_sweep
+
+MDIN = """Heating
+ &cntrl
+  imin=0, nstlim=1000,
+  temp0=300.0, cut=8.0,
+ /
+ &ewald
+  skinnb=2.0,
+ /
+"""
+
+
+def test_parse_sweep():
+    """Check lists, ranges and namelists of sweeps are parsed"""
+    assert parse_sweep("temp0=300:330:10") == ("cntrl", "temp0", [300, 310, 320, 330])
+    assert parse_sweep("cut=8.0, 10.0") == ("cntrl", "cut", ["8.0", "10.0"])
+    assert parse_sweep("ewald.skinnb=1.0,2.0") == ("ewald", "skinnb", ["1.0", "2.0"])
+    assert parse_sweep("restraintmask=':1-10',':11-20'") == (
+        "cntrl",
+        "restraintmask",
+        ["':1-10'", "':11-20'"],
+    )
+    assert parse_range("0.1:0.3:0.1") == [0.1, 0.2, 0.3]
+    with pytest.raises(ValueError):
+        parse_sweep("temp0")
+    with pytest.raises(ValueError):
+        parse_range("300:200:10")
+
+
+def test_expand_sweeps():
+    """Check one mdin is generated for every combination of values"""
+    sweeps = [parse_sweep("temp0=300,310"), parse_sweep("ewald.skinnb=1.0,1.5,2.0")]
+    variants = expand_sweeps(MDIN, sweeps)
+
+    assert len(variants) == 6
+    values, text = variants[-1]
+    assert values == {"temp0": "310", "skinnb": "2.0"}
+    assert "temp0=310, cut=8.0," in text
+    assert "skinnb=2.0," in text
+    values, text = variants[1]
+    assert values == {"temp0": "300", "skinnb": "1.5"}
+    assert "skinnb=1.5," in text
+
+
+def test_submit_with_limit(monkeypatch):
+    """Check only the processes active at the last check are queried"""
+    nodes = []
+    checked = []
+
+    def submit(process_class, **inputs):
+        # each submission lets the oldest running process finish
+        running = [node for node in nodes if not node.is_terminated]
+        if running:
+            running[0].set_process_state("finished")
+        node = CalcJobNode()
+        node.set_process_state("running")
+        nodes.append(node.store())
+        return node
+
+    def get_active(pks):
+        checked.append(list(pks))
+        return get_active_query(pks)
+
+    get_active_query = sweep.get_active
+    monkeypatch.setattr(sweep.engine, "submit", submit)
+    monkeypatch.setattr(sweep, "get_active", get_active)
+
+    submitted = sweep.submit_with_limit([(None, {})] * 4, max_concurrent=2)
+
+    assert submitted == nodes
+    pks = [node.pk for node in nodes]
+    assert checked == [pks[:2], pks[1:3]]
@@ -0,0 +1,107 @@
+"""Test for resolving the files of tleap scripts"""
+
+import pytest
+
+from aiida_amber.utils import tleap_script
+
+SCRIPT = """source leaprc.protein.ff14SB  # standard leaprc
+source leaprc.ligands
+mol=loadPdb "my protein.pdb"
+saveAmberParm mol complex.prmtop complex.rst7
+logFile leap.log
+"""
+
+LEAPRC = """source leaprc.gaff2
+lig = loadMol2 lig.mol2
+loadAmberParams lig.frcmod
+loadOff lig.lib
+"""
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Resolve the scripts of each test again."""
+    tleap_script.clear_cache()
+    yield
+    tleap_script.clear_cache()
+
+
+def test_tokenize_line():
+    """Check comments, quotes, braces and assignments are tokenized"""
+    assert tleap_script.tokenize_line('x=loadpdb "a b.pdb" # load "c"') == [
+        "x", "=", "loadpdb", "a b.pdb",
+    ]  # fmt: skip
+    assert tleap_script.tokenize_line("complex = combine {protein lig}") == [
+        "complex", "=", "combine", "{", "protein", "lig", "}",
+    ]  # fmt: skip
+    assert not tleap_script.tokenize_line("# comment # load1")
+
+
+def test_resolve_script(tmp_path):
+    """Check sourced scripts are followed and standard leaprcs are skipped"""
+    (tmp_path / "leaprc.ligands").write_text(LEAPRC)
+    (tmp_path / "lig.lib").write_text("")
+    files = tleap_script.resolve_script(SCRIPT, str(tmp_path))
+
+    assert files["input_files"] == [
+        "leaprc.ligands", "lig.mol2", "lig.frcmod", "lig.lib", "my protein.pdb",
+    ]  # fmt: skip
+    assert files["output_files"] == ["complex.prmtop", "complex.rst7", "leap.log"]
+    assert files["sources"] == ["leaprc.ligands"]
+    assert files["system_files"] == ["leaprc.protein.ff14SB", "leaprc.gaff2"]
+
+
+def test_resolve_script_include_dirs(tmp_path):
+    """Check files found in -I dirs are not input files"""
+    (tmp_path / "leaprc").mkdir()
+    (tmp_path / "leaprc" / "leaprc.ligands").write_text(LEAPRC)
+    (tmp_path / "leaprc" / "lig.frcmod").write_text("")
+    files = tleap_script.resolve_script(SCRIPT, str(tmp_path), ["leaprc"])
+
+    assert files["input_files"] == ["lig.mol2", "lig.lib", "my protein.pdb"]
+    assert files["include_files"] == ["lig.frcmod"]
+    assert files["sources"] == ["leaprc.ligands"]
+
+
+def test_resolve_script_cache(tmp_path):
+    """Check a script is resolved again only when a sourced script changes"""
+    leaprc = tmp_path / "leaprc.ligands"
+    leaprc.write_text(LEAPRC)
+    files = tleap_script.resolve_script(SCRIPT, str(tmp_path))
+    assert tleap_script.resolve_script(SCRIPT, str(tmp_path)) == files
+
+    leaprc.write_text("loadMol2 other.mol2\n")
+    files = tleap_script.resolve_script(SCRIPT, str(tmp_path))
+    assert "other.mol2" in files["input_files"]
+    assert "lig.mol2" not in files["input_files"]
+
+    # a standard leaprc that is added locally becomes an input file
+    (tmp_path / "leaprc.protein.ff14SB").write_text("")
+    files = tleap_script.resolve_script(SCRIPT, str(tmp_path))
+    assert files["input_files"][0] == "leaprc.protein.ff14SB"
+
+
+def test_resolve_script_cache_lookup(tmp_path):
+    """Check a script is resolved again when a file is added where tleap
+    looks for it, for loaded files and sourced scripts"""
+    (tmp_path / "leaprc").mkdir()
+    files = tleap_script.resolve_script(SCRIPT, str(tmp_path), ["leaprc"])
+    assert "my protein.pdb" in files["input_files"]
+    assert "leaprc.ligands" in files["system_files"]
+
+    # a loaded file that appears in an -I dir is uploaded with it
+    (tmp_path / "leaprc" / "my protein.pdb").write_text("")
+    files = tleap_script.resolve_script(SCRIPT, str(tmp_path), ["leaprc"])
+    assert files["include_files"] == ["my protein.pdb"]
+    assert "my protein.pdb" not in files["input_files"]
+
+    # a sourced script that appears in an -I dir is followed
+    (tmp_path / "leaprc" / "leaprc.ligands").write_text(LEAPRC)
+    files = tleap_script.resolve_script(SCRIPT, str(tmp_path), ["leaprc"])
+    assert files["sources"] == ["leaprc.ligands"]
+    assert "lig.mol2" in files["input_files"]
+
+    # and a loaded file that is removed is an input file again
+    (tmp_path / "leaprc" / "my protein.pdb").unlink()
+    files = tleap_script.resolve_script(SCRIPT, str(tmp_path), ["leaprc"])
+    assert "my protein.pdb" in files["input_files"]
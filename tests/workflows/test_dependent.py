@@ -0,0 +1,97 @@
+""" Tests for the workchain launching a calculation after its upstream processes."""
+import os
+import shutil
+
+from aiida.common.links import LinkType
+from aiida.engine import run_get_node
+from aiida.orm import CalcJobNode, QueryBuilder
+from aiida.plugins import CalculationFactory, DataFactory
+
+from aiida_amber.cli import sander
+from aiida_amber.data.restart import RestartData
+from aiida_amber.data.tleap_input import TleapInputData
+from aiida_amber.workflows.dependent import DependentWorkChain
+
+from .. import TEST_DIR
+
+SCRIPT = "mol = sequence { ALA }\nsaveamberparm mol mol.prmtop mol.rst7\nquit\n"
+
+
+def run_tleap(tleap_code, directory):
+    """Run tleap writing mol.prmtop and mol.rst7 to the directory."""
+    (directory / "tleap.in").write_text(SCRIPT)
+    inputs = {
+        "code": tleap_code,
+        "parameters": DataFactory("amber.tleap")({}),
+        "tleapscript": TleapInputData(file=str(directory / "tleap.in")),
+        "metadata": {"options": {"output_dir": str(directory)}},
+    }
+    inputs.update(inputs["tleapscript"].calculation_inputs_outputs[1])
+    return run_get_node(CalculationFactory("amber.tleap"), **inputs)[1]
+
+
+def launch_sander(amber_code, wait_for):
+    """Launch sander from the current directory with the sander cli, taking
+    the prmtop and restart file written by tleap."""
+    args = ["--code", amber_code.full_label, "-i", "01_Min.in", "-p", "mol.prmtop"]
+    args += ["-c", "mol.rst7", "-o", "min.out", "-r", "min.rst7"]
+    for pk in wait_for:
+        args += ["--wait-for", str(pk)]
+    with sander.cli.make_context("aiida_sander", args) as context:
+        params = context.params
+    return sander.launch(params)
+
+
+def get_workchain():
+    """Get the last DependentWorkChain node."""
+    qb = QueryBuilder().append(DependentWorkChain, project="*")
+    qb.order_by({DependentWorkChain: {"ctime": "desc"}})
+    return qb.first()[0]
+
+
+def test_launch_after(mock_tleap_code, mock_amber_code, tmp_path, monkeypatch):
+    """Test the files written by an upstream process are taken from its
+    outputs when the calculation is launched."""
+    (tmp_path / "tleap").mkdir()
+    (tmp_path / "sander").mkdir()
+    shutil.copy(
+        os.path.join(TEST_DIR, "input_files", "sander", "01_Min.in"),
+        tmp_path / "sander",
+    )
+    monkeypatch.chdir(tmp_path / "sander")
+    upstream = run_tleap(mock_tleap_code, tmp_path / "tleap")
+
+    result = launch_sander(mock_amber_code, [upstream.pk])
+
+    node = get_workchain()
+    assert node.is_finished_ok
+    calculation = node.base.links.get_outgoing(
+        link_type=LinkType.CALL_CALC, link_label_filter="calculation"
+    ).one()
+    assert calculation.node.inputs.prmtop.uuid == upstream.outputs.mol_prmtop.uuid
+    # the restart file output by tleap is converted to the input node class
+    inpcrd = calculation.node.inputs.inpcrd
+    assert isinstance(inpcrd, RestartData)
+    assert inpcrd.creator.inputs.file.uuid == upstream.outputs.mol_rst7.uuid
+    assert result["restrt"].uuid == calculation.node.outputs.restrt.uuid
+    # the outputs are exported where the command was run, not by the daemon
+    output_dir = calculation.node.base.extras.get("output_dir")
+    assert output_dir == str(tmp_path / "sander")
+
+
+def test_upstream_failed(mock_amber_code, tmp_path, monkeypatch):
+    """Test the calculation is not launched if an upstream process failed."""
+    failed = CalcJobNode()
+    failed.set_process_state("finished")
+    failed.set_exit_status(1)
+    failed.store()
+    shutil.copy(os.path.join(TEST_DIR, "input_files", "sander", "01_Min.in"), tmp_path)
+    monkeypatch.chdir(tmp_path)
+
+    launch_sander(mock_amber_code, [failed.pk])
+
+    node = get_workchain()
+    assert (
+        node.exit_status == DependentWorkChain.exit_codes.ERROR_UPSTREAM_FAILED.status
+    )
+    assert not node.called
@@ -0,0 +1,55 @@
+""" Tests for the equilibration workchain."""
+import os
+
+from aiida.common.links import LinkType
+from aiida.engine import run_get_node
+from aiida.orm import List
+from aiida.plugins import DataFactory, WorkflowFactory
+
+from .. import TEST_DIR
+
+
+def get_file(filename):
+    """Return a SinglefileData node of a sander test input file."""
+    SinglefileData = DataFactory("core.singlefile")
+    return SinglefileData(
+        file=os.path.join(TEST_DIR, "input_files", "sander", filename)
+    )
+
+
+def run_equilibration(amber_code, systems):
+    """Run two minimisation stages on each of the given systems."""
+    inputs = {
+        "sander": {"code": amber_code},
+        "stages": List(["min1", "min2"]),
+        "mdin": {"min1": get_file("01_Min.in"), "min2": get_file("01_Min.in")},
+        "prmtop": {system: get_file("parm7") for system in systems},
+        "inpcrd": {system: get_file("rst7") for system in systems},
+    }
+    return run_get_node(WorkflowFactory("amber.equilibration"), **inputs)
+
+
+def test_stages_chained(amber_code):
+    """Test each stage starts from the restart file of the previous one."""
+
+    result, node = run_equilibration(amber_code, ["system"])
+
+    assert node.is_finished_ok
+    calculations = {
+        link.link_label: link.node
+        for link in node.base.links.get_outgoing(link_type=LinkType.CALL_CALC).all()
+    }
+    assert calculations["min1"].inputs.inpcrd.filename == "rst7"
+    assert calculations["min2"].inputs.inpcrd.uuid == (
+        calculations["min1"].outputs.restrt.uuid
+    )
+    assert result["restrt"]["system"].filename == "min2.rst7"
+
+
+def test_multiple_systems(amber_code):
+    """Test each system is run in its own child workchain."""
+
+    result, node = run_equilibration(amber_code, ["first", "second"])
+
+    assert node.is_finished_ok
+    assert set(result["restrt"]) == {"first", "second"}
@@ -0,0 +1,129 @@
+""" Tests for the temperature replica exchange workchain."""
+import io
+import os
+
+import numpy as np
+import pytest
+
+from aiida.common.links import LinkType
+from aiida.engine import run_get_node
+from aiida.orm import Bool, Int, List
+from aiida.plugins import DataFactory, WorkflowFactory
+
+from aiida_amber.utils import remlog
+
+from .. import TEST_DIR
+
+MDIN = """T-REMD
+ &cntrl
+  imin=0, nstlim=10, ntpr=5, dt=0.002, numexchg={numexchg},
+ /
+"""
+TEMPERATURES = [300.0, 310.0, 320.0]
+
+
+def run_remd(mock_amber_code, numexchg=5, parameters=None):
+    """Run two rounds of three replicas with the mock multisander."""
+    if parameters is None:
+        parameters = {"o": "md.out", "r": "md.rst7", "O": True}
+    SinglefileData = DataFactory("core.singlefile")
+    mdin = MDIN.format(numexchg=numexchg).encode()
+    inputs = {
+        "multisander": {
+            "code": mock_amber_code,
+            "parameters": DataFactory("amber.sander")(parameters),
+            "mdin": SinglefileData(io.BytesIO(mdin), filename="remd.in"),
+            "prmtop": SinglefileData(
+                file=os.path.join(TEST_DIR, "input_files", "sander", "parm7")
+            ),
+            "metadata": {
+                "options": {
+                    "withmpi": False,
+                    "resources": {"num_machines": 1, "num_mpiprocs_per_machine": 3},
+                },
+            },
+        },
+        "inpcrd": SinglefileData(
+            file=os.path.join(TEST_DIR, "input_files", "sander", "rst7")
+        ),
+        "temperatures": List(TEMPERATURES),
+        "num_rounds": Int(2),
+        "respace": Bool(True),
+    }
+    return run_get_node(WorkflowFactory("amber.remd"), **inputs)
+
+
+def get_rounds(node):
+    """Get the multisander calculations of each round."""
+    return {
+        link.link_label: link.node
+        for link in node.base.links.get_outgoing(link_type=LinkType.CALL_CALC).all()
+        if link.link_label.startswith("round_")
+    }
+
+
+def test_rounds_chained(mock_amber_code):
+    """Test each replica continues the next round from its restart file at
+    the temperature it ended at, in the re-spaced ladder."""
+
+    result, node = run_remd(mock_amber_code)
+
+    assert node.is_finished_ok
+    rounds = get_rounds(node)
+    assert set(rounds) == {"round_0", "round_1"}
+    first, second = rounds["round_0"], rounds["round_1"]
+    replicas = sorted(first.inputs.inpcrd)
+
+    cntrl = first.inputs.cntrl.get_dict()
+    assert [cntrl[replica] for replica in replicas] == [
+        {"temp0": temperature} for temperature in TEMPERATURES
+    ]
+
+    # the ladder is re-spaced from the acceptance of the first round
+    exchange = first.outputs.exchange
+    ladder = remlog.respace_ladder(TEMPERATURES, exchange.get_array("acceptance"))
+    assert result["temperatures"].get_list() == [round(t, 2) for t in ladder]
+    assert result["temperatures"].get_list() != TEMPERATURES
+
+    final_index = remlog.get_final_temperature_index(
+        {item: exchange.get_array(item) for item in exchange.get_arraynames()}
+    )
+    # the mock exchanges the two hottest replicas by the fifth exchange
+    assert final_index.tolist() != list(range(len(replicas)))
+    cntrl = second.inputs.cntrl.get_dict()
+    for replica, index in zip(replicas, final_index):
+        assert cntrl[replica] == {
+            "temp0": result["temperatures"][index],
+            "irest": 1,
+            "ntx": 5,
+        }
+        assert second.inputs.inpcrd[replica].uuid == (
+            first.outputs.replicas[replica]["restrt"].uuid
+        )
+        assert result["restrt"][replica].uuid == (
+            second.outputs.replicas[replica]["restrt"].uuid
+        )
+    assert set(result["exchange"]) == {"round_0", "round_1"}
+    assert np.array_equal(
+        result["exchange"]["round_0"].get_array("acceptance"),
+        exchange.get_array("acceptance"),
+        equal_nan=True,
+    )
+
+
+def test_round_failed(mock_amber_code):
+    """Test the workchain stops if a round logs no exchanges."""
+
+    _, node = run_remd(mock_amber_code, numexchg=0)
+
+    RemdWorkChain = WorkflowFactory("amber.remd")
+    assert node.exit_status == RemdWorkChain.exit_codes.ERROR_ROUND_FAILED.status
+    assert set(get_rounds(node)) == {"round_0"}
+    assert "restrt" not in node.outputs
+
+
+def test_no_restart(mock_amber_code):
+    """Test more rounds are rejected without a restart file to continue from."""
+
+    with pytest.raises(ValueError, match="restart file"):
+        run_remd(mock_amber_code, parameters={"o": "md.out", "O": True})